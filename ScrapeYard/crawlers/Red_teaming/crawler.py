@@ -1,15 +1,45 @@
+import asyncio
+import multiprocessing
 import os
 import json
+import signal
 import time
 import logging
-import re
+import uuid
+import sys
+from pathlib import Path
 from urllib.parse import urljoin, urlparse
-from collections import deque
+from urllib.robotparser import RobotFileParser
 
+import httpx
 import requests
-from bs4 import BeautifulSoup
 from tqdm import tqdm
 
+try:
+    from ..checkpoint import CheckpointStore
+    from ..dedup import ContentFingerprints
+    from ..frontier import URLFrontier
+    from ..metrics import Metrics
+    from ..parsing import get_backend
+    from ..render import RenderRouter
+    from ..scanner import ContentScanner
+    from ..scheduler import HostRateLimiter, PolitenessScheduler
+    from ..sinks import JSONSink
+    from ..sitemap import iter_sitemap, robots_sitemaps
+except ImportError:
+    # Run as a script from this directory: make the crawlers package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from crawlers.checkpoint import CheckpointStore
+    from crawlers.dedup import ContentFingerprints
+    from crawlers.frontier import URLFrontier
+    from crawlers.metrics import Metrics
+    from crawlers.parsing import get_backend
+    from crawlers.render import RenderRouter
+    from crawlers.scanner import ContentScanner
+    from crawlers.scheduler import HostRateLimiter, PolitenessScheduler
+    from crawlers.sinks import JSONSink
+    from crawlers.sitemap import iter_sitemap, robots_sitemaps
+
 # Optional Selenium
 SELENIUM_AVAILABLE = False
 try:
@@ -23,12 +53,13 @@ except ImportError:
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
+logging.getLogger("httpx").setLevel(logging.WARNING)  # no per-request INFO lines
 
 
 class RedTeamSelfAuditCrawler:
     """Minimal red-team style site audit crawler."""
 
-    def __init__(self, site_config, global_config):
+    def __init__(self, site_config, global_config, resume=False, progress=None):
         self.name = site_config["name"]
         self.base_url = site_config["base_url"].rstrip("/")
         self.domain = urlparse(self.base_url).netloc
@@ -38,6 +69,12 @@ class RedTeamSelfAuditCrawler:
         self.delay = global_config.get("delay", 0.8)
         self.use_selenium = global_config.get("use_selenium", True)
         self.bruteforce_paths = global_config.get("bruteforce_paths", True)
+        self.parser = get_backend(global_config.get("parser", "html.parser"))
+        self.link_selector = self.parser.compile("a[href]")
+
+        # Sensitive keywords and email/YouTube extractors, compiled once from the rules file
+        rules_path = global_config.get("scan_rules") or Path(__file__).with_name("scan_rules.json")
+        self.scanner = ContentScanner.from_file(rules_path)
 
         # Output
         self.output_dir = os.path.join(global_config.get("output_dir", "output"), self.name)
@@ -49,12 +86,84 @@ class RedTeamSelfAuditCrawler:
             'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36'
         })
 
+        # Engine: "async" fetches up to `concurrency` URLs at once, spacing requests to
+        # each host by host_delay (backing off on 429/503); "sync" sleeps `delay` after every URL.
+        # Without host_delay the spacing is the site's robots.txt Crawl-delay/Request-rate, or
+        # else `delay`, so switching engines never makes the audit more aggressive. A single-site
+        # audit is then still one request per `delay`: set host_delay lower to make use of
+        # concurrency. `burst` requests may go out back to back before the spacing applies.
+        self.engine = global_config.get("engine", "async")
+        self.concurrency = max(1, int(global_config.get("concurrency", 16)))
+        self.host_delay = global_config.get("host_delay")
+        self.scheduler = PolitenessScheduler(
+            default_delay=self.delay if self.host_delay is None else self.host_delay,
+            burst=global_config.get("burst", 1),
+        )
+
+        # Results are streamed to disk as pages are crawled; only summary counters stay in memory
+        batch_size = global_config.get("batch_size", 50)
+        self.full_sink = JSONSink(self.output_dir, stem="full_crawl", batch_size=batch_size)
+        self.risk_sink = JSONSink(self.output_dir, stem="RISK_FINDINGS", batch_size=batch_size)
+        self.total_pages = 0
+        self.sensitive_pages = 0
+        self.duplicate_pages = 0
+        self.soft_404_pages = 0
+        self.emails_found = set()
+
+        # Near-duplicate and soft-404 detection; pagination seeds are then
+        # queued one page at a time and stop after a run of duplicates
+        dedup = global_config.get("dedup", {})
+        self.dedup_enabled = dedup.get("enabled", True)
+        self.fingerprints = ContentFingerprints(dedup.get("max_distance", 3))
+        self.detect_soft_404 = dedup.get("soft_404", True)
+        self.soft_404 = None  # SimHash of the site's "not found" page, if it answers 200
+        self.pagination_stop_after = dedup.get("pagination_stop_after", 2)
+        self.pagination = {}  # queued pagination url -> (prefix, page number, duplicate streak)
+
         # State
-        self.visited = set()
-        self.to_visit = deque()
-        self.data = []
+        # The frontier's seen set (frontier.seen: exact, fingerprint or bloom) never
+        # hands out a URL twice, so only the number of pages claimed is tracked
+        self.to_visit = URLFrontier(global_config.get("frontier"))
+        self.claimed = 0
+        self.in_flight = []  # URLs popped but not yet recorded, in crawl order
+        self.progress = progress  # optional callback(pages_done) replacing the tqdm bar
         self.driver = None
 
+        # Stage timings and counters; global "metrics" adds a JSON dump
+        # (default <output_dir>/<site>/stats.json), a Prometheus endpoint and hooks
+        self.metrics = Metrics()
+        self.metrics_config = global_config.get("metrics")
+
+        # Pages whose HTML looks client-rendered (SPA shell, near-empty body) are
+        # re-fetched with Selenium, at most render.budget per site
+        render = global_config.get("render", {})
+        self.router = None
+        if self.use_selenium and SELENIUM_AVAILABLE and render.get("enabled", True):
+            self.router = RenderRouter(render)
+        self.rendered_pages = 0
+
+        # Crash-safe checkpoints every N pages (set "checkpoint_every": 0 to disable)
+        self.resume = resume
+        self.checkpoint_every = global_config.get("checkpoint_every", 25)
+        self.checkpoints = None
+        if self.checkpoint_every:
+            self.checkpoints = CheckpointStore(os.path.join(self.output_dir, ".checkpoint.sqlite3"))
+
+        # Sitemaps (robots.txt Sitemap: lines plus /sitemap.xml) are streamed into the
+        # frontier; entries with a lastmod older than sitemap.since are skipped
+        sitemap = global_config.get("sitemap", {})
+        self.sitemap_enabled = sitemap.get("enabled", True)
+        self.sitemap_since = sitemap.get("since")
+        self.max_sitemaps = sitemap.get("max_sitemaps", 100)
+
+        # Wordlist seeds are only probed: HEAD first, then a streamed GET capped at
+        # probe.max_bytes, and only HTML responses get downloaded and parsed
+        probe = global_config.get("probe", {})
+        self.probe_enabled = probe.get("enabled", True)
+        self.probe_max_bytes = probe.get("max_bytes", 2_000_000)
+        self.probe_html_types = set(probe.get("html_types", ["text/html", "application/xhtml+xml"]))
+        self.probe_urls = set()
+
         # Optional wordlist for path discovery
         self.wordlist = []
         if self.bruteforce_paths and os.path.exists("wordlist.txt"):
@@ -74,39 +183,134 @@ class RedTeamSelfAuditCrawler:
 
     def seed_urls(self):
         # Seed starting URLs (base, sitemap, wordlist paths, pagination)
-        self.to_visit.append(self.base_url)
+        self.to_visit.add(self.base_url)
 
-        try:
-            resp = self.session.get(urljoin(self.base_url, '/sitemap.xml'), timeout=10)
-            if resp.status_code == 200:
-                soup = BeautifulSoup(resp.content, 'xml')
-                for loc in soup.find_all('loc'):
-                    u = loc.get_text().strip()
-                    if self._is_same_domain(u):
-                        self.to_visit.append(u)
-        except:
-            pass
+        if self.sitemap_enabled:
+            self._seed_sitemaps()
 
         if self.wordlist:
             for path in self.wordlist:
-                self.to_visit.append(urljoin(self.base_url, path))
+                self._add_probe(urljoin(self.base_url, path))
                 for ext in ['', '.php', '.html', '.bak', '.zip', '.sql']:
-                    self.to_visit.append(urljoin(self.base_url, path + ext))
+                    self._add_probe(urljoin(self.base_url, path + ext))
+
+        if self.dedup_enabled:
+            if self.detect_soft_404:
+                self._learn_soft_404()
+            for prefix in (urljoin(self.base_url, 'page/'), f"{self.base_url}?page="):
+                self._queue_page(prefix, 1, 0)
+        else:
+            for i in range(1, 101):
+                self.to_visit.add(urljoin(self.base_url, f'page/{i}'))
+                self.to_visit.add(f"{self.base_url}?page={i}")
+
+    def _seed_sitemaps(self):
+        sitemaps = []
+        try:
+            resp = self.session.get(urljoin(self.base_url, '/robots.txt'), timeout=10)
+            if resp.status_code == 200:
+                sitemaps = robots_sitemaps(resp.text)
+        except Exception:
+            pass
+        sitemaps.append(urljoin(self.base_url, '/sitemap.xml'))
+
+        for entry in iter_sitemap(self.session, sitemaps, since=self.sitemap_since, max_sitemaps=self.max_sitemaps):
+            if self._is_same_domain(entry.loc):
+                self.to_visit.add(entry.loc)
+                if len(self.to_visit) >= self.max_pages:
+                    break  # no point reading further than we can crawl
 
-        for i in range(1, 101):
-            self.to_visit.append(urljoin(self.base_url, f'page/{i}'))
-            self.to_visit.append(f"{self.base_url}?page={i}")
+    def _learn_soft_404(self):
+        # Fetch a path that cannot exist; a 200 answer is the site's soft-404 page
+        url = f"{self.base_url}/{uuid.uuid4().hex}"
+        try:
+            resp = self.session.get(url, timeout=10)
+        except Exception:
+            return
+        if resp.status_code == 200 and resp.url == url and resp.content:
+            text = self.parser.text(self.parser.parse(resp.content), strip=False)
+            self.soft_404 = self.fingerprints.fingerprint(text)[1]
+            logger.info(f"[{self.name}] Site answers unknown paths with 200; soft-404 detection enabled")
+
+    def _queue_page(self, prefix, page, streak):
+        url = f"{prefix}{page}"
+        if page <= 100 and self.to_visit.add(url):
+            self.pagination[self.to_visit.canonicalize(url)] = (prefix, page, streak)
+
+    def _continue_pagination(self, url, outcome):
+        # Queue the next page of a pagination seed unless the family has run dry
+        family = self.pagination.pop(url, None)
+        if family is None:
+            return
+        prefix, page, streak = family
+        if outcome == "new":
+            self._queue_page(prefix, page + 1, 0)
+        elif outcome == "duplicate" and streak + 1 < self.pagination_stop_after:
+            self._queue_page(prefix, page + 1, streak + 1)
+
+    def _add_probe(self, url):
+        self.to_visit.add(url)
+        if self.probe_enabled:
+            self.probe_urls.add(self.to_visit.canonicalize(url))
 
     def _is_same_domain(self, url):
         return urlparse(url).netloc == self.domain
 
     def _fetch_with_requests(self, url):
         try:
-            resp = self.session.get(url, timeout=10)
+            with self.metrics.timer("fetch"):
+                resp = self.session.get(url, timeout=10)
+            self._count_response(resp.status_code, len(resp.content))
+            self.metrics.observe("ttfb", resp.elapsed.total_seconds())
             return resp.status_code, resp.content, resp.url
-        except:
+        except Exception as e:
+            self.metrics.inc("fetch_errors", error=type(e).__name__)
             return None, None, None
 
+    def _count_response(self, status, size=0):
+        self.metrics.inc("http_responses", status=status)
+        if size:
+            self.metrics.inc("http_bytes", size)
+
+    def _is_html(self, headers):
+        # A missing Content-Type is parsed too; the body is size-capped either way
+        content_type = headers.get("Content-Type", "").split(";")[0].strip().lower()
+        return not content_type or content_type in self.probe_html_types
+
+    def _probe_hit(self, status, headers, final_url):
+        # Non-HTML (or failed) probe: keep status, size and type, never the body
+        size = headers.get("Content-Length", "")
+        meta = {
+            "content_type": headers.get("Content-Type", ""),
+            "size": int(size) if size.isdigit() else None,
+        }
+        return status, None, str(final_url), meta
+
+    def _probe_with_requests(self, url):
+        try:
+            with self.metrics.timer("probe"):
+                result = self._probe_sync(url)
+        except Exception as e:
+            self.metrics.inc("fetch_errors", error=type(e).__name__)
+            return None, None, None, None
+        self._count_response(result[0], len(result[1] or b""))
+        return result
+
+    def _probe_sync(self, url):
+        resp = self.session.head(url, timeout=10, allow_redirects=True)
+        if resp.status_code not in (405, 501) and (resp.status_code >= 400 or not self._is_html(resp.headers)):
+            return self._probe_hit(resp.status_code, resp.headers, resp.url)
+        # HEAD unsupported, or an HTML page: stream the GET and stop at the cap
+        with self.session.get(url, timeout=10, stream=True) as resp:
+            if resp.status_code >= 400 or not self._is_html(resp.headers):
+                return self._probe_hit(resp.status_code, resp.headers, resp.url)
+            body = bytearray()
+            for chunk in resp.iter_content(64 * 1024):
+                body += chunk
+                if len(body) >= self.probe_max_bytes:
+                    break
+            return resp.status_code, bytes(body[:self.probe_max_bytes]), resp.url, None
+
     def _fetch_with_selenium(self, url):
         if not self.use_selenium or not SELENIUM_AVAILABLE:
             return None, None, None
@@ -121,112 +325,357 @@ class RedTeamSelfAuditCrawler:
                 self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight)")
                 time.sleep(1.5)
             return 200, self.driver.page_source.encode('utf-8'), url
-        except:
+        except Exception:
             return None, None, None
 
+    def _maybe_render(self, url, content):
+        # Swap in the Selenium-rendered page when the static one looks client-rendered.
+        # Runs in _process, so budget and results are the same for both engines.
+        if self.router is None:
+            return content
+        if not self.router.escalate(url, self.router.check(content.decode('utf-8', 'replace'))):
+            return content
+        with self.metrics.timer("render"):
+            status, rendered, _ = self._fetch_with_selenium(url)
+        self.metrics.inc("renders", ok=bool(rendered))
+        if not rendered:
+            return content
+        self.router.record_render(url, self.router.check(rendered.decode('utf-8')) is None)
+        self.rendered_pages += 1
+        return rendered
+
     def _extract_insights(self, content, url, status_code):
         # Parse and extract simple indicators
-        soup = BeautifulSoup(content, 'html.parser')
-        full_text = soup.get_text()
+        with self.metrics.timer("parse"):
+            doc = self.parser.parse(content)
+        with self.metrics.timer("extract"):
+            return self._extract_from(doc, url, status_code)
 
-        sensitive_patterns = [
-            r'password', r'admin', r'config', r'debug', r'backup',
-            r'secret', r'api[_-]?key', r'token', r'credentials',
-            r'username', r'login', r'dashboard', r'phpinfo'
-        ]
+    def _extract_from(self, doc, url, status_code):
+        full_text = self.parser.text(doc, strip=False)
 
-        sensitive_found = []
-        for pattern in sensitive_patterns:
-            if re.search(pattern, full_text, re.IGNORECASE):
-                sensitive_found.append(pattern)
+        with self.metrics.timer("scan"):
+            scan = self.scanner.scan(full_text)
 
         links = []
-        for a in soup.find_all('a', href=True):
-            href = urljoin(url, a['href'])
+        for a in self.parser.select(doc, self.link_selector):
+            href = urljoin(url, self.parser.attr(a, 'href'))
             if self._is_same_domain(href):
                 links.append(href)
 
-        emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', full_text)
-        youtube_links = re.findall(r'(https?://(?:www\.)?(?:youtube\.com|youtu\.be)/[^\s"]+)', full_text)
-
-        return {
+        return full_text, {
             "url": url,
             "status_code": status_code,
-            "title": soup.title.string.strip() if soup.title else '',
+            "title": self.parser.title(doc),
             "text_preview": full_text[:500].replace('\n', ' '),
-            "emails_found": list(set(emails)),
-            "youtube_links": list(set(youtube_links)),
-            "sensitive_keywords": sensitive_found,
+            "emails_found": scan["extract"].get("emails_found", []),
+            "youtube_links": scan["extract"].get("youtube_links", []),
+            "sensitive_keywords": list(scan["keywords"]),
+            "sensitive_matches": scan["keywords"],
             "internal_links": links,
-            "forms_count": len(soup.find_all('form')),
-            "scripts_count": len(soup.find_all('script'))
+            "forms_count": self.parser.count(doc, 'form'),
+            "scripts_count": self.parser.count(doc, 'script')
         }
 
+    def _record(self, item):
+        # Stream one page result to full_crawl.json / RISK_FINDINGS.json and update the summary
+        with self.metrics.timer("sink_write"):
+            self.full_sink.write(item)
+        self.total_pages += 1
+        self.metrics.inc("pages")
+        findings = item.get("sensitive_keywords") or item.get("emails_found")
+        repeat = item.get("duplicate_of") or item.get("soft_404")
+        if repeat:
+            if item.get("duplicate_of"):
+                self.duplicate_pages += 1
+            else:
+                self.soft_404_pages += 1
+            if not findings:
+                return  # repeats of pages already reported (or of the not-found page)
+        if findings or (item["status_code"] == 200 and not repeat):
+            with self.metrics.timer("sink_write"):
+                self.risk_sink.write(item)
+        if item.get("sensitive_keywords"):
+            self.sensitive_pages += 1
+        self.emails_found.update(item.get("emails_found", []))
+
+    def is_complete(self):
+        # A finished audit has a summary and no pending checkpoint
+        has_summary = os.path.exists(os.path.join(self.output_dir, "SUMMARY.json"))
+        return has_summary and not (self.checkpoints and self.checkpoints.load())
+
+    def _checkpoint(self):
+        # Persist frontier, counters and sink offsets; pages
+        # being fetched when interrupted are re-queued
+        with self.metrics.timer("checkpoint"):
+            self.checkpoints.save({
+                "frontier": self.to_visit.snapshot(in_flight=self.in_flight),
+                "claimed": self.claimed - len(self.in_flight),
+                "total_pages": self.total_pages,
+                "sensitive_pages": self.sensitive_pages,
+                "duplicate_pages": self.duplicate_pages,
+                "soft_404_pages": self.soft_404_pages,
+                "emails_found": self.emails_found,
+                "probe_urls": self.probe_urls,
+                "fingerprints": self.fingerprints,
+                "soft_404": self.soft_404,
+                "pagination": self.pagination,
+                "router": self.router.state() if self.router else None,
+                "rendered_pages": self.rendered_pages,
+                "full_sink": self.full_sink.checkpoint(),
+                "risk_sink": self.risk_sink.checkpoint(),
+            })
+
+    def _restore(self):
+        state = self.checkpoints.load() if self.checkpoints else None
+        if not state:
+            return False
+        self.to_visit.restore(state["frontier"])
+        self.claimed = state["claimed"]
+        self.total_pages = state["total_pages"]
+        self.sensitive_pages = state["sensitive_pages"]
+        self.duplicate_pages = state["duplicate_pages"]
+        self.soft_404_pages = state["soft_404_pages"]
+        self.emails_found = state["emails_found"]
+        self.probe_urls = state["probe_urls"]
+        self.fingerprints = state["fingerprints"]
+        self.soft_404 = state["soft_404"]
+        self.pagination = state["pagination"]
+        if self.router and state.get("router"):
+            self.router.restore(state["router"])
+        self.rendered_pages = state.get("rendered_pages", 0)
+        self.full_sink.restore(state["full_sink"])
+        self.risk_sink.restore(state["risk_sink"])
+        return True
+
     def crawl(self):
         # Main crawl loop
-        self.seed_urls()
-        logger.info(f"[{self.name}] Starting red-team audit | Queue: {len(self.to_visit)}")
-        pbar = tqdm(total=self.max_pages, desc=self.name)
-
-        while self.to_visit and len(self.visited) < self.max_pages:
-            url = self.to_visit.popleft()
-            if url in self.visited:
-                continue
-            self.visited.add(url)
-            pbar.update(1)
-
-            status, content, final_url = self._fetch_with_requests(url)
-            used_selenium = False
-
-            if status is None or status >= 400:
-                self.data.append({
-                    "url": url,
-                    "status_code": status or "ERROR",
-                    "title": "",
-                    "sensitive_keywords": [],
-                    "emails_found": [],
-                    "youtube_links": [],
-                    "internal_links": []
-                })
-                time.sleep(self.delay)
-                continue
-
-            if content:
-                item = self._extract_insights(content, final_url, status)
-                self.data.append(item)
+        if self.resume and self._restore():
+            logger.info(f"[{self.name}] Resuming audit | Done: {self.claimed} | Queue: {len(self.to_visit)}")
+        else:
+            self.seed_urls()
+            logger.info(f"[{self.name}] Starting red-team audit | Queue: {len(self.to_visit)}")
+        pbar = tqdm(total=self.max_pages, initial=self.claimed, desc=self.name, disable=self.progress is not None)
+
+        self.metrics.start(self.metrics_config, os.path.join(self.output_dir, "stats.json"))
+        try:
+            if self.engine == "async":
+                asyncio.run(self._crawl_async(pbar))
+            else:
+                self._crawl_loop(pbar)
+        except BaseException:
+            # Interrupted (Ctrl-C, crash): save where we stopped for --resume
+            if self.checkpoints:
+                self._checkpoint()
+            raise
+        finally:
+            pbar.close()
+            self.metrics.close()
+            if self.driver:
+                self.driver.quit()
+                self.driver = None
+        return self.total_pages
+
+    def _next_url(self, pbar):
+        # Pop the next URL and claim a page for it (None when done)
+        if not self.to_visit or self.claimed >= self.max_pages:
+            return None
+        url = self.to_visit.pop()
+        self.claimed += 1
+        self.in_flight.append(url)
+        self.metrics.set("queue_depth", len(self.to_visit))
+        self.metrics.set("in_flight", len(self.in_flight))
+        pbar.update(1)
+        if self.progress:
+            self.progress(self.claimed)
+        return url
+
+    def _process(self, url, status, content, final_url, meta=None):
+        # Record one fetched URL and queue its internal links
+        outcome = "stop"
+        if status is None or status >= 400:
+            self._record({
+                "url": url,
+                "status_code": status or "ERROR",
+                "title": "",
+                "sensitive_keywords": [],
+                "emails_found": [],
+                "youtube_links": [],
+                "internal_links": []
+            })
+        elif meta is not None:
+            self._record({
+                "url": final_url,
+                "status_code": status,
+                "title": "",
+                "content_type": meta["content_type"],
+                "size": meta["size"],
+                "sensitive_keywords": [],
+                "emails_found": [],
+                "youtube_links": [],
+                "internal_links": []
+            })
+        elif content:
+            content = self._maybe_render(final_url, content)
+            full_text, item = self._extract_insights(content, final_url, status)
+            seen, exact = self._seen_before(full_text, final_url)
+            if seen:
+                # Don't follow the page's links again. An exact copy has nothing new
+                # and becomes a slim marker record; a near-duplicate keeps its scan
+                # results, since the few lines that differ may be the finding.
+                outcome = "duplicate" if seen != "soft_404" else "stop"
+                if exact:
+                    item = {
+                        "url": final_url,
+                        "status_code": status,
+                        "title": item["title"],
+                        "sensitive_keywords": [],
+                        "emails_found": [],
+                        "youtube_links": [],
+                        "internal_links": []
+                    }
+                if seen == "soft_404":
+                    item["soft_404"] = True
+                else:
+                    item["duplicate_of"] = seen
+                self._record(item)
+            else:
+                outcome = "new"
+                self._record(item)
                 for link in item["internal_links"]:
-                    if link not in self.visited and link not in self.to_visit:
-                        self.to_visit.append(link)
-
+                    self.to_visit.add(link)
+        self._continue_pagination(url, outcome)
+        self.in_flight.remove(url)
+
+    def _seen_before(self, text, url):
+        # ("soft_404" or the URL of an earlier (near-)duplicate page, whether the
+        # text is an exact copy), or (None, False) for new content
+        if not self.dedup_enabled:
+            return None, False
+        with self.metrics.timer("dedup"):
+            fingerprint = self.fingerprints.fingerprint(text)
+            # The base page is exempt: catch-all sites answer unknown paths with the home page
+            is_base = url.rstrip("/") == self.base_url
+            if self.soft_404 is not None and not is_base and self.fingerprints.is_similar(fingerprint[1], self.soft_404):
+                return "soft_404", False
+            exact = fingerprint[0] in self.fingerprints.exact
+            return self.fingerprints.add(url, fingerprint), exact
+
+    def _crawl_loop(self, pbar):
+        while (url := self._next_url(pbar)) is not None:
+            if self.checkpoints and self.claimed % self.checkpoint_every == 0:
+                self._checkpoint()
+            fetch = self._probe_with_requests if url in self.probe_urls else self._fetch_with_requests
+            self._process(url, *fetch(url))
             time.sleep(self.delay)
 
-        pbar.close()
-        return self.data
+    async def _apply_robots_delay(self, client):
+        # Let the site's own Crawl-delay/Request-rate set the per-host spacing
+        try:
+            resp = await client.get(urljoin(self.base_url, '/robots.txt'))
+        except Exception:
+            return
+        if resp.status_code != 200:
+            return
+        parser = RobotFileParser()
+        parser.parse(resp.text.splitlines())
+        parser.modified()  # crawl_delay() reports nothing for a parser that was never "read"
+        user_agent = self.session.headers['User-Agent']
+        if parser.crawl_delay(user_agent) is None and parser.request_rate(user_agent) is None:
+            return  # nothing declared: keep `delay`
+        # The declared rate replaces `delay` (apply_robots only ever raises the floor)
+        self.scheduler.hosts[self.domain] = HostRateLimiter(0.0, self.scheduler.burst, self.scheduler.max_delay)
+        self.scheduler.apply_robots(self.domain, parser, user_agent)
+        interval = self.scheduler.limiter(self.domain).base_interval
+        logger.info(f"[{self.name}] Spacing requests {interval:.2f}s apart (set host_delay to override)")
+
+    async def _fetch_async(self, client, url):
+        host = urlparse(url).netloc
+        wait = self.scheduler.reserve(host)
+        self.metrics.observe("politeness_wait", max(wait, 0.0))
+        if wait > 0:
+            await asyncio.sleep(wait)
+        started = time.monotonic()
+        probe = url in self.probe_urls
+        try:
+            if probe:
+                resp, result = await self._probe_async(client, url)
+            else:
+                resp = await client.get(url, extensions={"trace": self.metrics.httpx_trace()})
+                result = resp.status_code, resp.content, str(resp.url)
+        except Exception as e:
+            self.metrics.inc("fetch_errors", error=type(e).__name__)
+            return None, None, None
+        elapsed = time.monotonic() - started
+        self.metrics.observe("probe" if probe else "fetch", elapsed)
+        self._count_response(result[0], len(result[1] or b""))
+        self.scheduler.record(host, resp.status_code, elapsed, resp.headers.get("Retry-After"))
+        return result
+
+    async def _probe_async(self, client, url):
+        # Same as _probe_with_requests; also returns the last response for the rate limiter
+        resp = await client.head(url)
+        if resp.status_code not in (405, 501) and (resp.status_code >= 400 or not self._is_html(resp.headers)):
+            return resp, self._probe_hit(resp.status_code, resp.headers, resp.url)
+        async with client.stream("GET", url) as resp:
+            if resp.status_code >= 400 or not self._is_html(resp.headers):
+                return resp, self._probe_hit(resp.status_code, resp.headers, resp.url)
+            body = bytearray()
+            async for chunk in resp.aiter_bytes():
+                body += chunk
+                if len(body) >= self.probe_max_bytes:
+                    break
+            return resp, (resp.status_code, bytes(body[:self.probe_max_bytes]), str(resp.url), None)
+
+    async def _crawl_async(self, pbar):
+        # Fetches run concurrently, but results are processed strictly in pop
+        # order. The frontier is FIFO, so links found by a page only land behind
+        # the URLs already in flight, and the crawl visits and writes exactly
+        # what the sync engine would.
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(
+            headers=dict(self.session.headers), follow_redirects=True, timeout=10, limits=limits
+        ) as client:
+            if self.host_delay is None:
+                await self._apply_robots_delay(client)
+            fetches = {}
+            try:
+                while True:
+                    while len(self.in_flight) < self.concurrency:
+                        url = self._next_url(pbar)
+                        if url is None:
+                            break
+                        fetches[url] = asyncio.create_task(self._fetch_async(client, url))
+                    if not self.in_flight:
+                        break
+                    url = self.in_flight[0]
+                    result = await fetches.pop(url)
+                    # Parse in a thread so the loop keeps reading responses meanwhile;
+                    # otherwise parse time counts as server latency and the host backs off
+                    await asyncio.to_thread(self._process, url, *result)
+                    if self.checkpoints and self.total_pages % self.checkpoint_every == 0:
+                        self._checkpoint()
+            finally:
+                for task in fetches.values():
+                    task.cancel()
+                await asyncio.gather(*fetches.values(), return_exceptions=True)
 
     def save_results(self):
-        # Persist results and quick risk summary
-        with open(os.path.join(self.output_dir, "full_crawl.json"), 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
-
-        high_risk = [
-            item for item in self.data
-            if item.get("sensitive_keywords") or item.get("emails_found") or item["status_code"] == 200
-        ]
-        with open(os.path.join(self.output_dir, "RISK_FINDINGS.json"), 'w', encoding='utf-8') as f:
-            json.dump(high_risk, f, indent=2, ensure_ascii=False)
-
-        total_pages = len(self.data)
-        sensitive_pages = len([d for d in self.data if d.get("sensitive_keywords")])
-        emails_found = set()
-        for d in self.data:
-            emails_found.update(d.get("emails_found", []))
+        # Finish the streamed results and write the quick risk summary
+        self.full_sink.close()
+        self.risk_sink.close()
+        if self.checkpoints:
+            self.checkpoints.discard()
 
         summary = {
             "site": self.name,
             "base_url": self.base_url,
-            "total_pages_crawled": total_pages,
-            "pages_with_sensitive_content": sensitive_pages,
-            "emails_exposed": list(emails_found),
+            "total_pages_crawled": self.total_pages,
+            "pages_with_sensitive_content": self.sensitive_pages,
+            "duplicate_pages": self.duplicate_pages,
+            "soft_404_pages": self.soft_404_pages,
+            "rendered_pages": self.rendered_pages,
+            "emails_exposed": list(self.emails_found),
             "recommendation": "Review all pages with status 200 and sensitive keywords. Block unintended paths in server config."
         }
         with open(os.path.join(self.output_dir, "SUMMARY.json"), 'w', encoding='utf-8') as f:
@@ -236,20 +685,146 @@ class RedTeamSelfAuditCrawler:
 
 
 # MAIN
+# Exit codes used by site worker processes to report back to the parent
+SITE_EXIT_CODES = {"complete": 0, "failed": 1, "skipped": 3, "interrupted": 130}
+
+
+def run_site(site, global_config, resume=False, progress=None):
+    # Audit one site; returns "complete", "skipped", "interrupted" or "failed"
+    try:
+        crawler = RedTeamSelfAuditCrawler(site, global_config, resume=resume, progress=progress)
+        if resume and crawler.is_complete():
+            logger.info(f"[{site['name']}] Already complete, skipping")
+            return "skipped"
+        crawler.crawl()
+        crawler.save_results()
+        return "complete"
+    except KeyboardInterrupt:
+        return "interrupted"
+    except Exception as e:
+        logger.error(f"Failed on {site['name']}: {e}")
+        return "failed"
+
+
+def _site_worker(index, site, global_config, resume, progress):
+    # Child process for parallel_sites. It sits in its own process group so a
+    # terminal Ctrl-C only reaches the parent, which forwards exactly one SIGINT.
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    site_dir = os.path.join(global_config.get("output_dir", "output"), site["name"])
+    os.makedirs(site_dir, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', force=True,
+        handlers=[logging.FileHandler(os.path.join(site_dir, "audit.log"), encoding="utf-8")],
+    )
+
+    def report(pages):
+        progress[index] = pages
+
+    sys.exit(SITE_EXIT_CODES[run_site(site, global_config, resume, progress=report)])
+
+
+def run_parallel(sites, global_config, resume, limit):
+    # Audit up to `limit` sites at once, one process each. Children log to
+    # <output_dir>/<site>/audit.log and report pages done through shared memory,
+    # so all progress bars are drawn by this process.
+    codes = {code: status for status, code in SITE_EXIT_CODES.items()}
+    progress = multiprocessing.Array("i", len(sites), lock=False)
+    max_pages = global_config.get("max_pages_per_site", 500)
+    bars = [tqdm(total=max_pages, desc=site["name"], position=i) for i, site in enumerate(sites)]
+    statuses = {}
+    waiting = list(enumerate(sites))
+    running = {}
+
+    def reap():
+        for i, proc in list(running.items()):
+            if not proc.is_alive():
+                proc.join()
+                del running[i]
+                statuses[sites[i]["name"]] = codes.get(proc.exitcode, "failed")
+                bars[i].n = progress[i]
+                bars[i].set_postfix_str(statuses[sites[i]["name"]])
+
+    try:
+        while waiting or running:
+            while waiting and len(running) < limit:
+                i, site = waiting.pop(0)
+                proc = multiprocessing.Process(
+                    target=_site_worker, args=(i, site, global_config, resume, progress), name=site["name"]
+                )
+                proc.start()
+                running[i] = proc
+                bars[i].reset()  # start the clock when the site does
+            time.sleep(0.5)
+            for i in running:
+                bars[i].n = progress[i]
+                bars[i].refresh()
+            reap()
+    except KeyboardInterrupt:
+        # Let every running audit checkpoint and stop; sites not started yet are left for --resume
+        for proc in running.values():
+            if proc.is_alive():
+                os.kill(proc.pid, signal.SIGINT)
+        for proc in running.values():
+            proc.join()
+        reap()
+    finally:
+        for bar in bars:
+            bar.close()
+    return statuses
+
+
+def write_combined_summary(sites, global_config, statuses):
+    # Merge every site's SUMMARY.json into <output_dir>/COMBINED_SUMMARY.json
+    output_dir = global_config.get("output_dir", "output")
+    summaries = []
+    emails = set()
+    for site in sites:
+        entry = {"site": site["name"], "status": statuses.get(site["name"], "not started")}
+        path = os.path.join(output_dir, site["name"], "SUMMARY.json")
+        if entry["status"] in ("complete", "skipped") and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                entry.update(json.load(f))
+            emails.update(entry.get("emails_exposed", []))
+        summaries.append(entry)
+
+    combined = {
+        "sites_audited": sum(1 for entry in summaries if "total_pages_crawled" in entry),
+        "total_pages_crawled": sum(entry.get("total_pages_crawled", 0) for entry in summaries),
+        "pages_with_sensitive_content": sum(entry.get("pages_with_sensitive_content", 0) for entry in summaries),
+        "emails_exposed": sorted(emails),
+        "sites": summaries,
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "COMBINED_SUMMARY.json"), 'w', encoding='utf-8') as f:
+        json.dump(combined, f, indent=2, ensure_ascii=False)
+    logger.info(f"Combined summary: {combined['total_pages_crawled']} pages across {combined['sites_audited']} sites")
+
+
 def main():
     with open("targets.json", "r", encoding="utf-8") as f:
         config = json.load(f)
 
-    for site in config["sites"]:
-        try:
-            crawler = RedTeamSelfAuditCrawler(site, config["global"])
-            crawler.crawl()
-            crawler.save_results()
-        except KeyboardInterrupt:
+    # --resume continues interrupted audits and skips sites that already finished
+    resume = "--resume" in sys.argv[1:]
+    sites = config["sites"]
+    parallel_sites = max(1, int(config["global"].get("parallel_sites", 1)))
+
+    if parallel_sites > 1 and len(sites) > 1:
+        statuses = run_parallel(sites, config["global"], resume, parallel_sites)
+        if "interrupted" in statuses.values():
             print("\nStopped by user")
-            break
-        except Exception as e:
-            logger.error(f"Failed on {site['name']}: {e}")
+    else:
+        statuses = {}
+        for site in sites:
+            statuses[site["name"]] = run_site(site, config["global"], resume)
+            if statuses[site["name"]] == "interrupted":
+                print("\nStopped by user")
+                break
+
+    write_combined_summary(sites, config["global"], statuses)
 
 
 if __name__ == "__main__":
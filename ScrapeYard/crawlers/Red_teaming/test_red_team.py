@@ -0,0 +1,121 @@
+import json
+import random
+
+from crawlers.Red_teaming.crawler import RedTeamSelfAuditCrawler
+from crawlers.frontier import FingerprintSet
+
+WORDS = "the crawler visits every page of the site and records what it finds on each one before moving on".split()
+TEMPLATE = " ".join(random.Random(0).choice(WORDS) for _ in range(600))
+
+
+def _page(extra: str = "") -> bytes:
+    return f"<html><head><title>Team</title></head><body><p>{TEMPLATE}</p><p>{extra}</p></body></html>".encode()
+
+
+def _crawler(base_url: str, tmp_path, **overrides) -> RedTeamSelfAuditCrawler:
+    global_config = {
+        "output_dir": str(tmp_path / "output"),
+        "max_pages_per_site": 100,
+        "delay": 0,
+        "use_selenium": False,
+        "bruteforce_paths": False,
+        "checkpoint_every": 0,
+        **overrides,
+    }
+    return RedTeamSelfAuditCrawler({"name": "site", "base_url": base_url}, global_config, progress=lambda pages: None)
+
+
+def _output(crawler, name: str):
+    with open(f"{crawler.output_dir}/{name}", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _process(crawler, url: str, content: bytes):
+    crawler.in_flight.append(url)
+    crawler._process(url, 200, content, url)
+
+
+def test_near_duplicates_keep_their_findings(tmp_path):
+    crawler = _crawler("https://example.com", tmp_path)
+    _process(crawler, "https://example.com/a", _page())
+    _process(crawler, "https://example.com/b", _page("Contact root@example.com for the admin password."))
+    _process(crawler, "https://example.com/c", _page())
+    crawler.save_results()
+
+    full = {item["url"]: item for item in _output(crawler, "full_crawl.json")}
+    risks = {item["url"]: item for item in _output(crawler, "RISK_FINDINGS.json")}
+    summary = _output(crawler, "SUMMARY.json")
+
+    near = full["https://example.com/b"]
+    assert near["duplicate_of"] == "https://example.com/a"
+    assert near["sensitive_keywords"] == ["password", "admin"]
+    assert near["emails_found"] == ["root@example.com"]
+    assert "https://example.com/b" in risks
+
+    # An exact copy is only a marker and isn't reported again
+    exact = full["https://example.com/c"]
+    assert exact["duplicate_of"] == "https://example.com/a"
+    assert exact["sensitive_keywords"] == [] and "internal_links" in exact
+    assert set(risks) == {"https://example.com/a", "https://example.com/b"}
+
+    assert summary["duplicate_pages"] == 2
+    assert summary["pages_with_sensitive_content"] == 1
+    assert summary["emails_exposed"] == ["root@example.com"]
+
+
+def test_soft_404_pages_are_not_reported(tmp_path):
+    crawler = _crawler("https://example.com", tmp_path)
+    crawler.soft_404 = crawler.fingerprints.fingerprint(
+        crawler.parser.text(crawler.parser.parse(_page()), strip=False)
+    )[1]
+    _process(crawler, "https://example.com/missing", _page())
+    _process(crawler, "https://example.com/leak", _page("backup at /db.sql"))
+    crawler.save_results()
+
+    full = {item["url"]: item for item in _output(crawler, "full_crawl.json")}
+    risks = [item["url"] for item in _output(crawler, "RISK_FINDINGS.json")]
+    assert full["https://example.com/missing"]["soft_404"]
+    assert full["https://example.com/leak"]["soft_404"]
+    assert risks == ["https://example.com/leak"]
+    assert _output(crawler, "SUMMARY.json")["soft_404_pages"] == 2
+
+
+def test_async_engine_matches_sync(synthetic_site, tmp_path):
+    site, base = synthetic_site(pages=30)
+    results = []
+    for engine in ("sync", "async"):
+        crawler = _crawler(base, tmp_path / engine, engine=engine, host_delay=0, concurrency=8)
+        crawler.crawl()
+        crawler.save_results()
+        results.append([(item["url"], item["status_code"]) for item in _output(crawler, "full_crawl.json")])
+
+    crawled, expected = results[1], results[0]
+    assert crawled == expected
+    assert {f"{base}/p/{n}" for n in range(30)} <= {url for url, _ in crawled}
+
+
+def test_fingerprint_seen_set_with_checkpoints(synthetic_site, tmp_path):
+    site, base = synthetic_site(pages=30)
+    crawler = _crawler(base, tmp_path, engine="sync", frontier={"seen": "fingerprint"}, checkpoint_every=5)
+    crawler.crawl()
+    state = crawler.checkpoints.load()
+    # Checkpoints carry the frontier's compact seen set, not a set of URL strings
+    assert isinstance(state["frontier"]["seen"], FingerprintSet) and "visited" not in state
+    crawler.save_results()
+
+    urls = [item["url"] for item in _output(crawler, "full_crawl.json")]
+    assert len(urls) == len(set(urls)) == crawler.claimed
+    assert {f"{base}/p/{n}" for n in range(30)} <= set(urls)
+
+
+def test_async_spacing_follows_robots_crawl_delay(synthetic_site, tmp_path):
+    site, base = synthetic_site(pages=3, crawl_delay=1)
+    crawler = _crawler(base, tmp_path, engine="async", delay=5, max_pages_per_site=2)
+    crawler.crawl()
+    # The site's Crawl-delay, not the 5s sync delay, spaces the requests
+    assert crawler.scheduler.limiter(crawler.domain).base_interval == 1
+
+    # An explicit host_delay wins over robots.txt
+    crawler = _crawler(base, tmp_path / "explicit", engine="async", delay=5, host_delay=0.01, max_pages_per_site=3)
+    crawler.crawl()
+    assert crawler.scheduler.limiter(crawler.domain).base_interval == 0.01
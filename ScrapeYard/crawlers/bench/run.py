@@ -0,0 +1,262 @@
+# ScrapeYard/crawlers/bench/run.py
+import asyncio
+import importlib.util
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from .site import run_server
+
+CRAWLERS = ["static_html", "red_teaming", "dynamic_headless"]
+
+
+def _timed(obj, name: str, samples: list[float]):
+    """Replace obj.name (sync or async) with a wrapper appending each call's duration to samples."""
+    method = getattr(obj, name)
+    if asyncio.iscoroutinefunction(method):
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - started)
+    else:
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - started)
+    setattr(obj, name, wrapper)
+
+
+def _merge(config: dict, overrides: dict) -> dict:
+    # Nested dicts are merged, everything else replaced
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(config.get(key), dict):
+            _merge(config[key], value)
+        else:
+            config[key] = value
+    return config
+
+
+def bench_static(scenario: dict, base_url: str, workdir: Path, samples: list[float]) -> dict:
+    from ..static_html.crawler import StaticHTMLCrawler
+
+    config = _merge({
+        "domain": base_url.split("://", 1)[1],
+        "start_urls": [base_url + "/"],
+        "max_pages": scenario.get("max_pages", 200),
+        "concurrency": 8,
+        "delay": 0,
+        "checkpoint": False,
+        "sitemap": {"robots": True} if scenario.get("site", {}).get("sitemap", True) else None,
+        "paginate": {"type": "next", "next_selector": "a.next"},
+        "extract": {"list_selector": ".item", "item_fields": {"title": ".title", "price": ".price"}},
+        "http": {"robots_cache_dir": None, "max_connections": 16, "max_keepalive_connections": 16},
+        "output": {"format": "jsonl", "path": str(workdir / "static_html")},
+    }, scenario.get("static_html", {}))
+    crawler = StaticHTMLCrawler(config)
+    _timed(crawler, "_process", samples)
+    asyncio.run(crawler.crawl())
+    return {"pages": crawler.pages, "items": crawler.sink.items_written, "latency_of": "StaticHTMLCrawler._process"}
+
+
+def bench_red_team(scenario: dict, base_url: str, workdir: Path, samples: list[float]) -> dict:
+    from ..Red_teaming.crawler import RedTeamSelfAuditCrawler
+
+    global_config = _merge({
+        "output_dir": str(workdir / "red_teaming"),
+        "max_pages_per_site": scenario.get("max_pages", 200),
+        "engine": "async",
+        "concurrency": 16,
+        "host_delay": 0,
+        "delay": 0,
+        "use_selenium": False,
+        "bruteforce_paths": False,
+        "checkpoint_every": 0,
+    }, scenario.get("red_teaming", {}))
+    crawler = RedTeamSelfAuditCrawler({"name": "bench", "base_url": base_url}, global_config, progress=lambda done: None)
+    for name in ("_fetch_async", "_fetch_with_requests", "_probe_with_requests"):
+        _timed(crawler, name, samples)
+    crawler.crawl()
+    crawler.save_results()
+    return {"pages": crawler.total_pages, "items": None, "latency_of": "RedTeamSelfAuditCrawler fetch"}
+
+
+def bench_dynamic(scenario: dict, base_url: str, workdir: Path, samples: list[float]) -> dict:
+    from ..dynamic_headless.crawler import DynamicHeadlessCrawler
+
+    start_pages = scenario.get("dynamic_start_urls", 10)
+    config = _merge({
+        "start_urls": [f"{base_url}/p/{n}" for n in range(start_pages)],
+        "max_pages": 3,
+        "paginate": {"type": "next", "next_selector": "a.next"},
+        "extract": {"list_selector": ".item", "item_fields": {"title": ".title", "price": ".price"}},
+        "output": {"format": "jsonl", "path": str(workdir / "dynamic_headless")},
+    }, scenario.get("dynamic_headless", {}))
+    crawler = DynamicHeadlessCrawler(config)
+    navigations = []
+    crawl_start_url = crawler._crawl_start_url
+
+    async def counted(page, url):
+        n = await crawl_start_url(page, url)
+        navigations.append(n)
+        return n
+
+    crawler._crawl_start_url = counted
+    _timed(crawler, "_crawl_start_url", samples)
+    asyncio.run(crawler.crawl())
+    return {"pages": sum(navigations), "items": crawler.sink.items_written,
+            "latency_of": "DynamicHeadlessCrawler._crawl_start_url"}
+
+
+BENCHES = {"static_html": bench_static, "red_teaming": bench_red_team, "dynamic_headless": bench_dynamic}
+
+
+def percentile(samples: list[float], q: float) -> float | None:
+    """Nearest-rank percentile (q in 0..100)."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))]
+
+
+def _run_crawler(name: str, scenario: dict, base_url: str, workdir: str, conn):
+    # Child process: one crawler, one scenario; resource usage is this process (and its children) only
+    os.chdir(workdir)  # the red-team crawler reads wordlist.txt from the cwd
+    sys.stdout = open(os.devnull, "w")  # crawlers print a line per page
+    samples = []
+    try:
+        started = time.perf_counter()
+        result = BENCHES[name](scenario, base_url, Path(workdir), samples)
+        wall = time.perf_counter() - started
+    except Exception as e:
+        conn.send({"status": "failed", "error": f"{type(e).__name__}: {e}"})
+        return
+
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)  # e.g. browser processes
+    rss_unit = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB elsewhere
+    p50, p99 = percentile(samples, 50), percentile(samples, 99)
+    result.update({
+        "status": "ok",
+        "wall_s": round(wall, 3),
+        "pages_per_sec": round(result["pages"] / wall, 2) if wall else None,
+        "latency_p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+        "latency_p99_ms": round(p99 * 1000, 2) if p99 is not None else None,
+        "cpu_s": round(own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime, 3),
+        "peak_rss_mb": round(max(own.ru_maxrss, children.ru_maxrss) * rss_unit / 2**20, 1),
+    })
+    conn.send(result)
+
+
+def run_scenario(scenario: dict, crawlers: list[str], timeout: float) -> list[dict]:
+    """Serve the scenario's synthetic site and benchmark each crawler against it in turn."""
+    ready, ready_child = mp.Pipe(duplex=False)
+    server = mp.Process(target=run_server, args=(scenario.get("site", {}), ready_child), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{ready.recv()}"
+    runs = []
+    try:
+        for name in crawlers:
+            run = {"scenario": scenario["name"], "crawler": name}
+            if name == "dynamic_headless" and importlib.util.find_spec("playwright") is None:
+                run.update(status="skipped", error="playwright not installed")
+                runs.append(run)
+                continue
+
+            with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as workdir:
+                results, results_child = mp.Pipe(duplex=False)
+                worker = mp.Process(target=_run_crawler, args=(name, scenario, base_url, workdir, results_child))
+                worker.start()
+                results_child.close()
+                if results.poll(timeout):
+                    try:
+                        run.update(results.recv())
+                    except EOFError:
+                        pass  # died without reporting; see the exit code below
+                else:
+                    worker.kill()
+                    run.update(status="failed", error=f"timed out after {timeout}s")
+                worker.join()
+                if "status" not in run:
+                    run.update(status="failed", error=f"worker exited with code {worker.exitcode}")
+            runs.append(run)
+            print(_format_run(run))
+    finally:
+        server.kill()
+        server.join()
+    return runs
+
+
+def _format_run(run: dict) -> str:
+    if run["status"] != "ok":
+        return f"{run['scenario']:<12} {run['crawler']:<17} {run['status']}: {run.get('error')}"
+    return (
+        f"{run['scenario']:<12} {run['crawler']:<17} {run['pages']:>6} pages {run['pages_per_sec']:>8} p/s "
+        f"p50 {run['latency_p50_ms']} ms  p99 {run['latency_p99_ms']} ms  "
+        f"cpu {run['cpu_s']} s  rss {run['peak_rss_mb']} MB"
+    )
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    default_config = Path(__file__).parent / "config.json"
+
+    # Options: --only=static_html,red_teaming picks crawlers, --out=FILE sets the results path
+    options = dict(a[2:].split("=", 1) for a in sys.argv[1:] if a.startswith("--") and "=" in a)
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if len(args) > 1:
+        print("Usage: python -m crawlers.bench.run [bench.json] [--only=crawler,...] [--out=results.json]")
+        sys.exit(1)
+    config_path = Path(args[0]) if args else default_config
+    if not config_path.exists():
+        print(f"Config not found: {config_path}")
+        sys.exit(1)
+
+    config = json.loads(config_path.read_text())
+    crawlers = options["only"].split(",") if "only" in options else config.get("crawlers", CRAWLERS)
+    unknown = set(crawlers) - set(BENCHES)
+    if unknown:
+        print(f"Unknown crawlers: {', '.join(sorted(unknown))} (choose from {', '.join(CRAWLERS)})")
+        sys.exit(1)
+
+    started = datetime.now(timezone.utc)
+    runs = []
+    for scenario in config["scenarios"]:
+        runs.extend(run_scenario(scenario, crawlers, config.get("timeout", 600)))
+
+    results = {
+        "started": started.isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": config,
+        "runs": runs,
+    }
+    out = Path(options.get("out") or Path("bench_results") / f"bench-{started:%Y%m%dT%H%M%SZ}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2))
+    print(f"Results saved to: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# ScrapeYard/crawlers/bench/site.py
+import http.server
+import random
+import threading
+import time
+
+
+class SyntheticSite:
+    """A generated site: pages /p/0 .. /p/{pages-1}, each with a list of items.
+
+    Every page links to the next one (a.next) plus `fanout` other pages picked
+    by a seeded RNG, so the link graph is the same on every run. Responses
+    wait `latency_ms` (+/- jitter), and a share of them fail with 500
+    (`error_rate`) or 429 with Retry-After (`rate_429`). With `etag` pages
+    carry an ETag and answer a matching If-None-Match with 304; `lastmod`
+    adds a <lastmod> to every sitemap entry. Every request is logged in
+    `requests` as (path, status).
+    """
+
+    def __init__(
+        self,
+        pages: int = 200,
+        fanout: int = 5,
+        list_size: int = 20,
+        latency_ms: float = 5,
+        jitter_ms: float = 0,
+        error_rate: float = 0.0,
+        rate_429: float = 0.0,
+        retry_after: int = 1,
+        robots: bool = True,
+        crawl_delay: float | None = None,
+        sitemap: bool = True,
+        sitemap_chunk: int = 50000,
+        etag: bool = False,
+        lastmod: str | None = None,
+        seed: int = 0,
+    ):
+        self.pages = pages
+        self.fanout = fanout
+        self.list_size = list_size
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.robots = robots
+        self.crawl_delay = crawl_delay
+        self.sitemap = sitemap
+        self.sitemap_chunk = max(1, sitemap_chunk)
+        self.etag = etag
+        self.lastmod = lastmod
+        self.seed = seed
+        self.requests = []
+        self.rng = random.Random(seed)  # failures and jitter; shared by the server threads
+        self.lock = threading.Lock()
+
+    def links(self, n: int) -> list[int]:
+        rng = random.Random(self.seed * 1_000_003 + n)
+        return [rng.randrange(self.pages) for _ in range(self.fanout)]
+
+    def page(self, n: int) -> str:
+        items = "".join(
+            f'<div class="item"><h2 class="title">Item {n}-{i}</h2>'
+            f'<span class="price">{(n * 31 + i * 7) % 1000}.99</span>'
+            f'<p class="desc">Synthetic item {i} on page {n} with a short description.</p></div>'
+            for i in range(self.list_size)
+        )
+        nav = "".join(f'<li><a href="/p/{m}">Page {m}</a></li>' for m in self.links(n))
+        nxt = f'<a class="next" href="/p/{n + 1}">Next</a>' if n + 1 < self.pages else ""
+        return (
+            f"<!DOCTYPE html><html><head><title>Page {n}</title></head><body>"
+            f'<h1>Page {n}</h1><div class="list">{items}</div><ul class="nav">{nav}</ul>{nxt}</body></html>'
+        )
+
+    def robots_txt(self, base: str) -> str:
+        lines = ["User-agent: *", "Disallow: /private/"]
+        if self.crawl_delay is not None:
+            lines.append(f"Crawl-delay: {self.crawl_delay}")
+        if self.sitemap:
+            lines.append(f"Sitemap: {base}/sitemap.xml")
+        return "\n".join(lines) + "\n"
+
+    def sitemap_xml(self, base: str, chunk: int | None) -> str | None:
+        """The sitemap index (chunk None) or one of its child sitemaps."""
+        chunks = -(-self.pages // self.sitemap_chunk)
+        if chunk is None and chunks > 1:
+            entries = "".join(f"<sitemap><loc>{base}/sitemap-{c}.xml</loc></sitemap>" for c in range(chunks))
+            return f'<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</sitemapindex>'
+        chunk = chunk or 0
+        if chunk >= chunks:
+            return None
+        first = chunk * self.sitemap_chunk
+        lastmod = f"<lastmod>{self.lastmod}</lastmod>" if self.lastmod else ""
+        urls = "".join(
+            f"<url><loc>{base}/p/{n}</loc>{lastmod}</url>"
+            for n in range(first, min(first + self.sitemap_chunk, self.pages))
+        )
+        return f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+
+    def respond(self, path: str, base: str, headers=None) -> tuple[int, dict, str]:
+        """(status, headers, body) for a request path; headers are the request headers (any mapping)."""
+        status, response_headers, body = self._respond(path.split("?", 1)[0], base, headers or {})
+        with self.lock:
+            self.requests.append((path, status))
+        return status, response_headers, body
+
+    def _respond(self, path: str, base: str, headers) -> tuple[int, dict, str]:
+        if path == "/robots.txt":
+            return (200, {"Content-Type": "text/plain"}, self.robots_txt(base)) if self.robots else (404, {}, "")
+        if self.sitemap and path.startswith("/sitemap") and path.endswith(".xml"):
+            chunk = path[len("/sitemap-"):-len(".xml")] if path.startswith("/sitemap-") else None
+            body = self.sitemap_xml(base, int(chunk) if chunk and chunk.isdigit() else None)
+            if body is not None:
+                return 200, {"Content-Type": "application/xml"}, body
+
+        if path in ("/", "/index.html"):
+            path = "/p/0"
+        number = path[len("/p/"):] if path.startswith("/p/") else ""
+        if not number.isdigit() or int(number) >= self.pages:
+            return 404, {"Content-Type": "text/html"}, "<html><body><h1>Not found</h1></body></html>"
+
+        with self.lock:
+            roll = self.rng.random()
+        if roll < self.rate_429:
+            return 429, {"Retry-After": str(self.retry_after)}, ""
+        if roll < self.rate_429 + self.error_rate:
+            return 500, {"Content-Type": "text/html"}, "<html><body>Server error</body></html>"
+        if self.etag:
+            etag = f'"p{number}"'
+            if headers.get("If-None-Match") == etag:
+                return 304, {"ETag": etag}, ""
+            return 200, {"Content-Type": "text/html; charset=utf-8", "ETag": etag}, self.page(int(number))
+        return 200, {"Content-Type": "text/html; charset=utf-8"}, self.page(int(number))
+
+    def delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        with self.lock:
+            return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+
+class SiteHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real server
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+    site = None  # set on the subclass made by serve()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, with_body: bool):
+        base = f"http://{self.headers.get('Host') or '%s:%d' % self.server.server_address[:2]}"
+        status, headers, body = self.site.respond(self.path, base, self.headers)
+        time.sleep(self.site.delay())
+        data = body.encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if with_body:
+            self.wfile.write(data)
+
+    def do_GET(self):
+        self._send(True)
+
+    def do_HEAD(self):
+        self._send(False)
+
+
+class SiteServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # the default backlog of 5 drops connects from concurrent crawlers
+
+
+def serve(site: SyntheticSite, host: str = "127.0.0.1", port: int = 0) -> http.server.ThreadingHTTPServer:
+    """Bind a threaded server for the site (port 0 picks a free one); call serve_forever() on it."""
+    handler = type("BoundSiteHandler", (SiteHandler,), {"site": site})
+    return SiteServer((host, port), handler)
+
+
+def run_server(site_config: dict, ready):
+    """Process target: serve a SyntheticSite(**site_config) and send the bound port to `ready`."""
+    server = serve(SyntheticSite(**site_config))
+    ready.send(server.server_address[1])
+    ready.close()
+    server.serve_forever()
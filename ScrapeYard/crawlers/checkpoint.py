@@ -0,0 +1,41 @@
+import pickle
+import sqlite3
+import time
+from pathlib import Path
+
+
+class CheckpointStore:
+    """Crash-safe crawl state snapshot in SQLite.
+
+    Each save() replaces the previous snapshot in a single transaction, so
+    a crash mid-save leaves the last complete checkpoint intact.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint (id INTEGER PRIMARY KEY CHECK (id = 1), saved_at REAL, state BLOB)"
+        )
+        self.db.commit()
+
+    def save(self, state: dict):
+        blob = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO checkpoint (id, saved_at, state) VALUES (1, ?, ?)",
+                (time.time(), blob),
+            )
+
+    def load(self) -> dict | None:
+        row = self.db.execute("SELECT state FROM checkpoint WHERE id = 1").fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def close(self):
+        self.db.close()
+
+    def discard(self):
+        """Close and delete the store once the crawl has finished."""
+        self.close()
+        self.path.unlink(missing_ok=True)
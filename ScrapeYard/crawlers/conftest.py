@@ -0,0 +1,27 @@
+import threading
+
+import pytest
+
+from .bench.site import SyntheticSite, serve
+
+
+@pytest.fixture
+def synthetic_site():
+    """Factory serving SyntheticSite(**options) in a background thread; returns (site, base_url).
+
+    Latency defaults to 0. Pass host="0.0.0.0" to reach the site under any
+    127.0.0.x address (one "host" per address). Servers stop at teardown.
+    """
+    servers = []
+
+    def start(host: str = "127.0.0.1", **options):
+        site = SyntheticSite(**{"latency_ms": 0, **options})
+        server = serve(site, host=host)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return site, f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,72 @@
+import hashlib
+import re
+from collections import Counter
+
+_WORD = re.compile(r"\w+")
+
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """64-bit SimHash over word shingles; similar texts differ in few bits."""
+    words = _WORD.findall(text.lower())
+    if len(words) < shingle:
+        features = Counter([" ".join(words)])
+    else:
+        features = Counter(" ".join(words[i:i + shingle]) for i in range(len(words) - shingle + 1))
+
+    vector = [0] * 64
+    for feature, weight in features.items():
+        h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+        for bit in range(64):
+            if h >> bit & 1:
+                vector[bit] += weight
+            else:
+                vector[bit] -= weight
+    return sum(1 << bit for bit in range(64) if vector[bit] > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ContentFingerprints:
+    """Exact and near-duplicate lookup for page texts.
+
+    Exact duplicates are found by a hash of the normalized text. Near
+    duplicates are found by SimHash: the 64 bits are split into
+    max_distance + 1 bands, so any fingerprint within max_distance bits of a
+    stored one shares at least one band with it and is found by lookup.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = -(-64 // self.bands)
+        self.exact = {}  # normalized-text hash -> url
+        self.index = [{} for _ in range(self.bands)]  # band value -> [(simhash, url)]
+
+    def _band_keys(self, fingerprint: int):
+        mask = (1 << self.band_bits) - 1
+        return [fingerprint >> (i * self.band_bits) & mask for i in range(self.bands)]
+
+    def fingerprint(self, text: str) -> tuple[str, int]:
+        normalized = " ".join(_WORD.findall(text.lower()))
+        return hashlib.sha1(normalized.encode()).hexdigest(), simhash(normalized)
+
+    def is_similar(self, a: int, b: int) -> bool:
+        return hamming(a, b) <= self.max_distance
+
+    def add(self, url: str, fingerprint: tuple[str, int]) -> str | None:
+        """Remember a page by its fingerprint(); return the URL of an earlier (near-)duplicate, if any."""
+        digest, bits = fingerprint
+        if digest in self.exact:
+            return self.exact[digest]
+        keys = self._band_keys(bits)
+        for band, key in zip(self.index, keys):
+            for other, other_url in band.get(key, ()):
+                if self.is_similar(bits, other):
+                    return other_url
+
+        self.exact[digest] = url
+        for band, key in zip(self.index, keys):
+            band.setdefault(key, []).append((bits, url))
+        return None
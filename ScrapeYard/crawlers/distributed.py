@@ -0,0 +1,370 @@
+import asyncio
+import bisect
+import hashlib
+import importlib
+import sqlite3
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlsplit
+from .frontier import DEFAULT_DROP_PARAMS, canonicalize_url
+
+# Row states in the shared frontier table
+PENDING, LEASED, DONE, FAILED = range(4)
+STATE_NAMES = {PENDING: "pending", LEASED: "leased", DONE: "done", FAILED: "failed"}
+
+_MAX_HASH = 2**63 - 1  # positions fit SQLite's signed 64-bit INTEGER
+
+
+def ring_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") & _MAX_HASH
+
+
+def host_hash(url: str) -> int:
+    """Ring position of a URL's host; every URL of a host lands on the same worker."""
+    return ring_hash(urlsplit(url).netloc)
+
+
+class HashRing:
+    """Consistent hashing of hosts onto workers.
+
+    Each worker is placed on the ring `replicas` times and owns the arcs
+    ending at its points, so a worker joining or leaving only moves the
+    hosts on its own arcs.
+    """
+
+    def __init__(self, members, replicas: int = 32):
+        self.members = sorted(set(members))
+        self.points = sorted((ring_hash(f"{m}#{i}"), m) for m in self.members for i in range(replicas))
+
+    def owner(self, position: int) -> str:
+        i = bisect.bisect_left(self.points, (position, ""))
+        return self.points[i % len(self.points)][1]
+
+    def ranges(self, member: str) -> list[tuple[int, int]]:
+        """The (low, high] position ranges owned by member."""
+        ranges = []
+        for i, (point, owner) in enumerate(self.points):
+            if owner != member:
+                continue
+            if i == 0:
+                # The first point also owns the wrap-around arc after the last one
+                ranges.append((-1, point))
+                if self.points[-1][0] < _MAX_HASH:
+                    ranges.append((self.points[-1][0], _MAX_HASH))
+            else:
+                ranges.append((self.points[i - 1][0], point))
+        return ranges
+
+
+class SQLiteFrontierStore:
+    """Shared frontier for crawler processes on one machine, in a SQLite file.
+
+    Every URL is a row, so the table is also the crawl-wide seen set. Workers
+    lease pending URLs from the hosts the HashRing of live workers gives
+    them, then ack() (done), fail() or release() each one. Leases are renewed
+    while a worker is alive; when one crashes its leases and heartbeat
+    expire after `lease_seconds`, its URLs go back to pending and its hosts
+    to the remaining workers. A URL delivered `max_deliveries` times without
+    an ack is marked failed instead of being redelivered forever.
+
+    Other backends (e.g. a network queue for multi-host crawls) only need the
+    same methods; see open_store().
+    """
+
+    def __init__(self, path: str | Path, lease_seconds: float = 60, max_deliveries: int = 3, replicas: int = 32):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_deliveries = max_deliveries
+        self.replicas = replicas
+        # Autocommit; writes take the lock up front with BEGIN IMMEDIATE
+        # check_same_thread=False: SharedFrontier calls in from worker threads, one at a time
+        self.db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS urls (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                host_hash INTEGER NOT NULL,
+                state INTEGER NOT NULL DEFAULT 0,
+                owner TEXT,
+                lease_until REAL,
+                deliveries INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS urls_by_state ON urls (state, id);
+            CREATE INDEX IF NOT EXISTS urls_by_lease ON urls (state, lease_until);
+            CREATE TABLE IF NOT EXISTS workers (id TEXT PRIMARY KEY, heartbeat REAL NOT NULL);
+        """)
+
+    @contextmanager
+    def _write(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    def register(self, worker: str):
+        """Join the ring; leases left by an earlier process with this id are released."""
+        with self._write():
+            self.db.execute("INSERT OR REPLACE INTO workers (id, heartbeat) VALUES (?, ?)", (worker, time.time()))
+            self.db.execute(
+                "UPDATE urls SET state = ?, owner = NULL, lease_until = NULL WHERE state = ? AND owner = ?",
+                (PENDING, LEASED, worker),
+            )
+
+    def unregister(self, worker: str):
+        with self._write():
+            self.db.execute("DELETE FROM workers WHERE id = ?", (worker,))
+
+    def heartbeat(self, worker: str):
+        """Keep the worker on the ring and renew all of its leases."""
+        now = time.time()
+        with self._write():
+            self.db.execute("INSERT OR REPLACE INTO workers (id, heartbeat) VALUES (?, ?)", (worker, now))
+            self.db.execute(
+                "UPDATE urls SET lease_until = ? WHERE state = ? AND owner = ?",
+                (now + self.lease_seconds, LEASED, worker),
+            )
+
+    def add_many(self, urls) -> int:
+        """Insert canonical URLs not seen before; returns how many were new."""
+        rows = [(url, host_hash(url)) for url in urls]
+        if not rows:
+            return 0
+        with self._write():
+            before = self.db.total_changes
+            self.db.executemany("INSERT OR IGNORE INTO urls (url, host_hash) VALUES (?, ?)", rows)
+            return self.db.total_changes - before
+
+    def _expire(self, now: float):
+        # Leases of crashed workers: redeliver, or give up on URLs that keep killing workers
+        self.db.execute(
+            "UPDATE urls SET state = CASE WHEN deliveries >= ? THEN ? ELSE ? END, owner = NULL, lease_until = NULL "
+            "WHERE state = ? AND lease_until < ?",
+            (self.max_deliveries, FAILED, PENDING, LEASED, now),
+        )
+
+    def lease(self, worker: str, n: int, max_pages: int | None = None) -> list[str]:
+        """Lease up to n pending URLs of the worker's hosts, never more than max_pages in total."""
+        now = time.time()
+        with self._write():
+            self.db.execute("INSERT OR REPLACE INTO workers (id, heartbeat) VALUES (?, ?)", (worker, now))
+            self._expire(now)
+            if max_pages is not None:
+                (claimed,) = self.db.execute(
+                    "SELECT COUNT(*) FROM urls WHERE state IN (?, ?)", (LEASED, DONE)
+                ).fetchone()
+                n = min(n, max_pages - claimed)
+            if n <= 0:
+                return []
+
+            members = [row[0] for row in self.db.execute(
+                "SELECT id FROM workers WHERE heartbeat >= ?", (now - self.lease_seconds,)
+            )]
+            ring = HashRing(members, self.replicas)
+            params = []
+            if len(ring.members) > 1:
+                ranges = ring.ranges(worker)
+                where = " OR ".join(["(host_hash > ? AND host_hash <= ?)"] * len(ranges))
+                for low, high in ranges:
+                    params += [low, high]
+            else:
+                where = "1"
+            rows = self.db.execute(
+                f"SELECT id, url FROM urls WHERE state = ? AND ({where}) ORDER BY id LIMIT ?",
+                [PENDING, *params, n],
+            ).fetchall()
+            self.db.executemany(
+                "UPDATE urls SET state = ?, owner = ?, lease_until = ?, deliveries = deliveries + 1 WHERE id = ?",
+                [(LEASED, worker, now + self.lease_seconds, row_id) for row_id, _ in rows],
+            )
+        return [url for _, url in rows]
+
+    def _settle(self, urls, state: int):
+        with self._write():
+            self.db.executemany(
+                "UPDATE urls SET state = ?, owner = NULL, lease_until = NULL WHERE url = ?",
+                [(state, url) for url in urls],
+            )
+
+    def ack(self, urls):
+        """Mark URLs done; call once their results are durable."""
+        self._settle(urls, DONE)
+
+    def fail(self, urls):
+        self._settle(urls, FAILED)
+
+    def release(self, worker: str, urls=None):
+        """Hand leased URLs (all of the worker's when urls is None) back without counting a delivery."""
+        query = "UPDATE urls SET state = ?, owner = NULL, lease_until = NULL, deliveries = deliveries - 1 " \
+                "WHERE state = ? AND owner = ?"
+        with self._write():
+            if urls is None:
+                self.db.execute(query, (PENDING, LEASED, worker))
+            else:
+                self.db.executemany(query + " AND url = ?", [(PENDING, LEASED, worker, url) for url in urls])
+
+    def counts(self) -> dict:
+        counts = dict.fromkeys(STATE_NAMES.values(), 0)
+        for state, n in self.db.execute("SELECT state, COUNT(*) FROM urls GROUP BY state"):
+            counts[STATE_NAMES[state]] = n
+        return counts
+
+    def pending(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM urls WHERE state = ?", (PENDING,)).fetchone()[0]
+
+    def _any(self, state: int) -> bool:
+        return self.db.execute("SELECT 1 FROM urls WHERE state = ? LIMIT 1", (state,)).fetchone() is not None
+
+    def finished(self, max_pages: int | None = None) -> bool:
+        """True once nothing is leased and nothing is left to do (or max_pages are done)."""
+        if self._any(LEASED):
+            return False
+        if not self._any(PENDING):
+            return True
+        if max_pages is None:
+            return False
+        return self.db.execute("SELECT COUNT(*) FROM urls WHERE state = ?", (DONE,)).fetchone()[0] >= max_pages
+
+    def close(self):
+        self.db.close()
+
+
+def open_store(config: dict, default_path: str | Path):
+    """Build the frontier store named by a "distributed" config block.
+
+    "backend" is "sqlite" (the default, a file at "path") or "package.module:Class"
+    for another implementation, which is constructed with the config block.
+    """
+    backend = config.get("backend", "sqlite")
+    if backend == "sqlite":
+        return SQLiteFrontierStore(
+            config.get("path") or default_path,
+            lease_seconds=config.get("lease_seconds", 60),
+            max_deliveries=config.get("max_deliveries", 3),
+            replicas=config.get("replicas", 32),
+        )
+    module, _, attr = backend.partition(":")
+    return getattr(importlib.import_module(module), attr)(config)
+
+
+class SharedFrontier:
+    """A crawler worker's view of a shared frontier store.
+
+    Used like AsyncURLFrontier (add, get, task_done, join), plus ack(),
+    fail() and release() to settle the URLs it hands out. A URL should only
+    be acked once its records are on disk: until then a crash redelivers it.
+
+    Store calls can wait on other processes' locks, so they run in a thread,
+    one at a time. add() and the settle methods only queue their change;
+    sync() writes them (new URLs before acks, so a page's links are stored
+    before it counts as done) and runs on every refill, keepalive and join
+    poll. URLs are leased in batches of `batch`; keepalive() must run
+    alongside the crawl, and close() hands back whatever is still leased.
+    """
+
+    def __init__(self, store, worker_id: str, config: dict | None = None, max_pages: int | None = None):
+        config = config or {}
+        self.store = store
+        self.worker_id = worker_id
+        self.drop_params = config.get("drop_params", DEFAULT_DROP_PARAMS)
+        self.batch = config.get("batch", 16)
+        self.poll = config.get("poll", 1.0)
+        self.max_pages = max_pages
+        self.buffer = deque()  # leased, not yet handed to a crawler task
+        self.refill = asyncio.Lock()
+        self.db_lock = asyncio.Lock()
+        # Changes not written to the store yet
+        self.new_urls = {}
+        self.acks, self.fails, self.releases = [], [], []
+        self.pending = 0  # store-wide pending count as of the last poll
+        store.register(worker_id)
+
+    async def _call(self, method, *args):
+        async with self.db_lock:
+            return await asyncio.to_thread(method, *args)
+
+    def canonicalize(self, url: str) -> str:
+        return canonicalize_url(url, self.drop_params)
+
+    def add(self, url: str):
+        self.new_urls[self.canonicalize(url)] = None
+
+    def add_many(self, urls):
+        for url in urls:
+            self.add(url)
+
+    async def sync(self):
+        """Write the queued adds, acks, failures and releases to the store."""
+        new_urls, self.new_urls = list(self.new_urls), {}
+        acks, self.acks = self.acks, []
+        fails, self.fails = self.fails, []
+        releases, self.releases = self.releases, []
+        if new_urls:
+            await self._call(self.store.add_many, new_urls)
+        if acks:
+            await self._call(self.store.ack, acks)
+        if fails:
+            await self._call(self.store.fail, fails)
+        if releases:
+            await self._call(self.store.release, self.worker_id, releases)
+
+    async def get(self) -> str:
+        while True:
+            if self.buffer:
+                return self.buffer.popleft()
+            async with self.refill:
+                if not self.buffer:
+                    await self.sync()
+                    self.buffer.extend(await self._call(self.store.lease, self.worker_id, self.batch, self.max_pages))
+                    self.pending = await self._call(self.store.pending)
+            if not self.buffer:
+                await asyncio.sleep(self.poll)  # nothing for our hosts right now
+
+    def task_done(self):
+        pass  # the URL is settled with ack(), fail() or release()
+
+    def ack(self, urls):
+        self.acks.extend(urls)
+
+    def fail(self, url: str):
+        self.fails.append(url)
+
+    def release(self, url: str):
+        self.releases.append(url)
+
+    async def keepalive(self):
+        """Renew this worker's leases and ring membership until cancelled."""
+        while True:
+            await asyncio.sleep(self.store.lease_seconds / 3)
+            await self.sync()
+            await self._call(self.store.heartbeat, self.worker_id)
+
+    async def join(self):
+        """Wait until the whole crawl (every worker's share) is finished."""
+        while True:
+            await self.sync()
+            self.pending = await self._call(self.store.pending)
+            if await self._call(self.store.finished, self.max_pages):
+                return
+            await asyncio.sleep(self.poll)
+
+    async def counts(self) -> dict:
+        return await self._call(self.store.counts)
+
+    async def close(self):
+        """Write what is queued, hand back the remaining leases and leave the ring."""
+        self.buffer.clear()
+        await self.sync()
+        await self._call(self.store.release, self.worker_id)
+        await self._call(self.store.unregister, self.worker_id)
+        self.store.close()
+
+    def __len__(self) -> int:
+        return self.pending + len(self.new_urls)
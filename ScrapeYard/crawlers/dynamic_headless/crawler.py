@@ -1,61 +1,235 @@
 # ScrapeYard/crawlers/dynamic_headless/crawler.py
 import asyncio
+import re
 import time
 from pathlib import Path
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
-from ..utils import write_items
+from playwright.async_api import async_playwright, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+from ..metrics import Metrics
+from ..parsing import parse_field_selector
+from ..sinks import open_sink, record_fields
+
+CONTEXT_OPTIONS = {
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "viewport": {"width": 1280, "height": 720},
+    "locale": "en-US",
+    "timezone_id": "America/New_York",
+}
+
+# Resolves once the DOM has gone quiet_ms without a mutation, or after timeout_ms at the latest
+WAIT_FOR_QUIET_JS = """([quietMs, timeoutMs]) => new Promise(resolve => {
+    const done = () => { observer.disconnect(); clearTimeout(timer); clearTimeout(deadline); resolve(); };
+    const observer = new MutationObserver(() => { clearTimeout(timer); timer = setTimeout(done, quietMs); });
+    let timer = setTimeout(done, quietMs);
+    const deadline = setTimeout(done, timeoutMs);
+    observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+})"""
+
+# Number of list items, or the page height when there is no list selector
+CONTENT_SIZE_JS = "selector => selector ? document.querySelectorAll(selector).length : document.body.scrollHeight"
+CONTENT_GREW_JS = f"([selector, before]) => ({CONTENT_SIZE_JS})(selector) > before"
+
+# Playwright-only selector syntax (engines like text= / xpath=, chaining with >>, and
+# pseudo-classes such as :has-text()). EXTRACT_JS matches with document.querySelector,
+# which only understands plain CSS, so extract selectors using these are rejected.
+PLAYWRIGHT_SELECTOR = re.compile(
+    r"^\s*(?:[a-z_-]+=|//|\.\./)|>>|:(?:has-text|text|text-is|text-matches|visible|nth-match"
+    r"|left-of|right-of|above|below|near)\b",
+    re.I,
+)
+
+# Runs a whole extraction plan in the page and returns one row of raw textContent per record.
+# Selectors are plain CSS (document.querySelector), not Playwright selectors.
+EXTRACT_JS = """([listSelector, steps]) => {
+    const nextOfTag = (el, tag) => {
+        for (el = el && el.nextElementSibling; el; el = el.nextElementSibling) {
+            if (el.localName === tag) return el;
+        }
+        return null;
+    };
+    const row = (node, pageLevel) => steps.map(([kind, arg]) => {
+        let el;
+        if (kind === "self") el = node;
+        else if (kind === "next") el = nextOfTag(pageLevel ? node.querySelector(arg) : node, arg);
+        else el = node.querySelector(arg);
+        return el ? el.textContent : null;
+    });
+    if (listSelector) return Array.from(document.querySelectorAll(listSelector), item => row(item, false));
+    return [row(document.documentElement, true)];
+}"""
+
+
+class ContextSlot:
+    """A browser context whose pages are shared out to several workers.
+
+    After `recycle_after` navigations new pages go to a fresh context; the
+    old one is closed as soon as its last page is, which caps the memory
+    Chromium accumulates per context.
+    """
+
+    def __init__(self, browser, options: dict, recycle_after: int = 0, setup=None):
+        self.browser = browser
+        self.options = options
+        self.recycle_after = recycle_after
+        self.setup = setup  # optional coroutine run on every new context
+        self.context = None
+        self.navigations = 0
+        self.open_pages = {}  # context -> number of its pages still open
+        self.lock = asyncio.Lock()
+
+    def is_stale(self, page) -> bool:
+        """True once the page belongs to a context that has been recycled."""
+        return page.context is not self.context
+
+    def record(self, page, navigations: int):
+        if not self.is_stale(page):
+            self.navigations += navigations
+
+    async def new_page(self):
+        async with self.lock:
+            if self.context is None or (self.recycle_after and self.navigations >= self.recycle_after):
+                old = self.context
+                self.context = await self.browser.new_context(**self.options)
+                self.open_pages[self.context] = 0
+                if self.setup is not None:
+                    await self.setup(self.context)
+                self.navigations = 0
+                if old is not None and self.open_pages[old] == 0:
+                    del self.open_pages[old]
+                    await old.close()
+            context = self.context
+            self.open_pages[context] += 1
+            try:
+                return await context.new_page()
+            except BaseException:
+                self.open_pages[context] -= 1  # no page was opened after all
+                raise
+
+    async def close_page(self, page):
+        context = page.context
+        try:
+            await page.close()
+        finally:
+            self.open_pages[context] -= 1
+            if context is not self.context and self.open_pages[context] == 0:
+                del self.open_pages[context]
+                await context.close()
+
+    async def close(self):
+        for context in list(self.open_pages):
+            await context.close()
+        self.open_pages.clear()
+        self.context = None
 
 
 class DynamicHeadlessCrawler:
     def __init__(self, config: dict):
         self.config = config
-        self.items = []
-        self.browser = None
-        self.context = None
+        self.sink = open_sink(config["output"], fields=record_fields(config.get("extract", {})))
+
+        # Extraction plan for EXTRACT_JS, compiled once: field keys plus ("self" | "next" | "css", arg) steps
+        extract_config = config.get("extract", {})
+        self.list_selector = extract_config.get("list_selector")
+        fields = extract_config.get("item_fields" if self.list_selector else "fields", {})
+        self.field_keys = list(fields)
+        self.field_steps = []
+        for selector in fields.values():
+            kind, arg = parse_field_selector(selector)
+            self.field_steps.append([kind, arg.lower() if kind == "next" else arg])
+        for selector in [self.list_selector] + [arg for kind, arg in self.field_steps if kind == "css"]:
+            if selector and PLAYWRIGHT_SELECTOR.search(selector):
+                raise ValueError(
+                    f"Extract selector {selector!r} uses Playwright selector syntax; "
+                    "extract selectors must be plain CSS (they run through document.querySelector)"
+                )
+
+        # Page pool: browsers x contexts_per_browser x pages_per_context workers
+        pool = config.get("pool", {})
+        self.num_browsers = max(1, int(pool.get("browsers", 1)))
+        self.contexts_per_browser = max(1, int(pool.get("contexts_per_browser", 1)))
+        self.pages_per_context = max(1, int(pool.get("pages_per_context", 1)))
+        self.page_recycle_after = pool.get("page_recycle_after", 20)
+        self.context_recycle_after = pool.get("context_recycle_after", 100)
+        self.queue = asyncio.Queue(maxsize=pool.get("queue_size", 100))
+
+        # Requests to abort: Playwright resource types and URL substrings
+        block = config.get("block", {})
+        self.blocked_types = set(block.get("resource_types", []))
+        self.blocked_urls = block.get("url_patterns", [])
+
+        # Condition-based waits instead of networkidle and fixed sleeps (times in ms)
+        wait = config.get("wait", {})
+        self.wait_until = wait.get("until", "domcontentloaded")
+        self.wait_timeout = wait.get("timeout", 15000)
+        self.quiet_ms = wait.get("quiet_ms", 500)
+        self.scroll_timeout = wait.get("scroll_timeout", 3000)
+
+        self.playwright = None
+        self.browsers = []
+        self.slots = []
+
+        # Stage timings and counters; config "metrics" adds a JSON dump, a Prometheus endpoint and hooks
+        self.metrics = Metrics()
 
     async def _launch_browser(self):
-        """Launch a realistic browser context."""
-        playwright = await async_playwright().start()
-        self.browser = await playwright.chromium.launch(headless=True)
-        self.context = await self.browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            viewport={"width": 1280, "height": 720},
-            locale="en-US",
-            timezone_id="America/New_York"
-        )
+        """Start Playwright and launch the browsers and contexts of the page pool."""
+        self.playwright = await async_playwright().start()
+        for _ in range(self.num_browsers):
+            browser = await self.playwright.chromium.launch(headless=True)
+            self.browsers.append(browser)
+            for _ in range(self.contexts_per_browser):
+                self.slots.append(ContextSlot(
+                    browser, CONTEXT_OPTIONS, self.context_recycle_after,
+                    setup=self._setup_context if self.blocked_types or self.blocked_urls else None,
+                ))
 
-    async def _extract_items(self, page, url: str):
-        """Extract data with timeout and error handling."""
-        extract_config = self.config.get("extract", {})
-        list_selector = extract_config.get("list_selector")
+    async def _setup_context(self, context):
+        await context.route("**/*", self._route)
+
+    async def _route(self, route):
+        """Abort requests for blocked resource types and URL patterns."""
+        request = route.request
+        if request.resource_type in self.blocked_types or any(p in request.url for p in self.blocked_urls):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _wait_for_quiet(self, page):
+        """Wait until the DOM stops changing (bounded by wait.timeout)."""
+        with self.metrics.timer("wait"):
+            try:
+                await page.evaluate(WAIT_FOR_QUIET_JS, [self.quiet_ms, self.wait_timeout])
+            except PlaywrightError:
+                # A navigation replaced the document mid-wait; wait for the new one to load instead
+                await page.wait_for_load_state(self.wait_until, timeout=self.wait_timeout)
+
+    async def _close_browser(self):
+        for slot in self.slots:
+            await slot.close()
+        for browser in self.browsers:
+            await browser.close()
+        if self.playwright is not None:
+            await self.playwright.stop()
+        self.slots, self.browsers, self.playwright = [], [], None
 
+    async def _extract_items(self, page, url: str):
+        """Extract every record on the page in a single evaluate() round trip."""
         try:
-            if list_selector:
-                # Wait for items to appear (max 15 seconds)
-                await page.wait_for_selector(list_selector, timeout=15000)
-                items = await page.query_selector_all(list_selector)
-                for item in items:
+            if self.list_selector:
+                # Wait for items to appear
+                with self.metrics.timer("wait"):
+                    await page.wait_for_selector(self.list_selector, timeout=self.wait_timeout)
+            with self.metrics.timer("extract"):
+                rows = await page.evaluate(EXTRACT_JS, [self.list_selector, self.field_steps])
+            with self.metrics.timer("sink_write"):
+                for row in rows:
                     record = {"url": url}
-                    item_fields = extract_config.get("item_fields", {})
-                    for key, selector in item_fields.items():
-                        if selector == "":
-                            text = await item.text_content()
-                        else:
-                            el = await item.query_selector(selector)
-                            text = await el.text_content() if el else None
+                    for key, text in zip(self.field_keys, row):
                         record[key] = text.strip() if text else None
-                    self.items.append(record)
-            else:
-                # Page-level extraction
-                record = {"url": url}
-                page_fields = extract_config.get("fields", {})
-                for key, selector in page_fields.items():
-                    el = await page.query_selector(selector)
-                    text = await el.text_content() if el else None
-                    record[key] = text.strip() if text else None
-                self.items.append(record)
+                    self.sink.write(record)
+            self.metrics.inc("items", len(rows))
 
         except PlaywrightTimeoutError:
+            self.metrics.inc("extract_timeouts")
             print(f"Timeout: No content found on {url}. Saving debug screenshot.")
             debug_path = Path("./debug") / f"timeout_{int(time.time())}.png"
             debug_path.parent.mkdir(exist_ok=True)
@@ -73,43 +247,113 @@ class DynamicHeadlessCrawler:
                 next_btn = await page.query_selector(next_selector)
                 if next_btn:
                     await next_btn.click()
-                    await page.wait_for_load_state("networkidle")
+                    # Works for both full navigations and in-place (XHR) page swaps
+                    await self._wait_for_quiet(page)
                     return True
 
         elif ptype == "infinite":
-            last_height = await page.evaluate("document.body.scrollHeight")
+            # Scroll until no new items arrive within scroll_timeout
             scroll_limit = paginate.get("scroll_limit", 5)
             for _ in range(scroll_limit):
+                before = await page.evaluate(CONTENT_SIZE_JS, self.list_selector)
                 await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                await asyncio.sleep(2)
-                new_height = await page.evaluate("document.body.scrollHeight")
-                if new_height == last_height:
+                try:
+                    await page.wait_for_function(
+                        CONTENT_GREW_JS, arg=[self.list_selector, before], timeout=self.scroll_timeout
+                    )
+                except PlaywrightTimeoutError:
                     break
-                last_height = new_height
             return True
 
         return False
 
     async def crawl(self):
-        await self._launch_browser()
+        self.metrics.start(self.config.get("metrics"), Path(self.config["output"]["path"]) / "stats.json")
+        try:
+            with self.sink:
+                await self._crawl()
+        finally:
+            self.metrics.close()
 
-        for start_url in self.config["start_urls"]:
-            print(f"Crawling (dynamic): {start_url}")
-            page = await self.context.new_page()
-            try:
-                await page.goto(start_url, wait_until="networkidle", timeout=30000)
-                await self._extract_items(page, start_url)
-
-                max_pages = self.config.get("max_pages", 1)
-                for _ in range(1, max_pages):
-                    if not await self._handle_pagination(page, start_url):
-                        break
-                    await self._extract_items(page, page.url)
-
-            except Exception as e:
-                print(f"Error during crawl of {start_url}: {e}")
-            finally:
-                await page.close()
-
-        await self.browser.close()
-        await write_items(self.items, self.config["output"])
\ No newline at end of file
+    async def _crawl_start_url(self, page, start_url: str) -> int:
+        """Render one start URL and its pagination; returns the number of navigations made."""
+        print(f"Crawling (dynamic): {start_url}")
+        navigations = 1
+        with self.metrics.timer("navigate"):
+            await page.goto(start_url, wait_until=self.wait_until, timeout=30000)
+        if not self.list_selector:
+            # List pages wait for their selector in _extract_items; others for the DOM to settle
+            await self._wait_for_quiet(page)
+        await self._extract_items(page, start_url)
+
+        max_pages = self.config.get("max_pages", 1)
+        for _ in range(1, max_pages):
+            if not await self._handle_pagination(page, start_url):
+                break
+            navigations += 1
+            await self._extract_items(page, page.url)
+        return navigations
+
+    async def _worker(self, slot: ContextSlot):
+        """Render queued start URLs on one pooled page, recycling it every page_recycle_after navigations."""
+        page, uses = None, 0
+        try:
+            while True:
+                start_url = await self.queue.get()
+                self.metrics.set("queue_depth", self.queue.qsize())
+                try:
+                    if page is not None and slot.is_stale(page):
+                        stale, page = page, None  # close_page releases its slot count even if close fails
+                        await slot.close_page(stale)
+                    if page is None:
+                        page, uses = await slot.new_page(), 0
+
+                    broken = False
+                    try:
+                        with self.metrics.timer("start_url"):
+                            navigations = await self._crawl_start_url(page, start_url)
+                        self.metrics.inc("pages", navigations)
+                    except Exception as e:
+                        self.metrics.inc("page_errors", error=type(e).__name__)
+                        print(f"Error during crawl of {start_url}: {e}")
+                        # The page may be left mid-navigation or crashed; use a fresh one next time
+                        navigations, broken = 1, True
+
+                    slot.record(page, navigations)
+                    uses += navigations
+                    if broken or page.is_closed() or (self.page_recycle_after and uses >= self.page_recycle_after):
+                        done, page = page, None
+                        await slot.close_page(done)
+                except Exception as e:
+                    print(f"Page pool error on {start_url}: {e}")
+                    if page is not None:
+                        # Give the page (and its count in the slot) back before starting over
+                        failed, page = page, None
+                        try:
+                            await slot.close_page(failed)
+                        except Exception:
+                            pass
+                finally:
+                    self.queue.task_done()
+        finally:
+            if page is not None and not page.is_closed():
+                await slot.close_page(page)
+
+    async def _crawl(self):
+        workers = []
+        try:
+            await self._launch_browser()
+            workers = [
+                asyncio.create_task(self._worker(slot))
+                for slot in self.slots
+                for _ in range(self.pages_per_context)
+            ]
+            # The queue is bounded, so this blocks while the pool is busy
+            for start_url in self.config["start_urls"]:
+                await self.queue.put(start_url)
+            await self.queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await self._close_browser()
@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import math
+from collections import deque
+from fnmatch import fnmatchcase
+from urllib.parse import quote_plus, unquote_plus, urlsplit, urlunsplit
+
+# Query parameters that only carry tracking data and never change the page
+DEFAULT_DROP_PARAMS = [
+    "utm_*", "gclid", "dclid", "fbclid", "msclkid", "yclid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "igshid", "ref_src",
+]
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str, drop_params: list[str] | None = None) -> str:
+    """Normalise a URL so trivially different spellings dedupe to one entry.
+
+    Lowercases scheme and host, drops default ports and the fragment,
+    removes tracking parameters and sorts the remaining query parameters.
+    Bare flags (`?foo`) keep their spelling, since servers may treat them
+    differently from `?foo=`. A URL that can't be parsed (e.g. a port out
+    of range) is returned as it is; fetching it fails on its own.
+    """
+    drop_params = DEFAULT_DROP_PARAMS if drop_params is None else drop_params
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"  # IPv6 literal; hostname drops the brackets
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+        host = f"{userinfo}@{host}"
+
+    query = []
+    for pair in parts.query.split("&"):
+        if not pair:
+            continue
+        key, equals, value = pair.partition("=")
+        key, value = unquote_plus(key), unquote_plus(value)
+        if not any(fnmatchcase(key, pattern) for pattern in drop_params):
+            query.append((key, value, equals))
+    query.sort()
+    query = "&".join(quote_plus(k) + (f"={quote_plus(v)}" if equals else "") for k, v, equals in query)
+
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def _digest(url: str) -> bytes:
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+
+
+class FingerprintSet:
+    """Seen set that stores a 64-bit hash per URL instead of the URL string.
+
+    Collisions are possible but vanishingly rare below billions of URLs.
+    """
+
+    def __init__(self):
+        self._hashes = set()
+
+    def add(self, url: str):
+        self._hashes.add(int.from_bytes(_digest(url)[:8], "little"))
+
+    def __contains__(self, url: str) -> bool:
+        return int.from_bytes(_digest(url)[:8], "little") in self._hashes
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+
+class BloomFilter:
+    """Fixed-memory seen set; may report false positives at roughly error_rate."""
+
+    def __init__(self, capacity: int = 10_000_000, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(self.size // 8 + 1)
+        self.count = 0
+
+    def _positions(self, url: str):
+        digest = _digest(url)
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, url: str):
+        for pos in self._positions(url):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, url: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(url))
+
+    def __len__(self) -> int:
+        return self.count
+
+
+def make_seen_set(config: dict | None = None):
+    """Build the seen set named by a frontier config ("exact", "fingerprint" or "bloom")."""
+    config = config or {}
+    kind = config.get("seen", "exact")
+    if kind == "exact":
+        return set()
+    if kind == "fingerprint":
+        return FingerprintSet()
+    if kind == "bloom":
+        return BloomFilter(config.get("capacity", 10_000_000), config.get("error_rate", 0.001))
+    raise ValueError(f"Unknown frontier seen set: {kind!r}")
+
+
+class URLFrontier:
+    """FIFO of canonical URLs with O(1) enqueue, dequeue and dedup.
+
+    Every URL is remembered when it is first enqueued, so a URL is never
+    queued twice, even after it has been popped and visited.
+    """
+
+    def __init__(self, config: dict | None = None):
+        config = config or {}
+        self.drop_params = config.get("drop_params", DEFAULT_DROP_PARAMS)
+        self.seen = make_seen_set(config)
+        self.queue = self._new_queue()
+
+    def _new_queue(self):
+        return deque()
+
+    def canonicalize(self, url: str) -> str:
+        return canonicalize_url(url, self.drop_params)
+
+    def add(self, url: str) -> bool:
+        """Queue url unless it was seen before. Returns True if it was queued."""
+        url = self.canonicalize(url)
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        self._push(url)
+        return True
+
+    def add_many(self, urls) -> int:
+        """add() each URL; returns how many were queued."""
+        return sum(self.add(url) for url in urls)
+
+    def _push(self, url: str):
+        self.queue.append(url)
+
+    def pop(self) -> str:
+        return self.queue.popleft()
+
+    def pending(self) -> list[str]:
+        return list(self.queue)
+
+    def snapshot(self, in_flight=()) -> dict:
+        """Picklable state for checkpoints; in-flight URLs are re-queued first on restore."""
+        return {"seen": self.seen, "pending": [*in_flight, *self.pending()]}
+
+    def restore(self, snapshot: dict):
+        self.seen = snapshot["seen"]
+        self.queue = self._new_queue()
+        for url in snapshot["pending"]:
+            self._push(url)
+
+    def __contains__(self, url: str) -> bool:
+        return self.canonicalize(url) in self.seen
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+
+class AsyncURLFrontier(URLFrontier):
+    """URLFrontier for worker pools: get() waits for work, join() for all of it to finish."""
+
+    def _new_queue(self):
+        return asyncio.Queue()
+
+    def _push(self, url: str):
+        self.queue.put_nowait(url)
+
+    def pop(self) -> str:
+        return self.queue.get_nowait()
+
+    def pending(self) -> list[str]:
+        # asyncio.Queue keeps its items in the `_queue` deque (see Queue._init)
+        return list(self.queue._queue)
+
+    async def get(self) -> str:
+        return await self.queue.get()
+
+    def task_done(self):
+        self.queue.task_done()
+
+    async def join(self):
+        await self.queue.join()
+
+    def __len__(self) -> int:
+        return self.queue.qsize()
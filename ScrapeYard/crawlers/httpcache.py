@@ -0,0 +1,143 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from .frontier import canonicalize_url
+
+
+class CacheEntry:
+    def __init__(self, etag, last_modified, content_type, body, extract_hash, results):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_type = content_type
+        self.body = body
+        self.extract_hash = extract_hash
+        self.results = results
+
+    def validators(self) -> dict:
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HTTPCache:
+    """On-disk response cache keyed by canonical URL, with size-bounded LRU eviction.
+
+    Only responses carrying an ETag or Last-Modified are stored, since
+    those are the only ones that can be revalidated cheaply. Alongside the
+    body it can hold the records/links extracted from it, tagged with a
+    hash of the extraction config, so an unchanged page needn't be re-parsed.
+    """
+
+    def __init__(self, path: str = ".http_cache/cache.sqlite3", max_bytes: int = 1_000_000_000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        # Worker processes of a distributed crawl share the file: WAL lets readers run
+        # alongside a writer, and writers wait for the lock instead of failing.
+        # Async crawlers call in through asyncio.to_thread, so the connection is
+        # shared between threads, one call at a time.
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("BEGIN IMMEDIATE")
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_type TEXT,
+                body BLOB,
+                size INTEGER,
+                accessed REAL,
+                extract_hash TEXT,
+                results TEXT
+            )"""
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        # The total size lives in the file, kept up to date by triggers, so every
+        # process sharing the cache evicts against the same figure
+        self.db.execute("CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER)")
+        self.db.execute(
+            "INSERT OR IGNORE INTO cache_size VALUES (0, (SELECT COALESCE(SUM(size), 0) FROM responses))"
+        )
+        self.db.execute(
+            "CREATE TRIGGER IF NOT EXISTS responses_added AFTER INSERT ON responses "
+            "BEGIN UPDATE cache_size SET bytes = bytes + NEW.size; END"
+        )
+        self.db.execute(
+            "CREATE TRIGGER IF NOT EXISTS responses_removed AFTER DELETE ON responses "
+            "BEGIN UPDATE cache_size SET bytes = bytes - OLD.size; END"
+        )
+        self._evict()  # max_bytes may have shrunk since the last run
+        self.db.commit()
+
+    @property
+    def total_bytes(self) -> int:
+        return self.db.execute("SELECT bytes FROM cache_size").fetchone()[0]
+
+    def get(self, url: str) -> CacheEntry | None:
+        key = canonicalize_url(url)
+        with self.lock:
+            row = self.db.execute(
+                "SELECT etag, last_modified, content_type, body, extract_hash, results FROM responses WHERE url = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE responses SET accessed = ? WHERE url = ?", (time.time(), key))
+            self.db.commit()
+        etag, last_modified, content_type, body, extract_hash, results = row
+        return CacheEntry(
+            etag, last_modified, content_type, zlib.decompress(body),
+            extract_hash, json.loads(results) if results else None,
+        )
+
+    def store(self, url: str, etag: str | None, last_modified: str | None, content_type: str | None, body: bytes):
+        """Cache a fresh 200 response; stale extraction results for the URL are dropped."""
+        if not etag and not last_modified:
+            return
+        key = canonicalize_url(url)
+        blob = zlib.compress(body)
+        with self.lock:
+            self.db.execute("DELETE FROM responses WHERE url = ?", (key,))
+            self.db.execute(
+                "INSERT INTO responses (url, etag, last_modified, content_type, body, size, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, content_type, blob, len(blob), time.time()),
+            )
+            self._evict()
+            self.db.commit()
+
+    def store_results(self, url: str, extract_hash: str, results):
+        """Remember what was extracted from the cached body under a given extraction config."""
+        results = json.dumps(results, ensure_ascii=False)
+        with self.lock:
+            self.db.execute(
+                "UPDATE responses SET extract_hash = ?, results = ? WHERE url = ?",
+                (extract_hash, results, canonicalize_url(url)),
+            )
+            self.db.commit()
+
+    def _evict(self):
+        # Drop least recently used entries until the cache fits again
+        while self.total_bytes > self.max_bytes:
+            rows = self.db.execute("SELECT url FROM responses ORDER BY accessed LIMIT 100").fetchall()
+            if not rows:
+                break
+            for (key,) in rows:
+                self.db.execute("DELETE FROM responses WHERE url = ?", (key,))
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,250 @@
+import bisect
+import http.server
+import importlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Upper bounds (seconds) of the stage latency histogram buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+
+class StageTiming:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Bucket upper bound below which a share q of the samples fall (capped at the max seen)."""
+        target, seen = q * self.count, 0
+        for bound, n in zip(BUCKETS, self.buckets):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 4),
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else None,
+            "p50_ms": round(self.quantile(0.5) * 1000, 3) if self.count else None,
+            "p99_ms": round(self.quantile(0.99) * 1000, 3) if self.count else None,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return (name, tuple(sorted(labels.items())))
+
+
+def _label_text(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in labels) + "}"
+
+
+class Metrics:
+    """Counters, gauges and per-stage timings for one crawl.
+
+    Crawlers time stages (robots, politeness_wait, connect, ttfb, download,
+    parse, extract, sink_write, ...) with `with metrics.timer(stage):` or
+    observe(), count events with inc() and report levels such as queue depth
+    with set(). Every update is also passed to the registered hooks as
+    hook(kind, name, value, labels) with kind "timing", "count" or "gauge",
+    so they can forward it to statsd, logs or anything else.
+
+    start() turns on the built-in exporters from a config block:
+    {"dump": {"path": "stats.json", "interval": 30}, "prometheus": {"port": 9108},
+     "hooks": ["package.module:callable"]}
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.counters = {}  # (name, labels) -> value
+        self.gauges = {}
+        self.stages = {}  # stage -> StageTiming
+        self.hooks = []
+        self.lock = threading.Lock()  # the red-team crawler updates from a worker thread too
+        self._dumper = None
+        self._dump_path = None
+        self._stop = threading.Event()
+        self._server = None
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def _emit(self, kind: str, name: str, value: float, labels: dict):
+        for hook in self.hooks:
+            try:
+                hook(kind, name, value, labels)
+            except Exception as e:
+                print(f"Metrics hook {hook!r} failed: {e}")
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        if self.hooks:
+            self._emit("count", name, value, labels)
+
+    def set(self, name: str, value: float, **labels):
+        with self.lock:
+            self.gauges[_key(name, labels)] = value
+        if self.hooks:
+            self._emit("gauge", name, value, labels)
+
+    def observe(self, stage: str, seconds: float):
+        with self.lock:
+            timing = self.stages.get(stage)
+            if timing is None:
+                timing = self.stages[stage] = StageTiming()
+            timing.add(seconds)
+        if self.hooks:
+            self._emit("timing", stage, seconds, {})
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Time the body of a with-block (it may contain awaits) as one sample of `stage`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def httpx_trace(self):
+        """An httpx "trace" extension for one request: times connection setup and time to first byte."""
+        started = {}
+
+        async def trace(event: str, info: dict):
+            name, _, phase = event.rpartition(".")
+            now = time.perf_counter()
+            if phase == "started":
+                started[name] = now
+            elif phase == "complete":
+                if name.startswith("connection.") and name in started:
+                    self.observe("connect", now - started.pop(name))  # TCP connect, then TLS handshake
+                elif name.endswith("receive_response_headers"):
+                    sent = next((t for n, t in started.items() if n.endswith("send_request_headers")), None)
+                    if sent is not None:
+                        self.observe("ttfb", now - sent)
+        return trace
+
+    def snapshot(self) -> dict:
+        """All metrics as plain JSON-able data."""
+        with self.lock:
+            counters = {name + _label_text(labels): value for (name, labels), value in self.counters.items()}
+            gauges = {name + _label_text(labels): value for (name, labels), value in self.gauges.items()}
+            stages = {stage: timing.summary() for stage, timing in self.stages.items()}
+        return {
+            "time": time.time(),
+            "uptime_s": round(time.time() - self.started, 3),
+            "counters": counters,
+            "gauges": gauges,
+            "stages": stages,
+        }
+
+    def prometheus(self, prefix: str = "scrapeyard") -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            for kind, suffix, values in (("counter", "_total", self.counters), ("gauge", "", self.gauges)):
+                typed = set()
+                for (name, labels), value in sorted(values.items()):
+                    metric = f"{prefix}_{name}{suffix}"
+                    if metric not in typed:
+                        typed.add(metric)
+                        lines.append(f"# TYPE {metric} {kind}")
+                    lines.append(f"{metric}{_label_text(labels)} {value}")
+
+            metric = f"{prefix}_stage_seconds"
+            if self.stages:
+                lines.append(f"# TYPE {metric} histogram")
+            for stage, timing in sorted(self.stages.items()):
+                cumulative = 0
+                for bound, n in zip(BUCKETS, timing.buckets):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{metric}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{stage="{stage}"}} {timing.total}')
+                lines.append(f'{metric}_count{{stage="{stage}"}} {timing.count}')
+        lines.append(f"{prefix}_uptime_seconds {time.time() - self.started}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str | Path):
+        """Write snapshot() to a JSON file (replaced atomically)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(self.snapshot(), indent=2))
+        os.replace(tmp, path)
+
+    def start(self, config: dict | None, default_dump: str | Path | None = None):
+        """Start the exporters and load the hooks named in a "metrics" config block."""
+        config = config or {}
+        for spec in config.get("hooks", []):
+            module, _, attr = spec.partition(":")
+            self.add_hook(getattr(importlib.import_module(module), attr))
+
+        dump = config.get("dump")
+        if dump:
+            path = dump.get("path") or default_dump or "stats.json"
+            interval = dump.get("interval", 30)
+
+            def dump_loop():
+                while not self._stop.wait(interval):
+                    self.dump(path)
+
+            self._dump_path = path
+            self._dumper = threading.Thread(target=dump_loop, name="metrics-dump", daemon=True)
+            self._dumper.start()
+
+        prometheus = config.get("prometheus")
+        if prometheus:
+            metrics = self
+
+            class Handler(http.server.BaseHTTPRequestHandler):
+                def log_message(self, *args):
+                    pass
+
+                def do_GET(self):
+                    body = metrics.prometheus().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            host, port = prometheus.get("host", "127.0.0.1"), prometheus.get("port", 9108)
+            try:
+                self._server = http.server.ThreadingHTTPServer((host, port), Handler)
+            except OSError as e:
+                print(f"Metrics endpoint not started on {host}:{port}: {e}")
+            else:
+                self._server.daemon_threads = True
+                threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+                print(f"Metrics at http://{host}:{self._server.server_address[1]}/metrics")
+        return self
+
+    def close(self):
+        """Stop the exporters; the JSON dump is written one last time."""
+        if self._dumper is not None:
+            self._stop.set()
+            self._dumper.join()
+            self._dumper = None
+            self.dump(self._dump_path)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,168 @@
+import importlib.util
+
+from bs4 import BeautifulSoup
+import soupsieve
+
+# BeautifulSoup's "lxml" tree builder needs lxml (pip install lxml)
+LXML_AVAILABLE = importlib.util.find_spec("lxml") is not None
+
+# Optional fast CSS engine (pip install selectolax)
+SELECTOLAX_AVAILABLE = False
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    pass
+
+
+class SoupBackend:
+    """BeautifulSoup tree with selectors precompiled by soupsieve ("html.parser" or "lxml")."""
+
+    def __init__(self, features: str = "html.parser"):
+        if features == "lxml" and not LXML_AVAILABLE:
+            raise RuntimeError("The lxml parser backend requires the 'lxml' package")
+        self.name = features
+        self.features = features
+
+    def parse(self, markup):
+        return BeautifulSoup(markup, self.features)
+
+    def compile(self, selector: str):
+        return soupsieve.compile(selector)
+
+    def select(self, node, compiled) -> list:
+        return compiled.select(node)
+
+    def select_one(self, node, compiled):
+        return compiled.select_one(node)
+
+    def find(self, node, tag: str):
+        return node.find(tag)
+
+    def next_sibling(self, node, tag: str):
+        return node.find_next_sibling(tag)
+
+    def text(self, node, strip: bool = True) -> str:
+        return node.get_text(strip=strip)
+
+    def attr(self, node, name: str):
+        return node.get(name)
+
+    def title(self, doc) -> str:
+        return doc.title.string.strip() if doc.title and doc.title.string else ""
+
+    def count(self, doc, tag: str) -> int:
+        return len(doc.find_all(tag))
+
+
+class SelectolaxBackend:
+    """Lexbor-based parser; much faster than building a BeautifulSoup tree."""
+
+    name = "selectolax"
+
+    def __init__(self):
+        if not SELECTOLAX_AVAILABLE:
+            raise RuntimeError("The selectolax parser backend requires the 'selectolax' package")
+
+    def parse(self, markup):
+        return LexborHTMLParser(markup)
+
+    def compile(self, selector: str):
+        # Lexbor parses selectors natively and very cheaply; nothing to precompile
+        return selector
+
+    def select(self, node, compiled) -> list:
+        return node.css(compiled)
+
+    def select_one(self, node, compiled):
+        return node.css_first(compiled)
+
+    def find(self, node, tag: str):
+        return node.css_first(tag)
+
+    def next_sibling(self, node, tag: str):
+        sibling = node.next
+        while sibling is not None and sibling.tag != tag:
+            sibling = sibling.next
+        return sibling
+
+    def text(self, node, strip: bool = True) -> str:
+        if hasattr(node, "root"):  # whole document
+            node = node.root
+        return node.text(strip=strip) if node is not None else ""
+
+    def attr(self, node, name: str):
+        return node.attributes.get(name)
+
+    def title(self, doc) -> str:
+        node = doc.css_first("title")
+        return node.text().strip() if node else ""
+
+    def count(self, doc, tag: str) -> int:
+        return len(doc.css(tag))
+
+
+def get_backend(name: str = "html.parser"):
+    """Return the parser backend named in a crawler config."""
+    if name in ("html.parser", "lxml"):
+        return SoupBackend(name)
+    if name == "selectolax":
+        return SelectolaxBackend()
+    raise ValueError(f"Unknown parser backend: {name!r}")
+
+
+def parse_field_selector(selector: str) -> tuple[str, str | None]:
+    """Split a field selector into a ("self" | "next" | "css", arg) step."""
+    if selector == "":
+        return "self", None  # Use the element itself
+    if selector.startswith("next+"):
+        # Get the next sibling of a given tag (e.g., "next+p")
+        return "next", selector.split("+", 1)[1]
+    return "css", selector
+
+
+class ExtractionPlan:
+    """The `extract` config compiled once against a backend.
+
+    Field selectors are pre-parsed into ("self" | "next" | "css", arg) steps,
+    so extracting a page only costs the selector matching itself.
+    """
+
+    def __init__(self, extract_config: dict, backend):
+        self.backend = backend
+        list_selector = extract_config.get("list_selector")
+        self.list_selector = backend.compile(list_selector) if list_selector else None
+        fields = extract_config.get("item_fields" if list_selector else "fields", {})
+        self.fields = [(key, *self._compile_field(selector)) for key, selector in fields.items()]
+        self.all_links = backend.compile("a[href]")
+
+    def _compile_field(self, selector: str):
+        kind, arg = parse_field_selector(selector)
+        return kind, self.backend.compile(arg) if kind == "css" else arg
+
+    def _record(self, node, base_url: str, page_level: bool) -> dict:
+        backend = self.backend
+        record = {"url": base_url}
+        for key, kind, arg in self.fields:
+            if kind == "self":
+                el = node
+            elif kind == "next":
+                if page_level:
+                    first_el = backend.find(node, arg)
+                    el = backend.next_sibling(first_el, arg) if first_el else None
+                else:
+                    el = backend.next_sibling(node, arg)
+            else:
+                el = backend.select_one(node, arg)
+            record[key] = backend.text(el) if el is not None else None
+        return record
+
+    def extract(self, doc, base_url: str) -> list[dict]:
+        """Extract structured data — either one record per list item or a single page record."""
+        if self.list_selector is not None:
+            return [self._record(item, base_url, False) for item in self.backend.select(doc, self.list_selector)]
+        return [self._record(doc, base_url, True)]
+
+    def links(self, doc) -> list[str]:
+        """All raw href values of <a> tags in the document."""
+        return [self.backend.attr(a, "href") for a in self.backend.select(doc, self.all_links)]
@@ -0,0 +1,215 @@
+import asyncio
+import re
+from urllib.parse import parse_qsl, urlparse
+
+# Optional headless rendering (pip install playwright && playwright install chromium)
+PLAYWRIGHT_AVAILABLE = False
+try:
+    from playwright.async_api import async_playwright, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+    from .dynamic_headless.crawler import CONTEXT_OPTIONS, WAIT_FOR_QUIET_JS, ContextSlot
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    pass
+
+# Empty mount points of client-rendered apps and "enable JavaScript" notices
+SPA_SHELL_MARKERS = [
+    r"<div\s+id=[\"'](?:root|app|__next|__nuxt|svelte)[\"'][^>]*>\s*</div>",
+    r"<app-root[^>]*>\s*</app-root>",
+    r"<noscript>[^<]*(?:enable|requires?) javascript",
+]
+
+_INVISIBLE = re.compile(r"<script\b.*?</script>|<style\b.*?</style>|<!--.*?-->|<[^>]+>", re.S | re.I)
+_NUMBER = re.compile(r"\d+")
+_HEX_ID = re.compile(r"(?=[a-f-]*\d)[0-9a-f-]{8,}", re.I)
+
+# Per-pattern counters
+STATIC_OK, RENDER_HELPED, RENDER_USELESS = range(3)
+
+
+def url_pattern(url: str) -> str:
+    """Generalize a URL to its route, e.g. shop.com/item/{n}?page= or shop.com/blog/*."""
+    parts = urlparse(url)
+    segments = []
+    for segment in parts.path.strip("/").split("/"):
+        segments.append("{id}" if _HEX_ID.fullmatch(segment) else _NUMBER.sub("{n}", segment))
+    if len(segments) > 1:
+        segments[-1] = "*"  # slugs under one section share a template
+    query = "&".join(sorted({key + "=" for key, _ in parse_qsl(parts.query)}))
+    return parts.netloc + "/" + "/".join(segments) + ("?" + query if query else "")
+
+
+class RenderRouter:
+    """Decides which pages need a headless render on top of a plain fetch.
+
+    A page is escalated when its static HTML looks client-rendered: the list
+    selector matched nothing or, for page-level extraction, the markup is a
+    known SPA shell or has almost no visible text. Outcomes are remembered
+    per URL pattern: once a pattern has needed rendering `learn_after` times
+    (and practically always) its pages go straight to the renderer, and
+    patterns where rendering did not help stop being escalated. At most
+    `budget` pages are rendered per crawl.
+    """
+
+    def __init__(self, config: dict | None = None):
+        config = config or {}
+        self.budget = config.get("budget", 100)
+        self.min_text = config.get("min_text", 200)
+        self.learn_after = config.get("learn_after", 3)
+        markers = SPA_SHELL_MARKERS + config.get("spa_markers", [])
+        self.spa_shell = re.compile("|".join(f"(?:{m})" for m in markers), re.I)
+        self.renders = 0
+        self.patterns = {}  # url pattern -> [static ok, render helped, render useless]
+
+    def check(self, html: str, items: int | None = None) -> str | None:
+        """Why this HTML needs rendering ("no_items", "spa_shell", "empty_body"), or None.
+
+        Pass the number of extracted items when a list selector is configured;
+        it is then the only signal used.
+        """
+        if items is not None:
+            return "no_items" if items == 0 else None
+        if self.spa_shell.search(html):
+            return "spa_shell"
+        if len("".join(_INVISIBLE.sub(" ", html).split())) < self.min_text:
+            return "empty_body"
+        return None
+
+    def _stats(self, url: str) -> list[int]:
+        return self.patterns.setdefault(url_pattern(url), [0, 0, 0])
+
+    def _take(self) -> bool:
+        # Claimed before rendering, so concurrent workers never overrun the budget
+        if self.renders >= self.budget:
+            return False
+        self.renders += 1
+        return True
+
+    def render_first(self, url: str) -> bool:
+        """True (and a render is claimed) when the URL's pattern is known to need rendering."""
+        stats = self.patterns.get(url_pattern(url))
+        if stats is None or stats[RENDER_HELPED] < self.learn_after:
+            return False
+        if stats[STATIC_OK] + stats[RENDER_USELESS] > stats[RENDER_HELPED] // 10:
+            return False
+        return self._take()
+
+    def escalate(self, url: str, reason: str | None) -> bool:
+        """Record a static fetch checked with check(); True (and a render is claimed) to render it."""
+        stats = self._stats(url)
+        if reason is None:
+            stats[STATIC_OK] += 1
+            return False
+        if stats[RENDER_USELESS] >= self.learn_after and stats[RENDER_USELESS] > stats[RENDER_HELPED]:
+            return False  # rendering never fixes this pattern; keep the static page
+        return self._take()
+
+    def record_render(self, url: str, helped: bool):
+        self._stats(url)[RENDER_HELPED if helped else RENDER_USELESS] += 1
+
+    def state(self) -> dict:
+        return {"renders": self.renders, "patterns": self.patterns}
+
+    def restore(self, state: dict):
+        self.renders = state["renders"]
+        self.patterns = state["patterns"]
+
+
+class HeadlessRenderer:
+    """A small Playwright page pool for the pages a RenderRouter escalates.
+
+    Uses the dynamic_headless context pool. The browser is launched on the
+    first render, so crawls that never escalate never start one.
+    """
+
+    def __init__(self, config: dict, list_selector: str | None = None):
+        self.list_selector = list_selector  # the CSS string from the extract config, not a compiled selector
+        pool = config.get("pool", {})
+        self.pages = asyncio.Semaphore(max(1, int(pool.get("pages", 2))))
+        self.page_recycle_after = pool.get("page_recycle_after", 20)
+        self.context_recycle_after = pool.get("context_recycle_after", 100)
+
+        block = config.get("block", {})
+        self.blocked_types = set(block.get("resource_types", ["image", "media", "font"]))
+        self.blocked_urls = block.get("url_patterns", [])
+
+        wait = config.get("wait", {})
+        self.wait_until = wait.get("until", "domcontentloaded")
+        self.wait_timeout = wait.get("timeout", 15000)
+        self.quiet_ms = wait.get("quiet_ms", 500)
+
+        self.playwright = None
+        self.browser = None
+        self.slot = None
+        self.idle = []  # (page, uses) ready for the next render
+        self.start_lock = asyncio.Lock()
+
+    async def _start(self):
+        async with self.start_lock:
+            if self.slot is None:
+                self.playwright = await async_playwright().start()
+                self.browser = await self.playwright.chromium.launch(headless=True)
+                self.slot = ContextSlot(
+                    self.browser, CONTEXT_OPTIONS, self.context_recycle_after,
+                    setup=self._setup_context if self.blocked_types or self.blocked_urls else None,
+                )
+
+    async def _setup_context(self, context):
+        await context.route("**/*", self._route)
+
+    async def _route(self, route):
+        request = route.request
+        if request.resource_type in self.blocked_types or any(p in request.url for p in self.blocked_urls):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def render(self, url: str) -> str | None:
+        """Load the URL in a pooled page and return the rendered HTML (None if the browser failed).
+
+        Only browser errors (navigation, timeouts, crashed pages) are turned
+        into None; anything else is a bug and is raised to the caller.
+        """
+        await self._start()
+        async with self.pages:
+            page, uses = self.idle.pop() if self.idle else (None, 0)
+            if page is not None and self.slot.is_stale(page):
+                await self.slot.close_page(page)
+                page = None
+            if page is None:
+                page, uses = await self.slot.new_page(), 0
+
+            broken = False
+            try:
+                await page.goto(url, wait_until=self.wait_until, timeout=30000)
+                if self.list_selector:
+                    try:
+                        await page.wait_for_selector(self.list_selector, timeout=self.wait_timeout)
+                    except PlaywrightTimeoutError:
+                        pass  # the router sees the empty list and records the render as useless
+                else:
+                    await page.evaluate(WAIT_FOR_QUIET_JS, [self.quiet_ms, self.wait_timeout])
+                return await page.content()
+            except PlaywrightError as e:
+                print(f"Render failed for {url}: {e}")
+                broken = True
+                return None
+            except Exception:
+                broken = True
+                raise
+            finally:
+                self.slot.record(page, 1)
+                uses += 1
+                if broken or page.is_closed() or (self.page_recycle_after and uses >= self.page_recycle_after):
+                    await self.slot.close_page(page)
+                else:
+                    self.idle.append((page, uses))
+
+    async def close(self):
+        for page, _ in self.idle:
+            await self.slot.close_page(page)
+        self.idle = []
+        if self.slot is not None:
+            await self.slot.close()
+            await self.browser.close()
+            await self.playwright.stop()
+        self.playwright = self.browser = self.slot = None
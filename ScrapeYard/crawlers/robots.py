@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import quote, unquote, urlparse, urlunparse
+from urllib.robotparser import RobotFileParser
+
+import httpx
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+# Unreachable robots.txt (5xx / network error) means "disallow all" (RFC 9309),
+# but only briefly so a flaky server doesn't block the host for a whole day.
+# The download is retried first, like page fetches, so one hiccup doesn't block it at all.
+UNREACHABLE_TTL = 300
+
+
+class _ServerError(Exception):
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+def _origin(url: str) -> str:
+    parts = urlparse(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _robots_path(url: str) -> str:
+    """Normalise a URL's path the same way RobotFileParser.can_fetch does."""
+    parsed = urlparse(unquote(url))
+    path = quote(urlunparse(("", "", parsed.path, parsed.params, parsed.query, parsed.fragment)))
+    return path or "/"
+
+
+def _parser_from(status: int, body: str) -> RobotFileParser:
+    parser = RobotFileParser()
+    if status >= 500:
+        parser.disallow_all = True
+    elif status >= 400:
+        parser.allow_all = True
+    else:
+        parser.parse(body.splitlines())
+    parser.modified()
+    return parser
+
+
+class _HostRobots:
+    """Parsed robots.txt for one origin plus its memoized can_fetch decisions."""
+
+    def __init__(self, parser: RobotFileParser, expires: float):
+        self.parser = parser
+        self.expires = expires
+        self.decisions: dict[tuple[str, str], bool] = {}
+        # Rules are plain prefix matches, so a decision only depends on the
+        # first `prefix_len` characters of the path.
+        rules = [line.path for entry in parser.entries for line in entry.rulelines]
+        if parser.default_entry:
+            rules += [line.path for line in parser.default_entry.rulelines]
+        self.prefix_len = max((len(r) for r in rules), default=0)
+
+    def can_fetch(self, user_agent: str, url: str) -> bool:
+        key = (user_agent, _robots_path(url)[:self.prefix_len])
+        if key not in self.decisions:
+            self.decisions[key] = self.parser.can_fetch(user_agent, url)
+        return self.decisions[key]
+
+
+class RobotsCache:
+    """Lazily fetches robots.txt per origin, cached in memory and on disk with a TTL."""
+
+    def __init__(
+        self,
+        user_agent: str,
+        cache_dir: str | None = ".robots_cache",
+        ttl: float = 86400,
+        on_load=None,
+    ):
+        self.user_agent = user_agent
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.ttl = ttl
+        self.on_load = on_load  # called as on_load(netloc, parser) whenever a host is (re)loaded
+        self.hosts: dict[str, _HostRobots] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        # Same policy as PoliteCrawler.fetch: 3 attempts, exponential backoff from 2s
+        self.attempts = 3
+        self.retry_wait = 2.0
+
+    def _cache_file(self, origin: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(origin.encode()).hexdigest()}.json"
+
+    def _load_from_disk(self, origin: str) -> _HostRobots | None:
+        if not self.cache_dir:
+            return None
+        try:
+            cached = json.loads(self._cache_file(origin).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        expires = cached["fetched_at"] + self.ttl
+        if expires <= time.time():
+            return None
+        return _HostRobots(_parser_from(cached["status"], cached["body"]), expires)
+
+    def _save_to_disk(self, origin: str, status: int, body: str):
+        if not self.cache_dir:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        record = {"origin": origin, "fetched_at": time.time(), "status": status, "body": body}
+        # Worker processes share the directory: each writes its own temp file, then swaps it in
+        with tempfile.NamedTemporaryFile("w", dir=self.cache_dir, suffix=".tmp", delete=False, encoding="utf-8") as tmp:
+            json.dump(record, tmp)
+        os.replace(tmp.name, self._cache_file(origin))
+
+    async def _fetch(self, client: httpx.AsyncClient, origin: str) -> tuple[int, str]:
+        resp = await client.get(f"{origin}/robots.txt", follow_redirects=True)
+        if resp.status_code >= 500:
+            raise _ServerError(resp.status_code)
+        return resp.status_code, resp.text
+
+    async def _download(self, client: httpx.AsyncClient, origin: str) -> _HostRobots:
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(self.attempts),
+            wait=wait_exponential(multiplier=self.retry_wait, min=self.retry_wait, max=5 * self.retry_wait),
+            retry=retry_if_exception_type((httpx.HTTPError, _ServerError)),
+            reraise=True,
+        )
+        try:
+            status, body = await retrying(self._fetch, client, origin)
+        except httpx.HTTPError as e:
+            print(f"robots.txt unreachable for {origin} ({e}); disallowing for now")
+            return _HostRobots(_parser_from(503, ""), time.time() + UNREACHABLE_TTL)
+        except _ServerError as e:
+            print(f"robots.txt for {origin} returned {e.status}; disallowing for now")
+            return _HostRobots(_parser_from(e.status, ""), time.time() + UNREACHABLE_TTL)
+
+        self._save_to_disk(origin, status, body)
+        return _HostRobots(_parser_from(status, body), time.time() + self.ttl)
+
+    async def _host(self, client: httpx.AsyncClient, url: str) -> _HostRobots:
+        origin = _origin(url)
+        host = self.hosts.get(origin)
+        if host and host.expires > time.time():
+            return host
+
+        # One download per origin even when many workers hit a new host at once
+        async with self._locks.setdefault(origin, asyncio.Lock()):
+            host = self.hosts.get(origin)
+            if host and host.expires > time.time():
+                return host
+            host = self._load_from_disk(origin) or await self._download(client, origin)
+            self.hosts[origin] = host
+            if self.on_load:
+                self.on_load(urlparse(origin).netloc, host.parser)
+            return host
+
+    async def get(self, client: httpx.AsyncClient, url: str) -> RobotFileParser:
+        """Return the parsed robots.txt for url's origin, fetching it on first use."""
+        return (await self._host(client, url)).parser
+
+    async def can_fetch(self, client: httpx.AsyncClient, url: str) -> bool:
+        host = await self._host(client, url)
+        return host.can_fetch(self.user_agent, url)
@@ -0,0 +1,110 @@
+import json
+import re
+from pathlib import Path
+
+_REGEX_SYNTAX = re.compile(r"[\\.^$*+?{}\[\]|()]")
+
+
+def _is_literal(rule: str) -> bool:
+    return not _REGEX_SYNTAX.search(rule)
+
+
+def _overlap(a: str, b: str) -> bool:
+    # Could one match of `a` share characters with a match of `b`?
+    if a in b or b in a:
+        return True
+    return any(a.endswith(b[:n]) or b.endswith(a[:n]) for n in range(1, min(len(a), len(b))))
+
+
+def _rule_groups(rules: list[str], ignore_case: bool) -> list[list[int]]:
+    """Split rule indexes into groups that can each share one alternation.
+
+    An alternation lets the first rule claim text that another rule would
+    also match, so literal rules are packed into as few groups as possible
+    with no two able to match overlapping text. A regex may overlap
+    anything, so it gets a group (and a pass) of its own.
+    """
+    key = [rule.lower() if ignore_case else rule for rule in rules]
+    groups = []
+    for i, rule in enumerate(rules):
+        if _is_literal(rule):
+            for group in groups:
+                if _is_literal(rules[group[0]]) and not any(_overlap(key[i], key[j]) for j in group):
+                    group.append(i)
+                    break
+            else:
+                groups.append([i])
+        else:
+            groups.append([i])
+    return groups
+
+
+def _alternation(rules: list[str], indexes: list[int], flags=0):
+    # Each rule is a named group (r<index>), so m.lastgroup tells which one matched
+    return re.compile("|".join(f"(?P<r{i}>{rules[i]})" for i in indexes), flags)
+
+
+class ContentScanner:
+    """Sensitive-keyword and extraction rules, scanned in as few passes as possible.
+
+    Keyword rules are case-insensitive, extraction rules (field -> regex) are
+    not. Literal rules share alternations, read back through named groups,
+    packed so that no two rules in one can match overlapping text; a
+    lowercase literal alternation runs over the lowercased text, which is
+    several times faster than an IGNORECASE scan. Every regex rule gets its
+    own pass, so the results are exactly those of scanning each rule
+    separately.
+    """
+
+    def __init__(self, keywords: list[str], extract: dict[str, str] | None = None, max_positions: int = 20):
+        extract = extract or {}
+        self.keyword_rules = list(keywords)
+        self.extract_fields = list(extract)
+        self.max_positions = max_positions
+
+        # (lowercase pattern or None, IGNORECASE pattern); the latter is also used for
+        # text whose lowercase form has a different length (offsets would shift)
+        self.keyword_passes = []
+        for group in _rule_groups(keywords, ignore_case=True):
+            lowercase = all(_is_literal(keywords[i]) and keywords[i] == keywords[i].lower() for i in group)
+            self.keyword_passes.append((
+                _alternation(keywords, group) if lowercase else None,
+                _alternation(keywords, group, re.IGNORECASE),
+            ))
+        rules = list(extract.values())
+        self.extract_passes = [_alternation(rules, group) for group in _rule_groups(rules, ignore_case=False)]
+
+    @classmethod
+    def from_file(cls, path: str | Path, **kwargs):
+        """Load rules from JSON: {"keywords": [regex, ...], "extract": {field: regex}}."""
+        rules = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(rules.get("keywords", []), rules.get("extract", {}), **kwargs)
+
+    def scan(self, text: str) -> dict:
+        """Return {"keywords": {rule: {"count", "positions"}}, "extract": {field: [unique matches]}}."""
+        keywords = {}
+        lowered = None
+        for lowercase, ignorecase in self.keyword_passes:
+            if lowercase is not None and lowered is None:
+                lowered = text.lower()
+            if lowercase is not None and len(lowered) == len(text):
+                matches = lowercase.finditer(lowered)
+            else:
+                matches = ignorecase.finditer(text)
+            for m in matches:
+                i = int(m.lastgroup[1:])
+                hit = keywords.get(i)
+                if hit is None:
+                    hit = keywords[i] = {"count": 0, "positions": []}
+                hit["count"] += 1
+                if len(hit["positions"]) < self.max_positions:
+                    hit["positions"].append(m.start())
+
+        extracted = {field: {} for field in self.extract_fields}
+        for pattern in self.extract_passes:
+            for m in pattern.finditer(text):
+                extracted[self.extract_fields[int(m.lastgroup[1:])]][m.group()] = None  # ordered set
+
+        # Report keywords in rule order, like the per-pattern scan did
+        ordered = {rule: keywords[i] for i, rule in enumerate(self.keyword_rules) if i in keywords}
+        return {"keywords": ordered, "extract": {field: list(values) for field, values in extracted.items()}}
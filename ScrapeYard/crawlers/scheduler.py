@@ -0,0 +1,112 @@
+import time
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostRateLimiter:
+    """Token bucket for a single host with adaptive backoff.
+
+    Slots are reserved synchronously (tokens may go negative), so concurrent
+    tasks queue up behind each other without needing a lock.
+    """
+
+    def __init__(self, interval: float, burst: int = 1, max_interval: float = 60.0):
+        self.base_interval = interval
+        self.interval = interval
+        self.burst = burst
+        self.max_interval = max_interval
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.latency = None  # EWMA of response latency
+        self.best_latency = None
+        self.adjusted = 0.0  # when the interval last adapted to latency
+
+    def set_base_interval(self, interval: float):
+        """Raise the floor (e.g. from robots.txt Crawl-delay); never lowers it."""
+        if interval > self.base_interval:
+            self.base_interval = interval
+            self.interval = max(self.interval, interval)
+
+    def reserve(self) -> float:
+        """Take a token and return how long the caller must wait before sending."""
+        now = time.monotonic()
+        if self.interval > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) / self.interval)
+        else:
+            self.tokens = self.burst
+        self.updated = now
+        self.tokens -= 1
+        wait = -self.tokens * self.interval if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def record(self, status: int, latency: float, retry_after: float | None = None):
+        """Adapt the request interval to the server's response."""
+        if status in (429, 503):
+            self.interval = min(self.max_interval, max(self.interval * 2, self.base_interval, 1.0))
+            if retry_after is not None:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            return
+
+        self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+        if self.best_latency is None or self.latency < self.best_latency:
+            self.best_latency = self.latency
+
+        # Adapt at most once per round trip: with many requests in flight, every
+        # response would otherwise compound the same slowdown
+        now = time.monotonic()
+        if now - self.adjusted < self.latency:
+            return
+        self.adjusted = now
+
+        if self.latency > 3 * self.best_latency:
+            # Server is slowing down: ease off before it starts refusing us
+            self.interval = min(self.max_interval, max(self.interval * 1.25, self.base_interval, 0.1))
+        elif self.latency <= 1.5 * self.best_latency:
+            # Latencies recovered: speed back up towards the configured rate
+            self.interval = max(self.base_interval, self.interval * 0.8)
+
+
+class PolitenessScheduler:
+    """Keeps one HostRateLimiter per host so a crawl can spread load over many domains."""
+
+    def __init__(self, default_delay: float = 1.0, burst: int = 1, max_delay: float = 60.0):
+        self.default_delay = default_delay
+        self.burst = burst
+        self.max_delay = max_delay
+        self.hosts: dict[str, HostRateLimiter] = {}
+
+    def limiter(self, host: str) -> HostRateLimiter:
+        if host not in self.hosts:
+            self.hosts[host] = HostRateLimiter(self.default_delay, self.burst, self.max_delay)
+        return self.hosts[host]
+
+    def apply_robots(self, host: str, robot_parser, user_agent: str):
+        """Honour Crawl-delay and Request-rate from a parsed robots.txt."""
+        if robot_parser is None:
+            return
+        limiter = self.limiter(host)
+        crawl_delay = robot_parser.crawl_delay(user_agent)
+        if crawl_delay:
+            limiter.set_base_interval(float(crawl_delay))
+        rate = robot_parser.request_rate(user_agent)
+        if rate and rate.requests:
+            limiter.set_base_interval(rate.seconds / rate.requests)
+
+    def reserve(self, host: str) -> float:
+        return self.limiter(host).reserve()
+
+    def record(self, host: str, status: int, latency: float, retry_after: str | None = None):
+        self.limiter(host).record(status, latency, parse_retry_after(retry_after))
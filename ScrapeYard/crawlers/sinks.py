@@ -0,0 +1,464 @@
+import csv
+import gzip
+import io
+import json
+import os
+from pathlib import Path
+
+# Optional zstd compression (pip install zstandard)
+ZSTD_AVAILABLE = False
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    pass
+
+# Optional columnar output (pip install pyarrow)
+PYARROW_AVAILABLE = False
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pass
+
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+class ItemSink:
+    """Incremental record writer: buffers items and writes them in batches.
+
+    Files are rotated after `rotate_items` records or `rotate_bytes`
+    (uncompressed) bytes, and optionally gzip/zstd compressed. Without
+    rotation the output is a single `<stem>.<ext>` file.
+    """
+
+    extension = ""
+
+    def __init__(
+        self,
+        path: str | Path,
+        stem: str = "output",
+        batch_size: int = 500,
+        rotate_items: int | None = None,
+        rotate_bytes: int | None = None,
+        compression: str | None = None,
+    ):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown compression: {compression!r}")
+        if compression == "zstd" and not ZSTD_AVAILABLE:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        self.path = Path(path)
+        self.stem = stem
+        self.batch_size = batch_size
+        self.rotate_items = rotate_items
+        self.rotate_bytes = rotate_bytes
+        self.compression = compression
+        self.buffer = []
+        self.files = []  # every file this sink has written to
+        self.items_written = 0
+        self._file = None
+        self._file_items = 0
+        self._file_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _next_filepath(self) -> Path:
+        suffix = COMPRESSION_SUFFIXES[self.compression]
+        # Parts are numbered when rotating, and for files continued after a sealed checkpoint
+        if self.rotate_items or self.rotate_bytes or self.files:
+            name = f"{self.stem}-{len(self.files):05d}.{self.extension}{suffix}"
+        else:
+            name = f"{self.stem}.{self.extension}{suffix}"
+        return self.path / name
+
+    def _open(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        filepath = self._next_filepath()
+        if self.compression == "gzip":
+            self._file = gzip.open(filepath, "wt", encoding="utf-8", newline="")
+        elif self.compression == "zstd":
+            self._file = zstandard.open(filepath, "wt", encoding="utf-8", newline="")
+        else:
+            self._file = open(filepath, "w", encoding="utf-8", newline="")
+        self.files.append(filepath)
+        self._file_items = 0
+        self._file_bytes = 0
+        self._write_raw(self._header())
+
+    def _close_file(self):
+        if self._file is not None:
+            self._write_raw(self._footer())
+            self._file.close()
+            self._file = None
+
+    def _write_raw(self, text: str):
+        if text:
+            self._file.write(text)
+            self._file_bytes += len(text.encode("utf-8"))
+
+    def _needs_rotation(self) -> bool:
+        if self.rotate_items and self._file_items >= self.rotate_items:
+            return True
+        return bool(self.rotate_bytes and self._file_bytes >= self.rotate_bytes)
+
+    # Format hooks
+    def _header(self) -> str:
+        return ""
+
+    def _footer(self) -> str:
+        return ""
+
+    def _encode(self, item: dict) -> str:
+        raise NotImplementedError
+
+    def write(self, item: dict):
+        """Queue one record; it hits disk once the batch is full."""
+        self.buffer.append(item)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered records and push them to the OS."""
+        for item in self.buffer:
+            if self._file is not None and self._needs_rotation():
+                self._close_file()
+            if self._file is None:
+                self._open()
+            self._write_raw(self._encode(item))
+            self._file_items += 1
+            self.items_written += 1
+        self.buffer.clear()
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        self.flush()
+        if not self.files:
+            self._open()  # always leave an (empty) output file behind
+        self._close_file()
+
+    def checkpoint(self) -> dict:
+        """Make everything written so far durable and return the state needed to resume.
+
+        Plain files are fsynced and resumed by truncating back to the
+        recorded offset. Compressed files can't be cut mid-stream, so the
+        current one is sealed and writing continues in a new part.
+        """
+        self.flush()
+        if self._file is not None:
+            if self.compression:
+                self._close_file()
+            else:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+        return {
+            "files": [str(f) for f in self.files],
+            "items_written": self.items_written,
+            "open": self._file is not None,
+            "file_items": self._file_items,
+            "file_bytes": self._file_bytes,
+        }
+
+    def restore(self, state: dict):
+        """Continue writing after a checkpoint, dropping anything written after it."""
+        self.files = [Path(f) for f in state["files"]]
+        self.items_written = state["items_written"]
+        if state["open"]:
+            filepath = self.files[-1]
+            with open(filepath, "r+b") as f:
+                f.truncate(state["file_bytes"])
+            self._file = open(filepath, "a", encoding="utf-8", newline="")
+            self._file_items = state["file_items"]
+            self._file_bytes = state["file_bytes"]
+
+
+class JSONLSink(ItemSink):
+    extension = "jsonl"
+
+    def _encode(self, item: dict) -> str:
+        return json.dumps(item, ensure_ascii=False) + "\n"
+
+
+class JSONSink(ItemSink):
+    """Writes a JSON array, formatted exactly like json.dump(items, f, indent=...)."""
+
+    extension = "json"
+
+    def __init__(self, path, indent: int | None = 2, **kwargs):
+        super().__init__(path, **kwargs)
+        self.indent = indent
+
+    def _header(self) -> str:
+        return "["
+
+    def _footer(self) -> str:
+        return "\n]" if self._file_items else "]"
+
+    def _encode(self, item: dict) -> str:
+        sep = "," if self._file_items else ""
+        if self.indent is None:
+            return sep + (" " if sep else "") + json.dumps(item, ensure_ascii=False)
+        pad = " " * self.indent
+        body = json.dumps(item, indent=self.indent, ensure_ascii=False).replace("\n", "\n" + pad)
+        return f"{sep}\n{pad}{body}"
+
+
+class CSVSink(ItemSink):
+    """CSV writer; the header comes from `fields` or, failing that, the first record."""
+
+    extension = "csv"
+
+    def __init__(self, path, fields: list[str] | None = None, **kwargs):
+        super().__init__(path, **kwargs)
+        self.fields = list(fields) if fields else None
+        self._row = io.StringIO()
+        self._writer = None
+
+    def _open(self):
+        if self.fields is None and self.buffer:
+            self.fields = list(self.buffer[0].keys())
+        if self.fields and self._writer is None:
+            self._writer = csv.DictWriter(self._row, fieldnames=self.fields)
+        super()._open()
+
+    def _render(self, write):
+        self._row.seek(0)
+        self._row.truncate()
+        write()
+        return self._row.getvalue()
+
+    def _header(self) -> str:
+        return self._render(self._writer.writeheader) if self._writer else ""
+
+    def checkpoint(self) -> dict:
+        return {**super().checkpoint(), "fields": self.fields}
+
+    def restore(self, state: dict):
+        self.fields = state["fields"]
+        if self.fields:
+            self._writer = csv.DictWriter(self._row, fieldnames=self.fields)
+        super().restore(state)
+
+    def _encode(self, item: dict) -> str:
+        return self._render(lambda: self._writer.writerow(item))
+
+
+class ArrowSink(ItemSink):
+    """Columnar sink: each flushed batch becomes one Arrow record batch.
+
+    Writes an Arrow IPC stream (`.arrows`). The schema comes from `schema`
+    ({column: type name}), from `fields` (all strings), or is inferred from
+    the first batch; columns that are all null there become strings.
+    `dictionary_columns` are dictionary-encoded.
+
+    Checkpoints seal the current file only once it holds `seal_items`
+    records; the records in a smaller open file are kept in the checkpoint
+    instead and rewritten on restore, so frequent checkpoints don't leave
+    lots of tiny files behind. Records are only kept once the first
+    checkpoint() (or restore()) has been made; sinks that never checkpoint
+    hold none.
+    """
+
+    extension = "arrows"
+    CODECS = (None, "lz4", "zstd")  # what the IPC format supports
+    TYPES = {
+        "string": "string", "int": "int64", "float": "float64",
+        "bool": "bool_", "timestamp": "timestamp",
+    }
+
+    def __init__(
+        self,
+        path,
+        fields: list[str] | None = None,
+        schema: dict[str, str] | None = None,
+        dictionary_columns: list[str] | None = None,
+        compression: str | None = None,
+        seal_items: int | None = 50_000,
+        **kwargs,
+    ):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError(f"{self.extension} output requires the 'pyarrow' package")
+        if compression not in self.CODECS:
+            raise ValueError(f"Unsupported {self.extension} compression: {compression!r} (use one of {self.CODECS[1:]})")
+        # Compression happens inside the columnar format, not on the file
+        super().__init__(path, **kwargs)
+        self.codec = compression
+        self.seal_items = seal_items
+        self._unsealed = []  # records in the open file, kept until it is sealed
+        self._checkpointing = False  # set by the first checkpoint() or restore()
+        self.dictionary_columns = dictionary_columns
+        self.schema = None
+        if schema:
+            self.schema = pa.schema([(name, self._type(t)) for name, t in schema.items()])
+        elif fields:
+            self.schema = pa.schema([(name, pa.string()) for name in fields])
+        self._writer = None
+
+    @classmethod
+    def _type(cls, name: str):
+        if name not in cls.TYPES:
+            raise ValueError(f"Unknown column type: {name!r}")
+        if name == "timestamp":
+            return pa.timestamp("us")
+        return getattr(pa, cls.TYPES[name])()
+
+    def _file_schema(self):
+        fields = [
+            pa.field(f.name, pa.dictionary(pa.int32(), f.type))
+            if f.name in (self.dictionary_columns or []) else f
+            for f in self.schema
+        ]
+        return pa.schema(fields)
+
+    def _open_writer(self, filepath: Path):
+        options = pa.ipc.IpcWriteOptions(compression=self.codec) if self.codec else None
+        return pa.ipc.new_stream(str(filepath), self._file_schema(), options=options)
+
+    def _open(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        filepath = self._next_filepath()
+        self._writer = self._open_writer(filepath)
+        self.files.append(filepath)
+        self._file_items = 0
+
+    def _close_file(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._unsealed = []
+
+    def _infer_schema(self, rows: list[dict]):
+        # A column with only nulls in the first batch would be typed null and reject any later value
+        schema = pa.Table.from_pylist(rows).schema
+        return pa.schema([pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in schema])
+
+    def _table(self, rows: list[dict]):
+        try:
+            return pa.Table.from_pylist(rows, schema=self.schema)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # e.g. a number in a column inferred as strings: store it as text
+            text = {f.name for f in self.schema if pa.types.is_string(f.type)}
+            rows = [{k: str(v) if k in text and v is not None else v for k, v in row.items()} for row in rows]
+            return pa.Table.from_pylist(rows, schema=self.schema)
+
+    def _needs_rotation(self) -> bool:
+        if self.rotate_items and self._file_items >= self.rotate_items:
+            return True
+        return bool(self.rotate_bytes and self.files[-1].stat().st_size >= self.rotate_bytes)
+
+    def flush(self):
+        """Write the buffered records as one batch (rotation is checked per batch)."""
+        if not self.buffer:
+            return
+        if self.schema is None:
+            self.schema = self._infer_schema(self.buffer)
+        table = self._table(self.buffer)
+        if self._writer is not None and self._needs_rotation():
+            self._close_file()
+        if self._writer is None:
+            self._open()
+        self._writer.write_table(table.cast(self._file_schema()))
+        self._file_items += len(self.buffer)
+        if self._checkpointing and self.seal_items:
+            self._unsealed.extend(self.buffer)
+        self.items_written += len(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        if not self.files and self.schema is not None:
+            self._open()  # always leave an (empty) output file behind
+        self._close_file()
+
+    def checkpoint(self) -> dict:
+        """Return the state to resume from; columnar files can't be appended to once closed.
+
+        A file with seal_items records is sealed. Otherwise it stays open and
+        its records go into the state, to be written again after a restore.
+        """
+        self.flush()
+        if not self._checkpointing:
+            # The open file's earlier records weren't kept, so it can't be left unsealed
+            self._checkpointing = True
+            self._close_file()
+        elif self._writer is not None and (not self.seal_items or self._file_items >= self.seal_items):
+            self._close_file()
+        sealed = self.files if self._writer is None else self.files[:-1]
+        return {
+            "files": [str(f) for f in sealed],
+            "items_written": self.items_written - len(self._unsealed),
+            "schema": self.schema.serialize().to_pybytes() if self.schema is not None else None,
+            "unsealed": list(self._unsealed),
+        }
+
+    def restore(self, state: dict):
+        self.files = [Path(f) for f in state["files"]]
+        self.items_written = state["items_written"]
+        self._checkpointing = True
+        if state["schema"] is not None:
+            self.schema = pa.ipc.read_schema(pa.py_buffer(state["schema"]))
+        # The unsealed file was cut short; its records are rewritten into a new one
+        self.buffer = list(state.get("unsealed", []))
+
+
+class ParquetSink(ArrowSink):
+    """Parquet sink; every flushed batch is written as a row group."""
+
+    extension = "parquet"
+    CODECS = (None, "snappy", "gzip", "brotli", "zstd", "lz4")
+
+    def _file_schema(self):
+        # Parquet dictionary-encodes at the page level instead (see use_dictionary)
+        return self.schema
+
+    def _open_writer(self, filepath: Path):
+        return pq.ParquetWriter(
+            str(filepath),
+            self.schema,
+            compression=self.codec or "snappy",
+            use_dictionary=self.dictionary_columns if self.dictionary_columns is not None else True,
+        )
+
+
+def record_fields(extract_config: dict) -> list[str]:
+    """Column order of the records produced by a crawler's `extract` config."""
+    if extract_config.get("list_selector"):
+        return ["url", *extract_config.get("item_fields", {})]
+    return ["url", *extract_config.get("fields", {})]
+
+
+SINKS = {
+    "jsonl": JSONLSink,
+    "json": JSONSink,
+    "csv": CSVSink,
+    "parquet": ParquetSink,
+    "arrow": ArrowSink,
+}
+
+
+def open_sink(output_config: dict, fields: list[str] | None = None, stem: str = "output") -> ItemSink:
+    """Build the sink described by a crawler's `output` config block."""
+    fmt = output_config["format"]
+    if fmt not in SINKS:
+        raise ValueError(f"Unsupported output format: {fmt!r}")
+    # Columnar formats write one row group / record batch per flush, so batch bigger
+    default_batch = 10_000 if fmt in ("parquet", "arrow") else 500
+    kwargs = {
+        "stem": stem,
+        "batch_size": output_config.get("batch_size", default_batch),
+        "rotate_items": output_config.get("rotate_items"),
+        "rotate_bytes": output_config.get("rotate_bytes"),
+        "compression": output_config.get("compression"),
+    }
+    if fmt in ("csv", "parquet", "arrow"):
+        kwargs["fields"] = output_config.get("fields", fields)
+    if fmt in ("parquet", "arrow"):
+        kwargs["schema"] = output_config.get("schema")
+        kwargs["seal_items"] = output_config.get("seal_items", 50_000)
+        kwargs["dictionary_columns"] = output_config.get("dictionary_columns")
+    return SINKS[fmt](output_config["path"], **kwargs)
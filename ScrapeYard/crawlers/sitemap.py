@@ -0,0 +1,161 @@
+import zlib
+import xml.etree.ElementTree as ET
+from collections import deque
+from datetime import datetime, timezone
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def parse_lastmod(value: str | None) -> datetime | None:
+    """Parse a W3C datetime (the sitemap <lastmod> format); naive values are taken as UTC."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def robots_sitemaps(robots_txt: str) -> list[str]:
+    """The URLs of all `Sitemap:` lines in a robots.txt body."""
+    urls = []
+    for line in robots_txt.splitlines():
+        key, _, value = line.partition(":")
+        if key.strip().lower() == "sitemap" and value.strip():
+            urls.append(value.strip())
+    return urls
+
+
+class SitemapEntry:
+    def __init__(self, loc: str, lastmod: str | None = None):
+        self.loc = loc
+        self.lastmod = lastmod
+        self.modified = parse_lastmod(lastmod)
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+class SitemapStream:
+    """Incremental parser for one <urlset> or <sitemapindex> document.
+
+    Bytes are fed in as they arrive, gzip is detected by its magic number
+    and inflated on the fly, and every finished <url>/<sitemap> element is
+    dropped from the tree, so memory stays flat however large the file is.
+    """
+
+    def __init__(self):
+        self.parser = ET.XMLPullParser(events=("start", "end"))
+        self.head = b""  # first bytes, held back until gzip can be detected
+        self.gunzip = None
+        self.sniffed = False
+        self.root = None
+
+    def feed(self, chunk: bytes) -> list[tuple[str, SitemapEntry]]:
+        """Parse more bytes; returns ("url" | "sitemap", entry) pairs completed so far."""
+        if not self.sniffed:
+            self.head += chunk
+            if len(self.head) < len(GZIP_MAGIC):
+                return []
+            chunk, self.head, self.sniffed = self.head, b"", True
+            if chunk.startswith(GZIP_MAGIC):
+                self.gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self.gunzip is not None:
+            chunk = self.gunzip.decompress(chunk)
+        self.parser.feed(chunk)
+        return self._entries()
+
+    def close(self) -> list[tuple[str, SitemapEntry]]:
+        if self.head:
+            self.sniffed = True
+            self.parser.feed(self.head)
+        if self.gunzip is not None:
+            self.parser.feed(self.gunzip.flush())
+        self.parser.close()
+        return self._entries()
+
+    def _entries(self) -> list[tuple[str, SitemapEntry]]:
+        entries = []
+        for event, elem in self.parser.read_events():
+            if event == "start":
+                if self.root is None:
+                    self.root = elem
+                continue
+            kind = _local(elem.tag)
+            if kind not in ("url", "sitemap"):
+                continue
+            loc = lastmod = None
+            for child in elem:
+                name = _local(child.tag)
+                if name == "loc":
+                    loc = (child.text or "").strip()
+                elif name == "lastmod":
+                    lastmod = (child.text or "").strip()
+            if loc:
+                entries.append((kind, SitemapEntry(loc, lastmod)))
+            self.root.clear()
+        return entries
+
+
+def _route(entries, pending: deque, since: datetime | None):
+    # Yield page entries; queue nested sitemaps for the caller to read next
+    for kind, entry in entries:
+        if since is not None and entry.modified is not None and entry.modified < since:
+            continue  # unchanged since the last crawl (for an index entry: the whole child sitemap)
+        if kind == "sitemap":
+            pending.append(entry.loc)
+        else:
+            yield entry
+
+
+def _since(since) -> datetime | None:
+    return parse_lastmod(since) if isinstance(since, str) else since
+
+
+def iter_sitemap(session, urls, since=None, max_sitemaps: int = 1000, timeout: float = 30):
+    """Lazily yield a SitemapEntry per page, following sitemap indexes (requests.Session).
+
+    `since` (datetime or W3C string) skips entries whose lastmod is older.
+    """
+    since = _since(since)
+    pending, seen = deque(urls), set()
+    while pending and len(seen) < max_sitemaps:
+        url = pending.popleft()
+        if url in seen:
+            continue
+        seen.add(url)
+        stream = SitemapStream()
+        try:
+            with session.get(url, stream=True, timeout=timeout) as resp:
+                if resp.status_code != 200:
+                    continue
+                for chunk in resp.iter_content(64 * 1024):
+                    yield from _route(stream.feed(chunk), pending, since)
+                yield from _route(stream.close(), pending, since)
+        except Exception as e:
+            print(f"Skipping sitemap {url}: {e}")
+
+
+async def aiter_sitemap(client, urls, since=None, max_sitemaps: int = 1000):
+    """Async version of iter_sitemap for an httpx.AsyncClient."""
+    since = _since(since)
+    pending, seen = deque(urls), set()
+    while pending and len(seen) < max_sitemaps:
+        url = pending.popleft()
+        if url in seen:
+            continue
+        seen.add(url)
+        stream = SitemapStream()
+        try:
+            async with client.stream("GET", url) as resp:
+                if resp.status_code != 200:
+                    continue
+                async for chunk in resp.aiter_bytes():
+                    for entry in _route(stream.feed(chunk), pending, since):
+                        yield entry
+                for entry in _route(stream.close(), pending, since):
+                    yield entry
+        except Exception as e:
+            print(f"Skipping sitemap {url}: {e}")
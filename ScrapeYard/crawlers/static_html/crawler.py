@@ -1,28 +1,162 @@
 import asyncio
+import hashlib
+import json
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
-from ..utils import PoliteCrawler, write_items
+from ..checkpoint import CheckpointStore
+from ..distributed import SharedFrontier, open_store
+from ..frontier import AsyncURLFrontier, make_seen_set
+from ..httpcache import HTTPCache
+from ..metrics import Metrics
+from ..parsing import ExtractionPlan, get_backend
+from ..render import PLAYWRIGHT_AVAILABLE, HeadlessRenderer, RenderRouter
+from ..sinks import open_sink, record_fields
+from ..sitemap import aiter_sitemap
+from ..utils import PoliteCrawler
 
 
-class StaticHTMLCrawler:
+class PageParser:
+    """Turns one HTML body into extracted records plus outgoing links.
+
+    Holds no crawl state, so it can run in the crawler process or in a
+    process-pool worker.
+    """
+
     def __init__(self, config: dict):
+        # Compile the extract config once; pages then only pay for selector matching
+        self.parser = get_backend(config.get("parser", "html.parser"))
+        self.plan = ExtractionPlan(config.get("extract", {}), self.parser)
+        paginate = config.get("paginate", {})
+        next_selector = paginate.get("next_selector") if paginate.get("type") == "next" else None
+        self.next_selector = self.parser.compile(next_selector) if next_selector else None
+
+    def __call__(self, html: str, url: str) -> tuple[list[dict], list[str]]:
+        records, links, _ = self.parse_timed(html, url)
+        return records, links
+
+    def parse_timed(self, html: str, url: str) -> tuple[list[dict], list[str], dict]:
+        """Like calling the parser, plus {"parse": s, "extract": s} timings."""
+        started = time.perf_counter()
+        doc = self.parser.parse(html)
+        parsed = time.perf_counter()
+        records = self.plan.extract(doc, url)
+        links = []
+
+        # Handle "Next" pagination if configured
+        if self.next_selector is not None:
+            next_el = self.parser.select_one(doc, self.next_selector)
+            href = self.parser.attr(next_el, "href") if next_el is not None else None
+            if href:
+                links.append(urljoin(url, href))
+
+        # Discover internal links (only for page-level extraction)
+        if self.plan.list_selector is None:
+            links.extend(urljoin(url, href) for href in self.plan.links(doc))
+
+        return records, links, {"parse": parsed - started, "extract": time.perf_counter() - parsed}
+
+
+# Per-process PageParser used by the parse pool workers
+_worker_parser = None
+
+
+def _init_parse_worker(config: dict):
+    global _worker_parser
+    _worker_parser = PageParser(config)
+
+
+def _parse_in_worker(html: str, url: str) -> tuple[list[dict], list[str], dict]:
+    return _worker_parser.parse_timed(html, url)
+
+
+class StaticHTMLCrawler:
+    def __init__(self, config: dict, resume: bool = False):
         self.config = config
+        self.resume = resume
+        # Stage timings and counters; config "metrics" adds a JSON dump, a Prometheus endpoint and hooks
+        self.metrics = Metrics()
         self.polite = PoliteCrawler(
             domain=config["domain"],
             user_agent=config.get("user_agent", "ScrapeYard (+https://github.com/scrapyard)"),
-            delay=1.0
+            delay=config.get("delay", 1.0),
+            cache=HTTPCache(**config["cache"]) if config.get("cache") else None,
+            metrics=self.metrics,
+            **config.get("http", {})
         )
-        self.visited = set()
-        self.queue = list(config["start_urls"])
-        self.items = []
+        self.domains = {config["domain"], *config.get("allowed_domains", [])}
+        self.concurrency = max(1, int(config.get("concurrency", 1)))
+        self.in_flight = set()
+        self.pages = 0
+
+        # Distributed mode: several worker processes share one frontier store,
+        # each crawling the hosts that hash to it and writing its own output files
+        distributed = config.get("distributed")
+        self.worker_id = None
+        self.output_stem = "output"
+        self.unacked = []  # crawled pages whose records may not be on disk yet
+        # A local frontier never hands out a URL twice; a shared one redelivers
+        # expired leases, so workers remember what they crawled (same seen-set kind)
+        self.crawled = None
+        if distributed:
+            self.worker_id = distributed.get("worker_id") or f"{socket.gethostname()}-{os.getpid()}"
+            self.output_stem = f"output-{self.worker_id}-{int(time.time())}"  # a restarted worker never overwrites
+            self.ack_interval = distributed.get("ack_interval", 10)
+            self.crawled = make_seen_set(config.get("frontier"))
+            store = open_store(distributed, Path(config["output"]["path"]) / "frontier.sqlite3")
+            self.queue = SharedFrontier(
+                store, self.worker_id, {**config.get("frontier", {}), **distributed}, config.get("max_pages", 100)
+            )
+        else:
+            self.queue = AsyncURLFrontier(config.get("frontier"))
+        for url in config["start_urls"]:
+            self.queue.add(url)
+
+        # Optional sitemap seed source, streamed into the frontier while the crawl runs
+        self.sitemap = config.get("sitemap")
+
+        self.page_parser = PageParser(config)
+
+        # Hybrid rendering: pages whose static HTML looks client-rendered are
+        # re-loaded in a headless browser, within render.budget per crawl
+        render = config.get("render", {})
+        self.router = self.renderer = None
+        if render.get("mode", "static") == "hybrid":
+            if PLAYWRIGHT_AVAILABLE:
+                self.router = RenderRouter(render)
+                self.renderer = HeadlessRenderer(render, config.get("extract", {}).get("list_selector"))
+            else:
+                print("Hybrid rendering needs the 'playwright' package; crawling static only")
+        # Cached extraction results are only reused while these settings are unchanged
+        self.extract_hash = hashlib.sha1(json.dumps(
+            [config.get("parser"), config.get("extract"), config.get("paginate")], sort_keys=True
+        ).encode()).hexdigest()
+
+        # Optional process pool for parsing; parse_queue bounds the bodies waiting on it
+        self.parse_workers = int(config.get("parse_workers", 0))
+        self.parse_pool = None
+        self.parse_slots = asyncio.Semaphore(config.get("parse_queue", 2 * max(1, self.parse_workers)))
+
+        # Records are streamed to disk as they are extracted
+        self.sink = open_sink(config["output"], fields=record_fields(config.get("extract", {})), stem=self.output_stem)
+
+        # Periodic checkpoints of frontier, page count and sink offsets (set "checkpoint": false to disable).
+        # A shared frontier store is durable itself: restarting the workers continues the crawl.
+        checkpoint = config.get("checkpoint", {})
+        self.checkpoints = None
+        if checkpoint is not False and not distributed:
+            default_path = Path(config["output"]["path"]) / ".checkpoint.sqlite3"
+            self.checkpoints = CheckpointStore(checkpoint.get("path", default_path))
+            self.checkpoint_interval = checkpoint.get("interval", 60)
 
     def _should_follow(self, url: str) -> bool:
         """Check if a URL should be crawled based on domain and allow/deny rules."""
         if not url.startswith(("http://", "https://")):
             return False
-        if urlparse(url).netloc != self.config["domain"]:
-            return False
-        if url in self.visited:
+        if urlparse(url).netloc not in self.domains:
             return False
 
         # Skip if any deny pattern matches
@@ -37,82 +171,246 @@ class StaticHTMLCrawler:
 
         return True
 
-    def _extract_items(self, soup: BeautifulSoup, base_url: str):
-        """Extract structured data — either a single record or a list of items."""
-        extract_config = self.config.get("extract", {})
-        list_selector = extract_config.get("list_selector")
-
-        if list_selector:
-            # Extract multiple items (e.g., quotes, products)
-            items = soup.select(list_selector)
-            for item in items:
-                record = {"url": base_url}
-                item_fields = extract_config.get("item_fields", {})
-                for key, selector in item_fields.items():
-                    if selector == "":
-                        el = item  # Use the element itself
-                    elif selector.startswith("next+"):
-                        # Get the next sibling of a given tag (e.g., "next+p")
-                        tag_name = selector.split("+", 1)[1]
-                        el = item.find_next_sibling(tag_name)
-                    else:
-                        el = item.select_one(selector)
-                    record[key] = el.get_text(strip=True) if el else None
-                self.items.append(record)
+    async def _parse(self, html: str, url: str) -> tuple[list[dict], list[str]]:
+        """Parse inline, or in the process pool when parse_workers is set."""
+        if self.parse_pool is None:
+            records, links, timings = self.page_parser.parse_timed(html, url)
+        else:
+            async with self.parse_slots:
+                loop = asyncio.get_running_loop()
+                with self.metrics.timer("parse_queue"):
+                    records, links, timings = await loop.run_in_executor(self.parse_pool, _parse_in_worker, html, url)
+        for stage, seconds in timings.items():
+            self.metrics.observe(stage, seconds)
+        return records, links
+
+    def _needs_render(self, html: str, records: list[dict]) -> str | None:
+        items = len(records) if self.page_parser.plan.list_selector is not None else None
+        return self.router.check(html, items)
+
+    async def _render(self, url: str, reason: str | None = None) -> tuple[list[dict], list[str]] | None:
+        """Render a page headlessly and parse it; None if the renderer failed.
+
+        The render counts as having helped if the page no longer shows the
+        symptom (`reason`) that got it escalated.
+        """
+        wait_time = self.polite.scheduler.reserve(urlparse(url).netloc)
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+        with self.metrics.timer("render"):
+            html = await self.renderer.render(url)
+        self.metrics.inc("renders", ok=html is not None)
+        if html is None:
+            return None
+        records, links = await self._parse(html, url)
+        still = self._needs_render(html, records)
+        self.router.record_render(url, still is None or (reason is not None and still != reason))
+        return records, links
+
+    async def _process(self, url: str):
+        """Fetch a single page, extract its data and enqueue discovered links."""
+        rendered = None
+        if self.router is not None and self.router.render_first(url):
+            # Pages like this one always needed JavaScript: skip the plain fetch
+            if not await self.polite.can_fetch(url):
+                raise PermissionError(f"robots.txt disallows {url}")
+            print(f"Crawling (rendered): {url}")
+            rendered = await self._render(url)
+
+        if rendered is not None:
+            records, links = rendered
         else:
-            # Extract a single page-level record
-            record = {"url": base_url}
-            page_fields = extract_config.get("fields", {})
-            for key, selector in page_fields.items():
-                if selector.startswith("next+"):
-                    tag_name = selector.split("+", 1)[1]
-                    first_el = soup.find(tag_name)
-                    el = first_el.find_next_sibling(tag_name) if first_el else None
-                else:
-                    el = soup.select_one(selector)
-                record[key] = el.get_text(strip=True) if el else None
-            self.items.append(record)
+            print(f"Crawling: {url}")
+            resp = await self.polite.fetch(url)
+
+            entry = resp.extensions.get("cache_entry")
+            if entry and entry.extract_hash == self.extract_hash and entry.results:
+                # Page unchanged since the last run: reuse what we extracted then
+                records, links = entry.results
+            else:
+                records, links = await self._parse(resp.text, url)
+                if self.router is not None:
+                    reason = self._needs_render(resp.text, records)
+                    if self.router.escalate(url, reason):
+                        print(f"Rendering ({reason}): {url}")
+                        rendered = await self._render(url, reason)
+                        if rendered is not None:
+                            records, links = rendered
+                if self.polite.cache is not None:
+                    await asyncio.to_thread(
+                        self.polite.cache.store_results, url, self.extract_hash, [records, links]
+                    )
+
+        with self.metrics.timer("sink_write"):
+            for record in records:
+                self.sink.write(record)
+        self.metrics.inc("items", len(records))
+        self.queue.add_many(link for link in links if self._should_follow(link))
+
+    async def _worker(self, max_pages: int):
+        """Pull URLs from the shared frontier until the crawl is cancelled."""
+        while True:
+            url = await self.queue.get()
+            try:
+                # Claim a page slot up front so concurrent workers never exceed max_pages
+                repeat = self.crawled is not None and url in self.crawled
+                if repeat or self.pages >= max_pages:
+                    if self.worker_id is not None:
+                        # A redelivered page we already crawled, or one over the cap for another worker
+                        if repeat:
+                            self.unacked.append(url)
+                        else:
+                            self.queue.release(url)
+                    continue
+                if self.crawled is not None:
+                    self.crawled.add(url)
+                self.in_flight.add(url)
+                self.pages += 1
+
+                self.metrics.set("queue_depth", len(self.queue))
+                self.metrics.set("in_flight", len(self.in_flight))
+
+                try:
+                    with self.metrics.timer("page"):
+                        await self._process(url)
+                    self.metrics.inc("pages")
+                    if self.worker_id is not None:
+                        self.unacked.append(url)
+                except Exception as e:
+                    self.pages -= 1
+                    self.metrics.inc("page_errors", error=type(e).__name__)
+                    print(f"Error at {url}: {e}")
+                    if self.worker_id is not None:
+                        self.queue.fail(url)
+                # Not reached on cancellation, so an interrupted URL stays in-flight for the checkpoint
+                self.in_flight.discard(url)
+            finally:
+                self.queue.task_done()
+
+    def _checkpoint(self):
+        """Persist crawl state; in-flight pages are rolled back so a resume refetches them."""
+        with self.metrics.timer("checkpoint"):
+            self.checkpoints.save({
+                "frontier": self.queue.snapshot(in_flight=self.in_flight),
+                "pages": self.pages - len(self.in_flight),
+                "sink": self.sink.checkpoint(),
+                "router": self.router.state() if self.router is not None else None,
+            })
+
+    def _restore(self) -> bool:
+        state = self.checkpoints.load() if self.checkpoints is not None else None
+        if not state:
+            return False
+        self.queue.restore(state["frontier"])
+        self.pages = state["pages"]
+        self.sink.restore(state["sink"])
+        if self.router is not None and state.get("router"):
+            self.router.restore(state["router"])
+        print(f"Resuming: {self.pages} pages done, {len(self.queue)} queued")
+        return True
+
+    async def _seed_from_sitemaps(self, max_pages: int):
+        """Stream sitemap URLs into the frontier, keeping at most sitemap.backlog of them queued."""
+        client = self.polite.client
+        urls = list(self.sitemap.get("urls", []))
+        if self.sitemap.get("robots", True):
+            for start_url in self.config["start_urls"]:
+                robots = await self.polite.robots.get(client, start_url)
+                urls.extend(robots.site_maps() or [])
+
+        backlog = self.sitemap.get("backlog", 1000)
+        entries = aiter_sitemap(client, urls, since=self.sitemap.get("since"),
+                                max_sitemaps=self.sitemap.get("max_sitemaps", 1000))
+        try:
+            async for entry in entries:
+                if self.pages >= max_pages:
+                    break
+                # Same rules as discovered links (domains, follow_allow / follow_deny)
+                if self._should_follow(entry.loc):
+                    self.queue.add(entry.loc)
+                while len(self.queue) >= backlog and self.pages < max_pages:
+                    await asyncio.sleep(0.1)
+        except Exception as e:
+            print(f"Sitemap seeding stopped: {e}")
+        finally:
+            await entries.aclose()
+
+    def _ack(self):
+        """Make the records written so far durable, then ack their pages in the shared frontier."""
+        urls, self.unacked = self.unacked, []
+        if urls:
+            self.sink.checkpoint()
+            self.queue.ack(urls)
+
+    async def _ack_loop(self):
+        while True:
+            await asyncio.sleep(self.ack_interval)
+            self._ack()
+            await self.queue.sync()
+
+    async def _checkpoint_loop(self):
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            self._checkpoint()
 
     async def crawl(self):
-        """Run the crawl loop: fetch pages, extract data, follow links."""
-        pages = 0
+        """Run the crawl loop: N workers fetch pages, extract data and follow links."""
         max_pages = self.config.get("max_pages", 100)
 
-        while self.queue and pages < max_pages:
-            url = self.queue.pop(0)
-            if url in self.visited:
-                continue
-            self.visited.add(url)
+        if self.parse_workers > 0:
+            self.parse_pool = ProcessPoolExecutor(
+                max_workers=self.parse_workers,
+                initializer=_init_parse_worker,
+                initargs=(self.config,),
+            )
 
-            try:
-                print(f"Crawling: {url}")
-                resp = await self.polite.fetch(url)
-                soup = BeautifulSoup(resp.text, "html.parser")
-
-                self._extract_items(soup, url)
-
-                # Handle "Next" pagination if configured
-                paginate = self.config.get("paginate", {})
-                if paginate.get("type") == "next":
-                    next_selector = paginate.get("next_selector")
-                    if next_selector:
-                        next_el = soup.select_one(next_selector)
-                        if next_el and next_el.get("href"):
-                            next_url = urljoin(url, next_el["href"])
-                            if self._should_follow(next_url):
-                                self.queue.append(next_url)
-
-                # Discover internal links (only for page-level extraction)
-                if not self.config.get("extract", {}).get("list_selector"):
-                    for link in soup.find_all("a", href=True):
-                        full_url = urljoin(url, link["href"])
-                        if self._should_follow(full_url):
-                            self.queue.append(full_url)
-
-                pages += 1
-
-            except Exception as e:
-                print(f"Error at {url}: {e}")
-                continue
-
-        await write_items(self.items, self.config["output"])
\ No newline at end of file
+        stats_name = f"stats-{self.worker_id}.json" if self.worker_id is not None else "stats.json"
+        self.metrics.start(self.config.get("metrics"), Path(self.config["output"]["path"]) / stats_name)
+        try:
+            await self._run_workers(max_pages)
+        finally:
+            self.metrics.close()
+            if self.parse_pool is not None:
+                self.parse_pool.shutdown(cancel_futures=True)
+                self.parse_pool = None
+            if self.renderer is not None:
+                await self.renderer.close()
+                print(f"Rendered {self.router.renders} pages (budget {self.router.budget})")
+
+    async def _run_workers(self, max_pages: int):
+        if self.resume and self.worker_id is None and not self._restore():
+            print("No checkpoint found; starting a fresh crawl")
+
+        with self.sink:
+            async with self.polite:
+                tasks = [asyncio.create_task(self._worker(max_pages)) for _ in range(self.concurrency)]
+                if self.checkpoints is not None:
+                    tasks.append(asyncio.create_task(self._checkpoint_loop()))
+                if self.worker_id is not None:
+                    tasks.append(asyncio.create_task(self.queue.keepalive()))
+                    tasks.append(asyncio.create_task(self._ack_loop()))
+                finished = False
+                try:
+                    if self.sitemap:
+                        # Seed first: the queue may run dry while the next sitemap chunk downloads
+                        await self._seed_from_sitemaps(max_pages)
+                    # Workers drain the queue once max_pages is reached, so join() always returns
+                    await self.queue.join()
+                    finished = True
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    if self.worker_id is not None:
+                        self._ack()
+                        await self.queue.sync()
+                        print(f"Worker {self.worker_id}: {self.pages} pages; shared frontier {await self.queue.counts()}")
+                        # Hand back unfinished leases so other workers pick them up right away
+                        await self.queue.close()
+                    if self.checkpoints is not None:
+                        # Interrupted (Ctrl-C, error): save where we stopped. Done: nothing to resume.
+                        if finished:
+                            self.checkpoints.discard()
+                        else:
+                            self._checkpoint()
+                            self.checkpoints.close()
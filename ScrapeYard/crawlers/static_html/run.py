@@ -1,22 +1,55 @@
 # ScrapeYard/crawlers/static_html/run.py
 import asyncio
+import multiprocessing as mp
+import socket
 import sys
 import json
 from pathlib import Path
 from .crawler import StaticHTMLCrawler
 
 
-async def main(): 
+def run_crawler(config: dict, resume: bool = False):
+    crawler = StaticHTMLCrawler(config, resume=resume)
+    asyncio.run(crawler.crawl())
+
+
+def run_workers(config: dict, workers: int):
+    """Crawl with several worker processes sharing the frontier in config["distributed"].
+
+    Start the same command on other machines to add workers there; worker ids
+    are "<hostname>-<n>", so they stay unique across hosts.
+    """
+    distributed = config.setdefault("distributed", {})
+    processes = []
+    for n in range(workers):
+        worker_config = {**config, "distributed": {**distributed, "worker_id": f"{socket.gethostname()}-{n}"}}
+        process = mp.Process(target=run_crawler, args=(worker_config,), name=f"crawler-{n}")
+        process.start()
+        processes.append(process)
+    for process in processes:
+        process.join()
+    failed = [p.name for p in processes if p.exitcode != 0]
+    if failed:
+        print(f"Workers exited with errors: {', '.join(failed)}")
+
+
+def main():
      # Set the default config file to be in the same directory as this script
     default_config = Path(__file__).parent / "config.json"
 
-    if len(sys.argv) == 1:
+    # --resume picks up from the last checkpoint instead of starting over
+    # --workers=N crawls with N processes over a shared frontier (see "distributed" in the config)
+    options = dict(a[2:].split("=", 1) for a in sys.argv[1:] if a.startswith("--") and "=" in a)
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    resume = "--resume" in sys.argv[1:]
+
+    if len(args) == 0:
         config_path = default_config
         print(f"Using default config: {config_path}")
-    elif len(sys.argv) == 2:
-        config_path = Path(sys.argv[1])
+    elif len(args) == 1:
+        config_path = Path(args[0])
     else:
-        print("Usage: python -m crawlers.static_html.run [config.json]")
+        print("Usage: python -m crawlers.static_html.run [config.json] [--resume] [--workers=N]")
         sys.exit(1)
 
     if not config_path.exists():
@@ -24,9 +57,12 @@ async def main():
         sys.exit(1)
     #JSON config load here!!
     config = json.loads(config_path.read_text())
-    crawler = StaticHTMLCrawler(config)
-    await crawler.crawl()
+    workers = int(options.get("workers", 1))
+    if workers > 1:
+        run_workers(config, workers)
+    else:
+        run_crawler(config, resume)
     print(f"Done! Output saved to: {config['output']['path']}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    main()
@@ -0,0 +1,172 @@
+import asyncio
+import json
+from pathlib import Path
+
+import crawlers.static_html.crawler as static_crawler
+from crawlers.bench.site import SyntheticSite
+from crawlers.checkpoint import CheckpointStore
+from crawlers.frontier import BloomFilter
+from crawlers.static_html.crawler import StaticHTMLCrawler
+
+
+def _config(base: str, tmp_path: Path, **overrides) -> dict:
+    config = {
+        "domain": base.removeprefix("http://"),
+        "start_urls": [f"{base}/p/0"],
+        "max_pages": 10,
+        "concurrency": 4,
+        "delay": 0,
+        "paginate": {"type": "next", "next_selector": "a.next"},
+        "extract": {"list_selector": ".item", "item_fields": {"title": ".title", "price": ".price"}},
+        "http": {"robots_cache_dir": None},
+        "output": {"format": "jsonl", "path": str(tmp_path / "out")},
+    }
+    config.update(overrides)
+    return config
+
+
+def _crawl(config: dict) -> StaticHTMLCrawler:
+    crawler = StaticHTMLCrawler(config)
+    asyncio.run(crawler.crawl())
+    return crawler
+
+
+def _records(tmp_path: Path) -> list[dict]:
+    return [json.loads(line) for f in sorted((tmp_path / "out").glob("output*.jsonl")) for line in f.open()]
+
+
+def test_list_crawl_follows_pagination(synthetic_site, tmp_path):
+    site, base = synthetic_site(pages=30, list_size=5)
+    crawler = _crawl(_config(base, tmp_path))
+
+    records = _records(tmp_path)
+    assert crawler.pages == 10
+    assert len(records) == 50
+    assert {r["url"] for r in records} == {f"{base}/p/{n}" for n in range(10)}
+    assert records[0] == {"url": f"{base}/p/0", "title": "Item 0-0", "price": "0.99"}
+    assert not (tmp_path / "out" / ".checkpoint.sqlite3").exists()  # finished crawls leave no checkpoint
+
+
+def test_resume_with_a_bloom_seen_set(synthetic_site, tmp_path):
+    site, base = synthetic_site(pages=30, list_size=1)
+    config = _config(base, tmp_path, concurrency=1, frontier={"seen": "bloom", "capacity": 1000})
+    crawler = StaticHTMLCrawler(config)
+
+    async def interrupted():
+        async with crawler.polite:
+            for _ in range(4):
+                url = await crawler.queue.get()
+                crawler.pages += 1
+                await crawler._process(url)
+                crawler.queue.task_done()
+        crawler._checkpoint()
+        crawler.checkpoints.close()
+
+    asyncio.run(interrupted())
+    state = CheckpointStore(tmp_path / "out" / ".checkpoint.sqlite3").load()
+    # The checkpoint holds the frontier's bounded seen set, not a set of URL strings
+    assert isinstance(state["frontier"]["seen"], BloomFilter)
+    assert set(state) == {"frontier", "pages", "sink", "router"}
+
+    crawler = StaticHTMLCrawler(config, resume=True)
+    asyncio.run(crawler.crawl())
+    assert [r["url"] for r in _records(tmp_path)] == [f"{base}/p/{n}" for n in range(10)]
+    assert sum(path.startswith("/p/") for path, _ in site.requests) == 10
+
+
+def test_disallowed_pages_are_skipped(synthetic_site, tmp_path):
+    site, base = synthetic_site(pages=5)
+    _crawl(_config(base, tmp_path, start_urls=[f"{base}/private/1", f"{base}/p/4"], paginate={}))
+    assert {r["url"] for r in _records(tmp_path)} == {f"{base}/p/4"}
+    assert not any(path.startswith("/private/") for path, _ in site.requests)
+
+
+def test_sitemap_entries_follow_allow_and_deny(synthetic_site, tmp_path):
+    site, base = synthetic_site(pages=30)
+    _crawl(_config(
+        base, tmp_path, start_urls=[f"{base}/p/1"], max_pages=100, paginate={},
+        extract={"fields": {"title": "h1"}}, sitemap={"robots": True},
+        follow_allow=["/p/1"], follow_deny=["/p/15"],
+    ))
+    crawled = {r["url"] for r in _records(tmp_path)}
+    assert crawled == {f"{base}/p/{n}" for n in [1, *range(10, 15), *range(16, 20)]}
+
+
+def test_unchanged_pages_reuse_cached_results(synthetic_site, tmp_path):
+    site, base = synthetic_site(pages=10, list_size=3, etag=True)
+    config = _config(base, tmp_path, cache={"path": str(tmp_path / "cache.sqlite3")})
+    _crawl(config)
+    first = _records(tmp_path)
+
+    _crawl(config)
+    assert _records(tmp_path) == first
+    statuses = [status for path, status in site.requests if path.startswith("/p/")]
+    assert statuses == [200] * 10 + [304] * 10
+
+
+class FakeRenderer:
+    """Stands in for HeadlessRenderer: "renders" pages from a site whose lists are filled in."""
+
+    instances = []
+
+    def __init__(self, config: dict, list_selector=None):
+        self.list_selector = list_selector
+        self.rendered = []
+        self.full_site = SyntheticSite(pages=30, list_size=3)
+        FakeRenderer.instances.append(self)
+
+    async def render(self, url: str) -> str | None:
+        self.rendered.append(url)
+        return self.full_site.page(int(url.rsplit("/", 1)[1]))
+
+    async def close(self):
+        pass
+
+
+def test_hybrid_rendering_escalates_empty_lists(synthetic_site, tmp_path, monkeypatch):
+    # Static HTML without the list items, as a client-rendered site would serve it
+    site, base = synthetic_site(pages=30, list_size=0)
+    monkeypatch.setattr(static_crawler, "PLAYWRIGHT_AVAILABLE", True)
+    monkeypatch.setattr(static_crawler, "HeadlessRenderer", FakeRenderer)
+    FakeRenderer.instances = []
+
+    crawler = _crawl(_config(base, tmp_path, concurrency=1, render={"mode": "hybrid", "learn_after": 3}))
+
+    renderer = FakeRenderer.instances[0]
+    # The renderer waits for the raw CSS selector, not the backend's compiled form
+    assert renderer.list_selector == ".item"
+    assert len(renderer.rendered) == 10
+    assert len(_records(tmp_path)) == 30
+    # After three helpful renders the pattern is rendered without a static fetch first
+    static_fetches = [path for path, _ in site.requests if path.startswith("/p/")]
+    assert static_fetches == [f"/p/{n}" for n in range(3)]
+    assert crawler.router.renders == 10
+
+
+def test_distributed_workers_split_hosts(synthetic_site, tmp_path):
+    site, base = synthetic_site(host="0.0.0.0", pages=10, fanout=3)
+    port = base.rsplit(":", 1)[1]
+    hosts = [f"127.0.0.{n}:{port}" for n in range(1, 5)]
+
+    def worker_config(worker_id):
+        return _config(
+            base, tmp_path, max_pages=100, paginate={}, extract={"fields": {"title": "h1"}},
+            allowed_domains=hosts, start_urls=[f"http://{host}/p/0" for host in hosts],
+            distributed={"worker_id": worker_id, "poll": 0.05, "ack_interval": 0.2, "lease_seconds": 5},
+        )
+
+    async def run():
+        crawlers = [StaticHTMLCrawler(worker_config(worker_id)) for worker_id in ("w1", "w2")]
+        await asyncio.gather(*(crawler.crawl() for crawler in crawlers))
+        return crawlers
+
+    first, second = asyncio.run(run())
+    out = tmp_path / "out"
+    by_worker = {
+        worker: {json.loads(line)["url"] for f in out.glob(f"output-{worker}-*.jsonl") for line in f.open()}
+        for worker in ("w1", "w2")
+    }
+    assert first.pages + second.pages == 40
+    assert by_worker["w1"] | by_worker["w2"] == {f"http://{host}/p/{n}" for host in hosts for n in range(10)}
+    assert by_worker["w1"] and by_worker["w2"]
+    assert not by_worker["w1"] & by_worker["w2"]
@@ -0,0 +1,15 @@
+from .checkpoint import CheckpointStore
+
+
+def test_checkpoint_store_round_trip(tmp_path):
+    path = tmp_path / "state" / ".checkpoint.sqlite3"
+    store = CheckpointStore(path)
+    assert store.load() is None
+    store.save({"visited": {"a"}, "pending": ["b"]})
+    store.save({"visited": {"a", "b"}, "pending": []})
+    store.close()
+
+    store = CheckpointStore(path)
+    assert store.load() == {"visited": {"a", "b"}, "pending": []}
+    store.discard()
+    assert not path.exists()
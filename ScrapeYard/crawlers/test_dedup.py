@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from .dedup import ContentFingerprints, hamming, simhash
+
+WORDS = "alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu nu xi omicron pi rho sigma tau".split()
+
+
+def _text(seed: int, words: int = 400) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _flip(bits: int, positions) -> int:
+    for p in positions:
+        bits ^= 1 << p
+    return bits
+
+
+def test_simhash_is_stable_and_locality_sensitive():
+    text = _text(1)
+    assert simhash(text) == simhash(text.upper())
+    edited = text.replace(text.split()[200], "changed", 1)
+    assert hamming(simhash(text), simhash(edited)) < hamming(simhash(text), simhash(_text(2)))
+
+
+def test_exact_duplicate():
+    fingerprints = ContentFingerprints()
+    text = _text(1)
+    assert fingerprints.add("a", fingerprints.fingerprint(text)) is None
+    # Whitespace and case don't matter
+    assert fingerprints.add("b", fingerprints.fingerprint("  " + text.upper() + "\n")) == "a"
+    assert fingerprints.add("c", fingerprints.fingerprint(_text(2))) is None
+
+
+@pytest.mark.parametrize("max_distance", [0, 3, 6])
+def test_near_duplicate_threshold(max_distance):
+    base = 0x0123456789ABCDEF
+    rng = random.Random(max_distance)
+    for distance in range(max_distance + 3):
+        for _ in range(20):
+            fingerprints = ContentFingerprints(max_distance)
+            fingerprints.add("base", ("base", base))
+            bits = _flip(base, rng.sample(range(64), distance))
+            expected = "base" if distance <= max_distance else None
+            assert fingerprints.add("other", ("other", bits)) == expected
@@ -0,0 +1,155 @@
+import asyncio
+import random
+import time
+
+from .distributed import HashRing, SharedFrontier, SQLiteFrontierStore, host_hash, open_store
+
+
+def _urls(hosts: int, per_host: int) -> list[str]:
+    return [f"http://host{h}.test/p/{n}" for h in range(hosts) for n in range(per_host)]
+
+
+def test_hash_ring_ranges_match_owner():
+    ring = HashRing(["w1", "w2", "w3"], replicas=8)
+    rng = random.Random(0)
+    positions = [rng.randrange(2**63) for _ in range(2000)] + [0, 2**63 - 1, ring.points[0][0]]
+    for position in positions:
+        owners = [m for m in ring.members if any(low < position <= high for low, high in ring.ranges(m))]
+        assert owners == [ring.owner(position)]
+
+
+def test_hash_ring_moves_few_hosts():
+    hosts = [f"host{n}.test" for n in range(1000)]
+    before = HashRing(["w1", "w2", "w3"])
+    after = HashRing(["w1", "w2", "w3", "w4"])
+    moved = [h for h in hosts if before.owner(host_hash(f"http://{h}/")) != after.owner(host_hash(f"http://{h}/"))]
+    # Only hosts taken over by the new worker move
+    assert all(after.owner(host_hash(f"http://{h}/")) == "w4" for h in moved)
+    assert len(moved) < 500
+
+
+def test_lease_ack_finished(tmp_path):
+    store = SQLiteFrontierStore(tmp_path / "frontier.sqlite3")
+    store.register("w1")
+    assert store.add_many(_urls(2, 3)) == 6
+    assert store.add_many(_urls(2, 4)) == 2  # the table is the seen set
+
+    leased = store.lease("w1", 5)
+    assert len(leased) == 5 and store.counts() == {"pending": 3, "leased": 5, "done": 0, "failed": 0}
+    assert not store.finished()
+    store.ack(leased[:4])
+    store.fail(leased[4:])
+    store.release("w1", [])
+    rest = store.lease("w1", 10)
+    assert sorted(rest) == sorted(set(_urls(2, 4)) - set(leased))
+    store.ack(rest)
+    assert store.counts() == {"pending": 0, "leased": 0, "done": 7, "failed": 1}
+    assert store.finished()
+    store.close()
+
+
+def test_max_pages_caps_leases(tmp_path):
+    store = SQLiteFrontierStore(tmp_path / "frontier.sqlite3")
+    store.add_many(_urls(1, 10))
+    first = store.lease("w1", 4, max_pages=6)
+    assert len(first) == 4
+    assert len(store.lease("w1", 4, max_pages=6)) == 2
+    assert store.lease("w1", 4, max_pages=6) == []
+    store.release("w1")
+    assert len(store.lease("w1", 10, max_pages=6)) == 6
+    store.close()
+
+
+def test_hosts_partitioned_between_workers(tmp_path):
+    store = SQLiteFrontierStore(tmp_path / "frontier.sqlite3")
+    store.register("w1")
+    store.register("w2")
+    store.add_many(_urls(20, 2))
+    ring = HashRing(["w1", "w2"])
+    for worker in ("w1", "w2"):
+        leased = store.lease(worker, 100)
+        assert leased and all(ring.owner(host_hash(url)) == worker for url in leased)
+    assert store.pending() == 0
+    store.close()
+
+
+def test_expired_leases_are_redelivered(tmp_path):
+    store = SQLiteFrontierStore(tmp_path / "frontier.sqlite3", lease_seconds=0.2, max_deliveries=2)
+    store.register("w1")
+    store.register("w2")
+    store.add_many(_urls(6, 1))
+    crashed = store.lease("w1", 10)
+    assert crashed
+
+    time.sleep(0.3)  # w1's leases and heartbeat expire; w2 now owns every host
+    redelivered = store.lease("w2", 10)
+    assert set(crashed) <= set(redelivered)
+    assert len(redelivered) == 6
+
+    time.sleep(0.3)  # crashed again: URLs delivered twice are given up on
+    assert store.lease("w3", 10) == [url for url in redelivered if url not in crashed]
+    assert store.counts()["failed"] == len(crashed)
+    store.close()
+
+
+def test_heartbeat_keeps_leases(tmp_path):
+    store = SQLiteFrontierStore(tmp_path / "frontier.sqlite3", lease_seconds=0.3)
+    store.add_many(_urls(1, 2))
+    leased = store.lease("w1", 10)
+    for _ in range(3):
+        time.sleep(0.15)
+        store.heartbeat("w1")
+    assert store.lease("w2", 10) == []  # still leased to w1
+    store.unregister("w2")
+    store.register("w1")  # a restarted w1 starts over with its old leases
+    assert store.counts()["pending"] == 2
+    assert sorted(store.lease("w1", 10)) == sorted(leased)
+    store.close()
+
+
+class ConfigStore:
+    def __init__(self, config):
+        self.config = config
+
+
+def test_open_store(tmp_path):
+    store = open_store({"lease_seconds": 5}, tmp_path / "frontier.sqlite3")
+    assert isinstance(store, SQLiteFrontierStore) and store.lease_seconds == 5
+    store.close()
+    config = {"backend": f"{__name__}:ConfigStore", "url": "redis://queue"}
+    assert open_store(config, tmp_path / "unused").config == config
+
+
+def test_shared_frontier_workers(tmp_path):
+    async def worker(worker_id, crawled):
+        queue = SharedFrontier(SQLiteFrontierStore(tmp_path / "frontier.sqlite3"), worker_id, {"poll": 0.05, "batch": 2})
+        queue.add("http://host0.test/p/0?utm_source=x")
+        crawl = asyncio.ensure_future(_crawl(queue, crawled))
+        await queue.join()
+        crawl.cancel()
+        await asyncio.gather(crawl, return_exceptions=True)
+        counts = await queue.counts()
+        await queue.close()
+        return counts
+
+    async def _crawl(queue, crawled):
+        while True:
+            url = await queue.get()
+            host, n = url.split("/")[2], int(url.rsplit("/", 1)[1])
+            crawled.append(url)
+            # Each page links to the next one and to the first page of another host
+            if n < 4:
+                queue.add(f"http://{host}/p/{n + 1}")
+                queue.add(f"http://host{(int(host[4:-5]) + 1) % 8}.test/p/0")
+            queue.ack([url])
+
+    async def run():
+        crawled = [], []
+        counts = await asyncio.gather(worker("w1", crawled[0]), worker("w2", crawled[1]))
+        return crawled, counts
+
+    (first, second), counts = asyncio.run(run())
+    assert first and second
+    assert sorted(first + second) == sorted(_urls(8, 5))
+    assert {url.split("/")[2] for url in first}.isdisjoint(url.split("/")[2] for url in second)
+    assert counts[-1] == {"pending": 0, "leased": 0, "done": 40, "failed": 0}
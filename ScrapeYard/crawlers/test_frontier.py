@@ -0,0 +1,86 @@
+import pytest
+
+from .frontier import AsyncURLFrontier, BloomFilter, FingerprintSet, URLFrontier, canonicalize_url, make_seen_set
+
+
+@pytest.mark.parametrize("url, canonical", [
+    ("HTTP://Example.COM:80/a?b=2&a=1#frag", "http://example.com/a?a=1&b=2"),
+    ("https://example.com:443", "https://example.com/"),
+    ("https://example.com:8443/x", "https://example.com:8443/x"),
+    ("https://example.com/?utm_source=x&id=7&gclid=y", "https://example.com/?id=7"),
+    ("https://example.com/?q=&utm_medium=mail", "https://example.com/?q="),
+    ("http://user:pw@example.com/", "http://user:pw@example.com/"),
+    ("http://[2001:DB8::1]:8080/p", "http://[2001:db8::1]:8080/p"),
+    ("http://[::1]/", "http://[::1]/"),
+    ("https://example.com/?flag&b=1&a=", "https://example.com/?a=&b=1&flag"),
+    ("https://example.com/?q=a+b&r=%2F&&", "https://example.com/?q=a+b&r=%2F"),
+    # Unparseable: kept as is rather than raising
+    ("http://a.com:99999/x ", "http://a.com:99999/x"),
+    ("http://[::1/x", "http://[::1/x"),
+])
+def test_canonicalize_url(url, canonical):
+    assert canonicalize_url(url) == canonical
+
+
+def test_canonicalize_url_custom_drop_params():
+    assert canonicalize_url("https://example.com/?sid=1&id=2", ["sid"]) == "https://example.com/?id=2"
+    assert canonicalize_url("https://example.com/?utm_source=x", []) == "https://example.com/?utm_source=x"
+
+
+@pytest.mark.parametrize("seen", [set, FingerprintSet, lambda: BloomFilter(capacity=10_000, error_rate=0.001)])
+def test_seen_sets_have_no_false_negatives(seen):
+    urls = [f"https://example.com/p/{n}" for n in range(5_000)]
+    s = seen()
+    for url in urls:
+        s.add(url)
+    assert all(url in s for url in urls)
+    assert len(s) == len(urls)
+    assert "https://example.com/other" not in s
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    for n in range(10_000):
+        bloom.add(f"https://example.com/p/{n}")
+    false_positives = sum(f"https://example.com/q/{n}" in bloom for n in range(10_000))
+    assert false_positives < 300  # 1% expected; generous margin
+
+
+def test_make_seen_set():
+    assert isinstance(make_seen_set(), set)
+    assert isinstance(make_seen_set({"seen": "fingerprint"}), FingerprintSet)
+    assert isinstance(make_seen_set({"seen": "bloom", "capacity": 100}), BloomFilter)
+    with pytest.raises(ValueError):
+        make_seen_set({"seen": "lru"})
+
+
+@pytest.mark.parametrize("seen", ["exact", "fingerprint", "bloom"])
+def test_frontier_dedups_spellings_of_a_url(seen):
+    frontier = URLFrontier({"seen": seen, "capacity": 1000})
+    assert frontier.add("https://example.com/a?utm_source=x")
+    assert not frontier.add("https://EXAMPLE.com:443/a#top")
+    assert frontier.add_many(["https://example.com/b", "https://example.com/a", "https://example.com/b"]) == 1
+    assert frontier.pop() == "https://example.com/a"
+    # Popped URLs stay seen
+    assert not frontier.add("https://example.com/a")
+    assert "https://example.com/a?gclid=1" in frontier
+    assert len(frontier) == 1
+
+
+def test_frontier_keeps_invalid_links():
+    frontier = URLFrontier()
+    assert frontier.add_many(["http://a.com:99999/x", "https://example.com/?utm_source=x"]) == 2
+    assert frontier.pending() == ["http://a.com:99999/x", "https://example.com/"]
+
+
+def test_frontier_snapshot_requeues_in_flight_first():
+    frontier = URLFrontier()
+    frontier.add_many(f"https://example.com/{n}" for n in range(4))
+    in_flight = [frontier.pop(), frontier.pop()]
+
+    restored = AsyncURLFrontier()
+    restored.restore(frontier.snapshot(in_flight=in_flight))
+    assert restored.pending() == [f"https://example.com/{n}" for n in range(4)]
+    assert not restored.add("https://example.com/0")
+    assert restored.add("https://example.com/4")
+    assert len(restored) == 5
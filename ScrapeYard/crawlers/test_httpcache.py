@@ -0,0 +1,86 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from .httpcache import HTTPCache
+from .utils import PoliteCrawler
+
+
+def _fetch_twice(base: str, cache_path):
+    async def run():
+        crawler = PoliteCrawler(
+            domain=base.removeprefix("http://"), user_agent="testbot", delay=0,
+            robots_cache_dir=None, cache=HTTPCache(cache_path),
+        )
+        async with crawler:
+            first = await crawler.fetch(f"{base}/p/3")
+            crawler.cache.store_results(f"{base}/p/3", "hash", [[{"title": "x"}], []])
+            second = await crawler.fetch(f"{base}/p/3?utm_source=feed")
+        return first, second
+    return asyncio.run(run())
+
+
+def test_revalidation_reuses_cached_body(synthetic_site, tmp_path):
+    site, base = synthetic_site(etag=True)
+    first, second = _fetch_twice(base, tmp_path / "cache.sqlite3")
+
+    assert "not_modified" not in first.extensions
+    assert second.status_code == 200
+    assert second.extensions["not_modified"]
+    assert second.content == first.content
+    entry = second.extensions["cache_entry"]
+    assert (entry.etag, entry.extract_hash, entry.results) == ('"p3"', "hash", [[{"title": "x"}], []])
+    assert [status for path, status in site.requests if path.startswith("/p/3")] == [200, 304]
+
+
+def test_responses_without_validators_are_not_cached(synthetic_site, tmp_path):
+    site, base = synthetic_site()
+    first, second = _fetch_twice(base, tmp_path / "cache.sqlite3")
+    assert "not_modified" not in second.extensions
+    assert [status for path, status in site.requests if path.startswith("/p/3")] == [200, 200]
+
+
+def test_cache_eviction_and_store_replaces(tmp_path):
+    cache = HTTPCache(tmp_path / "cache.sqlite3", max_bytes=10**9)
+    cache.store("https://example.com/a", '"1"', None, "text/html", b"old")
+    cache.store_results("https://example.com/a", "hash", [[], []])
+    cache.store("https://example.com/a", '"2"', None, "text/html", b"new")
+    entry = cache.get("https://example.com/a")
+    assert (entry.etag, entry.body, entry.results) == ('"2"', b"new", None)
+    assert entry.validators() == {"If-None-Match": '"2"'}
+
+    size = cache.total_bytes
+    cache.max_bytes = size * 2
+    for n in range(5):
+        cache.store(f"https://example.com/{n}", None, "Tue, 01 Oct 2024 00:00:00 GMT", "text/html", b"new")
+    assert cache.total_bytes <= cache.max_bytes
+    assert cache.get("https://example.com/4") is not None
+    assert cache.get("https://example.com/a") is None  # least recently used
+    cache.close()
+
+
+def test_workers_sharing_a_cache_evict_against_its_real_size(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    body = bytes(range(256)) * 8  # barely compresses
+    caches = [HTTPCache(path, max_bytes=10_000) for _ in range(3)]
+    for n in range(30):
+        caches[n % 3].store(f"https://example.com/{n}", '"1"', None, "text/html", body)
+    # Each worker sees the others' entries; together they still stay under max_bytes
+    assert caches[0].total_bytes == caches[1].total_bytes <= 10_000
+    assert caches[0].total_bytes == caches[0].db.execute("SELECT SUM(size) FROM responses").fetchone()[0]
+    assert caches[2].get("https://example.com/29") is not None
+    for cache in caches:
+        cache.close()
+
+
+def test_cache_is_usable_from_threads(tmp_path):
+    cache = HTTPCache(tmp_path / "cache.sqlite3")
+
+    def use(n):
+        url = f"https://example.com/{n}"
+        cache.store(url, f'"{n}"', None, "text/html", b"body")
+        cache.store_results(url, "hash", [[], []])
+        return cache.get(url).etag
+
+    with ThreadPoolExecutor(8) as pool:
+        assert list(pool.map(use, range(50))) == [f'"{n}"' for n in range(50)]
+    cache.close()
@@ -0,0 +1,156 @@
+import asyncio
+
+import pytest
+
+from . import render
+from .render import HeadlessRenderer, RenderRouter, url_pattern
+
+ARTICLE = "<html><body><article>" + "Plenty of server-rendered text. " * 20 + "</article></body></html>"
+
+
+@pytest.mark.parametrize("url, pattern", [
+    ("https://shop.com/", "shop.com/"),
+    ("https://shop.com/page7", "shop.com/page{n}"),
+    ("https://shop.com/item/123", "shop.com/item/*"),
+    ("https://shop.com/blog/some-slug", "shop.com/blog/*"),
+    ("https://shop.com/u/3f2a9c1e-0b7d/profile", "shop.com/u/{id}/*"),
+    ("https://shop.com/list?page=2&sort=a&page=3", "shop.com/list?page=&sort="),
+])
+def test_url_pattern(url, pattern):
+    assert url_pattern(url) == pattern
+
+
+@pytest.mark.parametrize("html, items, reason", [
+    (ARTICLE, None, None),
+    ('<html><body><div id="root"></div><script src="app.js"></script></body></html>', None, "spa_shell"),
+    ("<html><body><app-root></app-root></body></html>", None, "spa_shell"),
+    ("<html><body><noscript>You need to enable JavaScript to run this app.</noscript></body></html>", None, "spa_shell"),
+    ("<html><body><p>Hi</p><script>" + "x" * 5000 + "</script></body></html>", None, "empty_body"),
+    # With a list selector the item count is the only signal
+    ('<html><body><div id="root"></div></body></html>', 3, None),
+    (ARTICLE, 0, "no_items"),
+])
+def test_check(html, items, reason):
+    assert RenderRouter().check(html, items) == reason
+
+
+def test_custom_spa_markers():
+    router = RenderRouter({"spa_markers": [r'<div class="loading-spinner">'], "min_text": 0})
+    assert router.check('<div class="loading-spinner"></div>') == "spa_shell"
+
+
+def test_budget():
+    router = RenderRouter({"budget": 2})
+    urls = [f"https://shop.com/item/{n}" for n in range(4)]
+    assert [router.escalate(url, "no_items") for url in urls] == [True, True, False, False]
+    assert not router.escalate(urls[0], None)
+    assert router.renders == 2
+
+
+def test_learns_render_first():
+    router = RenderRouter({"learn_after": 3})
+    url = "https://shop.com/item/{}"
+    for n in range(3):
+        assert not router.render_first(url.format(n))
+        assert router.escalate(url.format(n), "no_items")
+        router.record_render(url.format(n), helped=True)
+    assert router.render_first(url.format(99))
+    assert not router.render_first("https://shop.com/about")
+
+    # Static pages of the pattern that did not need rendering undo the rule
+    router.escalate(url.format(100), None)
+    assert not router.render_first(url.format(101))
+
+
+def test_stops_escalating_useless_patterns():
+    router = RenderRouter({"learn_after": 2})
+    url = "https://shop.com/search?q={}"
+    for n in range(2):
+        assert router.escalate(url.format(n), "empty_body")
+        router.record_render(url.format(n), helped=False)
+    assert not router.escalate(url.format(2), "empty_body")
+    assert router.escalate("https://shop.com/item/1", "empty_body")
+
+
+def test_state_round_trip():
+    router = RenderRouter({"learn_after": 1})
+    router.escalate("https://shop.com/item/1", "no_items")
+    router.record_render("https://shop.com/item/1", helped=True)
+    restored = RenderRouter({"learn_after": 1})
+    restored.restore(router.state())
+    assert restored.renders == 1
+    assert restored.render_first("https://shop.com/item/2")
+
+
+class BrowserError(Exception):
+    """Stands in for playwright's Error, so the renderer can be tested without a browser."""
+
+
+class FakePage:
+    def __init__(self, error=None):
+        self.error = error
+        self.closed = False
+
+    async def goto(self, url, **kwargs):
+        if self.error is not None:
+            raise self.error
+
+    async def wait_for_selector(self, selector, **kwargs):
+        assert isinstance(selector, str)
+
+    async def content(self):
+        return "<html><body>rendered</body></html>"
+
+    def is_closed(self):
+        return self.closed
+
+
+class FakeSlot:
+    def __init__(self, pages):
+        self.pages = pages
+
+    async def new_page(self):
+        return self.pages.pop(0)
+
+    def is_stale(self, page):
+        return False
+
+    def record(self, page, n):
+        pass
+
+    async def close_page(self, page):
+        page.closed = True
+
+
+@pytest.fixture
+def renderer(monkeypatch):
+    monkeypatch.setattr(render, "PlaywrightError", BrowserError, raising=False)
+    monkeypatch.setattr(render, "PlaywrightTimeoutError", type("TimeoutError", (BrowserError,), {}), raising=False)
+
+    def make(*pages):
+        renderer = HeadlessRenderer({}, list_selector=".item")
+        renderer.slot = FakeSlot(list(pages))  # already "started"
+        return renderer
+    return make
+
+
+def test_renderer_reuses_pages(renderer):
+    page = FakePage()
+    r = renderer(page)
+    assert asyncio.run(r.render("https://shop.com/1")) == "<html><body>rendered</body></html>"
+    assert r.idle == [(page, 1)]
+
+
+def test_renderer_browser_errors_return_none(renderer):
+    page = FakePage(BrowserError("net::ERR_CONNECTION_REFUSED"))
+    r = renderer(page)
+    assert asyncio.run(r.render("https://shop.com/1")) is None
+    assert page.closed and r.idle == []
+
+
+def test_renderer_raises_other_errors(renderer):
+    page = FakePage(ValueError("bug"))
+    r = renderer(page)
+    with pytest.raises(ValueError):
+        asyncio.run(r.render("https://shop.com/1"))
+    assert page.closed and r.idle == []
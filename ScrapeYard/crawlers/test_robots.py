@@ -0,0 +1,102 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from .robots import RobotsCache, _parser_from
+
+
+def _can_fetch(cache: RobotsCache, urls, transport=None) -> list[bool]:
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return [await cache.can_fetch(client, url) for url in urls]
+    return asyncio.run(run())
+
+
+def _robots_requests(site) -> int:
+    return sum(path == "/robots.txt" for path, _ in site.requests)
+
+
+def test_robots_fetched_once_per_origin(synthetic_site, tmp_path):
+    site, base = synthetic_site()
+    loaded = []
+    cache = RobotsCache("testbot", cache_dir=tmp_path, on_load=lambda host, parser: loaded.append(host))
+
+    assert _can_fetch(cache, [f"{base}/p/1", f"{base}/private/x", f"{base}/p/2"]) == [True, False, True]
+    assert _robots_requests(site) == 1
+    assert loaded == [base.removeprefix("http://")]
+
+
+def test_robots_disk_cache_ttl(synthetic_site, tmp_path):
+    site, base = synthetic_site()
+    _can_fetch(RobotsCache("testbot", cache_dir=tmp_path), [f"{base}/p/1"])
+
+    # A fresh process within the TTL reads the disk copy
+    assert _can_fetch(RobotsCache("testbot", cache_dir=tmp_path), [f"{base}/private/x"]) == [False]
+    assert _robots_requests(site) == 1
+
+    # Expired: downloaded again
+    assert _can_fetch(RobotsCache("testbot", cache_dir=tmp_path, ttl=0), [f"{base}/private/x"]) == [False]
+    assert _robots_requests(site) == 2
+
+
+def test_memoized_decisions_match_parser():
+    body = "User-agent: *\nDisallow: /private/\nDisallow: /tmp\nAllow: /private/ok\n"
+    cache = RobotsCache("testbot", cache_dir=None)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text=body))
+    paths = [
+        "/", "/p/1", "/private/", "/private/x", "/private/ok", "/private/okay", "/tmp", "/tmpfile",
+        "/tm", "/p/1?q=/private/", "/%70rivate/x", "/private%2Fx",
+    ]
+    urls = [f"https://example.com{path}" for path in paths]
+    parser = _parser_from(200, body)
+
+    expected = [parser.can_fetch("testbot", url) for url in urls]
+    assert _can_fetch(cache, urls, transport) == expected
+    assert _can_fetch(cache, urls, transport) == expected  # now from the memo
+
+
+def test_robots_download_is_retried():
+    statuses = [503, 503, 200]
+
+    def handler(request):
+        return httpx.Response(statuses.pop(0), text="User-agent: *\nDisallow: /x\n")
+
+    cache = RobotsCache("testbot", cache_dir=None)
+    cache.retry_wait = 0
+    assert _can_fetch(cache, ["https://example.com/x", "https://example.com/y"], httpx.MockTransport(handler)) == [
+        False, True
+    ]
+    assert statuses == []
+
+
+def test_unreachable_robots_disallows_all():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        raise httpx.ConnectError("refused", request=request)
+
+    cache = RobotsCache("testbot", cache_dir=None)
+    cache.retry_wait = 0
+    assert _can_fetch(cache, ["https://example.com/y"], httpx.MockTransport(handler)) == [False]
+    assert len(calls) == cache.attempts
+
+
+def test_missing_robots_allows_all():
+    cache = RobotsCache("testbot", cache_dir=None)
+    transport = httpx.MockTransport(lambda request: httpx.Response(404))
+    assert _can_fetch(cache, ["https://example.com/private/x"], transport) == [True]
+
+
+def test_concurrent_disk_writes(tmp_path):
+    # Workers sharing robots_cache_dir save the same origin at once
+    caches = [RobotsCache("testbot", cache_dir=tmp_path) for _ in range(8)]
+    body = "User-agent: *\nDisallow: /private/\n" * 200
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda cache: [cache._save_to_disk("https://example.com", 200, body) for _ in range(20)], caches))
+
+    files = list(tmp_path.iterdir())
+    assert len(files) == 1 and files[0].suffix == ".json"
+    assert json.loads(files[0].read_text(encoding="utf-8"))["body"] == body
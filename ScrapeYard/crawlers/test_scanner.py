@@ -0,0 +1,66 @@
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+from .scanner import ContentScanner, _rule_groups
+
+RULES = json.loads((Path(__file__).parent / "Red_teaming" / "scan_rules.json").read_text(encoding="utf-8"))
+
+TEXTS = [
+    "",
+    "Nothing to see here.",
+    "Admin login: PASSWORD=hunter2, api_key / API-KEY / apikey. Contact root@example.com or Root@Example.com.",
+    "Backup of the config (debug) at /backup.zip; see https://youtu.be/abc123 and https://www.youtube.com/watch?v=x",
+    # Lowercasing changes the length of "İ", so offsets need the IGNORECASE scan
+    "İstanbul dashboard: username ADMIN, Token tOkEn, secret credentials; phpinfo() — ops@example.org",
+    "password " * 30,
+]
+
+
+def per_rule_scan(keywords, extract, text, max_positions=20):
+    # The scan the combined regexes replaced: one pass per rule
+    found = {}
+    for rule in keywords:
+        positions = [m.start() for m in re.finditer(rule, text, re.IGNORECASE)]
+        if positions:
+            found[rule] = {"count": len(positions), "positions": positions[:max_positions]}
+    extracted = {field: list(dict.fromkeys(m.group() for m in re.finditer(rule, text))) for field, rule in extract.items()}
+    return {"keywords": found, "extract": extracted}
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_scan_matches_per_rule_scan(text):
+    scanner = ContentScanner(RULES["keywords"], RULES["extract"])
+    assert scanner.scan(text) == per_rule_scan(RULES["keywords"], RULES["extract"], text)
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_mixed_case_rules_match_per_rule_scan(text):
+    keywords = ["Password", "ADMIN", "api[_-]?KEY", "token"]
+    scanner = ContentScanner(keywords)
+    assert all(lowercase is None for lowercase, _ in scanner.keyword_passes)  # IGNORECASE scans only
+    assert scanner.scan(text)["keywords"] == per_rule_scan(keywords, {}, text)["keywords"]
+
+
+@pytest.mark.parametrize("text", TEXTS + ["pass: x, password = y, adminadmin, the tokens, bad token"])
+def test_overlapping_and_anchored_rules_match_per_rule_scan(text):
+    # Rules sharing text, lookarounds and anchors are each counted in full
+    keywords = ["password(?=\\s*[:=])", "pass", "word", "admin", "min", r"\btoken\b", "^admin", "admin$"]
+    extract = {"user": r"(?<=username )\w+", "name": r"\w+name"}
+    scanner = ContentScanner(keywords, extract)
+    assert scanner.scan(text) == per_rule_scan(keywords, extract, text)
+
+
+def test_rule_groups():
+    # "secret" and "token" could both match "secretoken"; each regex gets a pass of its own
+    groups = _rule_groups(["secret", "token", "api[_-]?key", "login", "admin", "MIN", "debug"], ignore_case=True)
+    assert groups == [[0, 3, 4, 6], [1, 5], [2]]
+
+
+def test_from_file(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"keywords": ["secret"]}), encoding="utf-8")
+    scan = ContentScanner.from_file(path, max_positions=2).scan("secret SECRET Secret")
+    assert scan == {"keywords": {"secret": {"count": 3, "positions": [0, 7]}}, "extract": {}}
@@ -0,0 +1,143 @@
+import gzip
+import json
+
+import pytest
+
+from .sinks import JSONLSink, JSONSink, open_sink
+
+
+def _items(start, stop):
+    return [{"url": f"https://example.com/{n}", "n": n} for n in range(start, stop)]
+
+
+def _read_jsonl(files) -> list[dict]:
+    rows = []
+    for f in files:
+        opener = gzip.open if str(f).endswith(".gz") else open
+        with opener(f, "rt", encoding="utf-8") as fh:
+            rows.extend(json.loads(line) for line in fh)
+    return rows
+
+
+def test_jsonl_rotation(tmp_path):
+    with JSONLSink(tmp_path, batch_size=2, rotate_items=3) as sink:
+        for item in _items(0, 7):
+            sink.write(item)
+    assert [f.name for f in sink.files] == ["output-00000.jsonl", "output-00001.jsonl", "output-00002.jsonl"]
+    assert [len(_read_jsonl([f])) for f in sink.files] == [3, 3, 1]
+    assert _read_jsonl(sink.files) == _items(0, 7)
+
+
+def test_json_sink_matches_json_dump(tmp_path):
+    items = _items(0, 3)
+    with JSONSink(tmp_path, stem="full", batch_size=2) as sink:
+        for item in items:
+            sink.write(item)
+    assert (tmp_path / "full.json").read_text(encoding="utf-8") == json.dumps(items, indent=2)
+
+    with JSONSink(tmp_path, stem="empty"):
+        pass
+    assert json.loads((tmp_path / "empty.json").read_text(encoding="utf-8")) == []
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_checkpoint_restore_drops_later_writes(tmp_path, compression):
+    sink = JSONLSink(tmp_path, batch_size=100, compression=compression)
+    for item in _items(0, 3):
+        sink.write(item)
+    state = sink.checkpoint()
+    # Written after the checkpoint, then the process dies
+    for item in _items(3, 5):
+        sink.write(item)
+    sink.flush()
+    sink._file.close()
+
+    resumed = JSONLSink(tmp_path, batch_size=100, compression=compression)
+    resumed.restore(state)
+    for item in _items(3, 6):
+        resumed.write(item)
+    resumed.close()
+    assert resumed.items_written == 6
+    assert _read_jsonl(resumed.files) == _items(0, 6)
+
+
+def test_open_sink_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        open_sink({"format": "xml", "path": str(tmp_path)})
+    with pytest.raises(ValueError):
+        open_sink({"format": "jsonl", "path": str(tmp_path), "compression": "bz2"})
+
+
+def test_arrow_null_column_becomes_string(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    sink = open_sink({"format": "arrow", "path": str(tmp_path), "batch_size": 2})
+    sink.write({"url": "a", "price": None})
+    sink.write({"url": "b", "price": None})
+    sink.write({"url": "c", "price": "9.99"})
+    sink.write({"url": "d", "price": 5})
+    sink.close()
+
+    with pa.ipc.open_stream(sink.files[0]) as reader:
+        table = reader.read_all()
+    assert table.schema.field("price").type == pa.string()
+    assert table.column("price").to_pylist() == [None, None, "9.99", "5"]
+
+
+def test_arrow_checkpoints_seal_at_threshold(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    output = {"format": "arrow", "path": str(tmp_path), "batch_size": 1, "seal_items": 4}
+    sink = open_sink(output)
+    state = sink.checkpoint()
+    for item in _items(0, 3):
+        sink.write(item)
+        state = sink.checkpoint()
+    # Below seal_items nothing is sealed; the rows travel in the checkpoint instead
+    assert state["files"] == [] and state["items_written"] == 0 and len(state["unsealed"]) == 3
+
+    sink.write(_items(3, 4)[0])
+    state = sink.checkpoint()
+    assert len(state["files"]) == 1 and state["items_written"] == 4 and state["unsealed"] == []
+    sink.write(_items(4, 5)[0])
+    state = sink.checkpoint()
+    sink.close()
+
+    # Crash after the last checkpoint: the unsealed row is rewritten on resume
+    resumed = open_sink(output)
+    resumed.restore(state)
+    resumed.write(_items(5, 6)[0])
+    resumed.close()
+    rows = []
+    for f in resumed.files:
+        with pa.ipc.open_stream(f) as reader:
+            rows.extend(reader.read_all().to_pylist())
+    assert rows == _items(0, 6)
+    assert resumed.items_written == 6
+
+
+def test_arrow_keeps_no_rows_without_checkpoints(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    sink = open_sink({"format": "arrow", "path": str(tmp_path), "batch_size": 2})
+    for item in _items(0, 5):
+        sink.write(item)
+    assert sink._unsealed == []
+
+    # The first checkpoint seals what was written before it
+    state = sink.checkpoint()
+    assert len(state["files"]) == 1 and state["items_written"] == 5 and state["unsealed"] == []
+    sink.write(_items(5, 6)[0])
+    assert len(sink.checkpoint()["unsealed"]) == 1
+    sink.close()
+    rows = []
+    for f in sink.files:
+        with pa.ipc.open_stream(f) as reader:
+            rows.extend(reader.read_all().to_pylist())
+    assert rows == _items(0, 6)
+
+
+def test_columnar_codecs(tmp_path):
+    pytest.importorskip("pyarrow")
+    with pytest.raises(ValueError):
+        open_sink({"format": "arrow", "path": str(tmp_path), "compression": "gzip"})
+    with pytest.raises(ValueError):
+        open_sink({"format": "parquet", "path": str(tmp_path), "compression": "lzma"})
+    open_sink({"format": "parquet", "path": str(tmp_path), "compression": "gzip"}).close()
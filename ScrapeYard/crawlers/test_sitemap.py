@@ -0,0 +1,97 @@
+import asyncio
+import gzip
+
+import httpx
+import requests
+
+from .sitemap import SitemapStream, aiter_sitemap, iter_sitemap, robots_sitemaps
+
+
+def _aentries(urls, transport=None, **kwargs) -> list:
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return [entry async for entry in aiter_sitemap(client, urls, **kwargs)]
+    return asyncio.run(run())
+
+
+def _urlset(*entries) -> bytes:
+    urls = "".join(
+        f"<url><loc>{loc}</loc>" + (f"<lastmod>{lastmod}</lastmod>" if lastmod else "") + "</url>"
+        for loc, lastmod in entries
+    )
+    return f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'.encode()
+
+
+def test_sitemap_index(synthetic_site):
+    site, base = synthetic_site(pages=120, sitemap_chunk=50)
+    expected = [f"{base}/p/{n}" for n in range(120)]
+    assert [e.loc for e in _aentries([f"{base}/sitemap.xml"])] == expected
+    with requests.Session() as session:
+        assert [e.loc for e in iter_sitemap(session, [f"{base}/sitemap.xml"])] == expected
+    # Index plus its three child sitemaps, each read once per pass
+    assert sum(path.startswith("/sitemap") for path, _ in site.requests) == 8
+
+
+def test_max_sitemaps(synthetic_site):
+    site, base = synthetic_site(pages=120, sitemap_chunk=50)
+    assert len(_aentries([f"{base}/sitemap.xml"], max_sitemaps=2)) == 50
+
+
+def test_since_skips_unchanged_entries(synthetic_site):
+    site, base = synthetic_site(pages=10, lastmod="2024-01-01")
+    assert _aentries([f"{base}/sitemap.xml"], since="2025-01-01") == []
+    assert len(_aentries([f"{base}/sitemap.xml"], since="2023-06-01T00:00:00+00:00")) == 10
+
+
+def test_since_skips_unchanged_child_sitemaps():
+    index = (
+        b'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        b"<sitemap><loc>https://example.com/old.xml</loc><lastmod>2020-01-01</lastmod></sitemap>"
+        b"<sitemap><loc>https://example.com/new.xml</loc><lastmod>2025-06-01</lastmod></sitemap>"
+        b"</sitemapindex>"
+    )
+    bodies = {
+        "/sitemap.xml": index,
+        "/old.xml": _urlset(("https://example.com/old", None)),
+        "/new.xml": _urlset(("https://example.com/new", "2025-06-01"), ("https://example.com/stale", "2021-01-01")),
+    }
+    fetched = []
+
+    def handler(request):
+        fetched.append(request.url.path)
+        return httpx.Response(200, content=bodies[request.url.path])
+
+    entries = _aentries(["https://example.com/sitemap.xml"], httpx.MockTransport(handler), since="2024-01-01")
+    assert [e.loc for e in entries] == ["https://example.com/new"]
+    assert fetched == ["/sitemap.xml", "/new.xml"]
+
+
+def test_gzip_sitemap():
+    body = gzip.compress(_urlset(*[(f"https://example.com/{n}", None) for n in range(500)]))
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+    assert len(_aentries(["https://example.com/sitemap.xml.gz"], transport)) == 500
+
+    # Fed a byte at a time, gzip is still detected from the first two bytes
+    stream = SitemapStream()
+    entries = [entry for i in range(len(body)) for entry in stream.feed(body[i:i + 1])]
+    entries += stream.close()
+    assert [e.loc for kind, e in entries] == [f"https://example.com/{n}" for n in range(500)]
+
+
+def test_failed_sitemaps_are_skipped():
+    def handler(request):
+        if request.url.path == "/broken.xml":
+            return httpx.Response(200, content=b"<urlset><url><loc>https://example.com/a</loc></url><ur")
+        if request.url.path == "/missing.xml":
+            return httpx.Response(404)
+        return httpx.Response(200, content=_urlset(("https://example.com/b", None)))
+
+    urls = [f"https://example.com/{name}.xml" for name in ("missing", "broken", "ok")]
+    entries = _aentries(urls, httpx.MockTransport(handler))
+    assert [e.loc for e in entries] == ["https://example.com/a", "https://example.com/b"]
+
+
+def test_robots_sitemaps(synthetic_site):
+    site, base = synthetic_site()
+    assert robots_sitemaps(site.robots_txt(base)) == [f"{base}/sitemap.xml"]
+    assert robots_sitemaps("User-agent: *\nsitemap:  https://a/s.xml \nSitemap:\n") == ["https://a/s.xml"]
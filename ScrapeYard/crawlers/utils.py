@@ -1,75 +1,190 @@
 import asyncio
 import time
-import json
-from urllib.robotparser import RobotFileParser
 from urllib.parse import urljoin, urlparse
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+
+from .metrics import Metrics
+from .robots import RobotsCache
+from .scheduler import PolitenessScheduler
+from .sinks import open_sink
+
+# Optional HTTP/2 support (pip install "httpx[http2]")
+H2_AVAILABLE = False
+try:
+    import h2  # noqa: F401
+    H2_AVAILABLE = True
+except ImportError:
+    pass
+
+
+class ResponseTooLargeError(Exception):
+    """Raised when a response body exceeds the configured max_response_size."""
+
+
+def _count_retry(retry_state):
+    # tenacity hook, called before each retry of PoliteCrawler.fetch
+    crawler = retry_state.args[0]
+    error = retry_state.outcome.exception()
+    crawler.metrics.inc("fetch_retries", error=type(error).__name__)
 
 
 class PoliteCrawler:
-    """Handles respectful crawling: robots.txt, delays, and retries."""
+    """Handles respectful crawling: robots.txt, delays, and retries.
+
+    Owns one pooled keep-alive client for the whole crawl; use it as an
+    async context manager (or call aclose()) to release connections.
+    """
 
-    def __init__(self, domain: str, user_agent: str, delay: float = 1.0):
+    def __init__(
+        self,
+        domain: str,
+        user_agent: str,
+        delay: float = 1.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        timeout: float = 10.0,
+        max_response_size: int | None = None,
+        max_delay: float = 60.0,
+        robots_cache_dir: str | None = ".robots_cache",
+        robots_ttl: float = 86400,
+        cache=None,
+        metrics: Metrics | None = None,
+    ):
         self.domain = domain
         self.user_agent = user_agent
         self.delay = delay
-        self.last_request = 0
-        self.robot_parser = None
-        self._init_robots()
-
-    def _init_robots(self):
-        """Fetch and parse robots.txt if available."""
-        robots_url = f"https://{self.domain}/robots.txt"
-        try:
-            resp = httpx.get(robots_url, timeout=10)
-            if resp.status_code == 200:
-                self.robot_parser = RobotFileParser()
-                self.robot_parser.parse(resp.text.splitlines())
-        except Exception:
-            # Ignore failures (e.g., no robots.txt or network error)
-            pass
-
-    def can_fetch(self, url: str) -> bool:
-        """Check if crawling this URL is allowed by robots.txt."""
-        if not self.robot_parser:
-            return True
-        return self.robot_parser.can_fetch(self.user_agent, url)
-
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+        self.scheduler = PolitenessScheduler(default_delay=delay, max_delay=max_delay)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        if http2 and not H2_AVAILABLE:
+            print("HTTP/2 requested but the 'h2' package is missing; falling back to HTTP/1.1")
+        self.http2 = http2 and H2_AVAILABLE
+        self.timeout = timeout
+        self.max_response_size = max_response_size
+        self.client = None
+        self.cache = cache  # optional HTTPCache for conditional revalidation
+        self.metrics = metrics or Metrics()
+        self.robots = RobotsCache(
+            user_agent,
+            cache_dir=robots_cache_dir,
+            ttl=robots_ttl,
+            on_load=lambda host, parser: self.scheduler.apply_robots(host, parser, user_agent),
+        )
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            headers={"User-Agent": self.user_agent},
+            limits=self.limits,
+            http2=self.http2,
+            timeout=self.timeout,
+        )
+
+    async def __aenter__(self):
+        if self.client is None:
+            self.client = self._build_client()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the pooled client and its connections."""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        if self.cache is not None:
+            self.cache.close()
+
+    async def can_fetch(self, url: str) -> bool:
+        """Check if crawling this URL is allowed by robots.txt (fetched lazily per host)."""
+        if self.client is None:
+            self.client = self._build_client()
+        return await self.robots.can_fetch(self.client, url)
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        # tenacity also catches CancelledError; retrying it would make workers uncancellable
+        retry=retry_if_not_exception_type((ResponseTooLargeError, PermissionError, asyncio.CancelledError)),
+        before_sleep=_count_retry,
+    )
     async def fetch(self, url: str) -> httpx.Response:
-        """Fetch a URL with politeness and retry logic."""
-        if not self.can_fetch(url):
+        """Fetch a URL with politeness and retry logic.
+
+        With a cache, known URLs are revalidated with If-None-Match /
+        If-Modified-Since; on 304 the cached body is returned as a 200
+        response with resp.extensions["not_modified"] set and the CacheEntry
+        in resp.extensions["cache_entry"].
+        """
+        metrics = self.metrics
+        metrics.inc("fetch_attempts")
+        with metrics.timer("robots"):
+            allowed = await self.can_fetch(url)
+        if not allowed:
+            metrics.inc("robots_disallowed")
             raise PermissionError(f"robots.txt disallows {url}")
 
-        # Enforce crawl delay
-        now = time.time()
-        wait_time = self.delay - (now - self.last_request)
+        # Enforce the per-host crawl delay (slot is reserved before sleeping)
+        host = urlparse(url).netloc
+        wait_time = self.scheduler.reserve(host)
+        metrics.observe("politeness_wait", max(wait_time, 0.0))
         if wait_time > 0:
             await asyncio.sleep(wait_time)
 
-        async with httpx.AsyncClient(headers={"User-Agent": self.user_agent}) as client:
-            resp = await client.get(url)
+        # The cache is SQLite on disk (possibly waiting on other workers' writes): keep it off the loop
+        cached = await asyncio.to_thread(self.cache.get, url) if self.cache is not None else None
+        headers = cached.validators() if cached else None
+
+        started = time.monotonic()
+        extensions = {"trace": metrics.httpx_trace()}
+        async with self.client.stream("GET", url, headers=headers, extensions=extensions) as resp:
+            self.scheduler.record(
+                host, resp.status_code, time.monotonic() - started, resp.headers.get("Retry-After")
+            )
+            metrics.inc("http_responses", status=resp.status_code)
+            if cached and resp.status_code == 304:
+                return httpx.Response(
+                    200,
+                    headers={"Content-Type": cached.content_type or "text/html"},
+                    content=cached.body,
+                    request=resp.request,
+                    extensions={"not_modified": True, "cache_entry": cached},
+                )
             resp.raise_for_status()
-            self.last_request = time.time()
-            return resp
+            limit = self.max_response_size
+            if limit and int(resp.headers.get("Content-Length") or 0) > limit:
+                raise ResponseTooLargeError(f"{url} declares more than {limit} bytes")
+
+            body = bytearray()
+            with metrics.timer("download"):
+                async for chunk in resp.aiter_bytes():
+                    body.extend(chunk)
+                    if limit and len(body) > limit:
+                        raise ResponseTooLargeError(f"{url} exceeded {limit} bytes")
+            metrics.inc("http_bytes", len(body))
+            # Same as Response.aread(), but with the size cap applied while streaming
+            resp._content = bytes(body)
+
+        if self.cache is not None:
+            await asyncio.to_thread(
+                self.cache.store,
+                url,
+                resp.headers.get("ETag"),
+                resp.headers.get("Last-Modified"),
+                resp.headers.get("Content-Type"),
+                resp.content,
+            )
+        return resp
 
 
 async def write_items(items: list[dict], output_config: dict):
-    """Write extracted items to JSONL or CSV."""
-    from pathlib import Path
-
-    output_path = Path(output_config["path"])
-    output_path.mkdir(parents=True, exist_ok=True)
-    filepath = output_path / f"output.{output_config['format']}"
-
-    if output_config["format"] == "jsonl":
-        with open(filepath, "w", encoding="utf-8") as f:
-            for item in items:
-                f.write(json.dumps(item, ensure_ascii=False) + "\n")
-    elif output_config["format"] == "csv" and items:
-        import csv
-        with open(filepath, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=items[0].keys())
-            writer.writeheader()
-            writer.writerows(items)
\ No newline at end of file
+    """Write extracted items to JSONL or CSV in one go (see sinks.open_sink for streaming)."""
+    with open_sink(output_config) as sink:
+        for item in items:
+            sink.write(item)